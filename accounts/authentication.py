@@ -0,0 +1,194 @@
+"""Authentification JWT sans lecture de l'utilisateur à chaque requête.
+
+Les jetons émis par ``/api/auth/login/`` portent les claims ``username``,
+``user_type`` et ``is_staff`` en plus de l'identifiant : ``ClaimsJWTAuthentication``
+construit à partir d'eux un ``ClaimsUser`` dont les autres champs ne sont
+chargés qu'à la demande. Les claims sont relus en base à chaque
+rafraîchissement du jeton.
+
+Les jetons révoqués (rotation, déconnexion) sont vérifiés dans un ensemble
+en mémoire des JTI non expirés, rechargé par incréments toutes les
+``JWT_BLACKLIST_REFRESH_SECONDS`` secondes. Un jeton révoqué sur un autre
+worker reste donc accepté au plus pendant cet intervalle.
+
+Les claims pouvant devenir faux avant l'expiration du jeton, la
+désactivation d'un compte ou la modification d'un claim (``accounts.signals``)
+renseigne ``User.claims_changed_at``, recopié dans le claim du même nom à
+l'émission et au rafraîchissement. Un jeton d'accès dont la valeur diffère
+de celle de l'utilisateur est refusé ; le rafraîchissement relit
+l'utilisateur en base. Ces dates sont rechargées comme la liste noire, pour
+les seuls utilisateurs modifiés depuis moins de ``ACCESS_TOKEN_LIFETIME``.
+Une modification par ``QuerySet.update`` ne passe pas par les signaux et ne
+révoque rien.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import ClaimsUser, User
+
+USER_CLAIMS = ('username', 'user_type', 'is_staff')
+CHANGED_AT_CLAIM = 'claims_changed_at'
+BLACKLIST_REFRESH_SECONDS = getattr(settings, 'JWT_BLACKLIST_REFRESH_SECONDS', 30)
+# Marge couvrant les révocations validées après le rechargement précédent
+BLACKLIST_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def set_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[CHANGED_AT_CLAIM] = _timestamp(user.claims_changed_at)
+    return token
+
+
+class PeriodicIndex:
+    """Index en mémoire rechargé par incréments au plus toutes les ``refresh_interval`` secondes"""
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._since = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        raise NotImplementedError
+
+    def _maybe_refresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        # Premier chargement : bloquant ; ensuite un seul thread recharge
+        if not self._lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+                self.refresh()
+        finally:
+            self._lock.release()
+
+
+class RevokedTokens(PeriodicIndex):
+    """JTI révoqués et non expirés, rechargés périodiquement depuis la base"""
+
+    def __init__(self, refresh_interval):
+        super().__init__(refresh_interval)
+        self._expires_at = {}
+
+    def __contains__(self, jti):
+        self._maybe_refresh()
+        return jti in self._expires_at
+
+    def add(self, jti, expires_at):
+        self._expires_at[jti] = expires_at
+
+    def refresh(self):
+        now = timezone.now()
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        if self._since is not None:
+            rows = rows.filter(blacklisted_at__gte=self._since - BLACKLIST_REFRESH_OVERLAP)
+
+        expires_at = {jti: expiry for jti, expiry in self._expires_at.items() if expiry > now}
+        expires_at.update(rows.values_list('token__jti', 'token__expires_at'))
+        self._expires_at = expires_at
+        self._since = now
+        self._loaded_at = time.monotonic()
+
+
+class ChangedUsers(PeriodicIndex):
+    """``claims_changed_at`` des utilisateurs modifiés depuis moins d'une durée de jeton d'accès"""
+
+    def __init__(self, refresh_interval):
+        super().__init__(refresh_interval)
+        self._changed_at = {}
+
+    def changed_at(self, user_id):
+        self._maybe_refresh()
+        return self._changed_at.get(user_id)
+
+    def add(self, user_id, changed_at):
+        self._changed_at[user_id] = changed_at
+
+    def refresh(self):
+        now = timezone.now()
+        horizon = now - api_settings.ACCESS_TOKEN_LIFETIME
+        rows = User._default_manager.filter(claims_changed_at__gt=horizon)
+        if self._since is not None:
+            rows = rows.filter(claims_changed_at__gte=self._since - BLACKLIST_REFRESH_OVERLAP)
+
+        changed_at = {pk: stamp for pk, stamp in self._changed_at.items() if stamp > horizon}
+        changed_at.update(rows.values_list(api_settings.USER_ID_FIELD, 'claims_changed_at'))
+        self._changed_at = changed_at
+        self._since = now
+        self._loaded_at = time.monotonic()
+
+
+revoked_tokens = RevokedTokens(BLACKLIST_REFRESH_SECONDS)
+changed_users = ChangedUsers(BLACKLIST_REFRESH_SECONDS)
+
+
+def revoke_user_tokens(user):
+    """Refuse les jetons d'accès de ``user`` émis jusqu'ici"""
+    now = timezone.now()
+    User._default_manager.filter(pk=user.pk).update(claims_changed_at=now)
+    user.claims_changed_at = now
+    changed_users.add(getattr(user, api_settings.USER_ID_FIELD), now)
+
+
+def revoke_token(token, user=None):
+    """Ajoute un jeton (d'accès ou de rafraîchissement) à la liste noire"""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime_from_epoch(token['exp'])
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'token': str(token),
+            'user': user,
+            'created_at': datetime_from_epoch(token['iat']) if 'iat' in token else None,
+            'expires_at': expires_at,
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+    revoked_tokens.add(jti, expires_at)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` construisant l'utilisateur depuis les claims du jeton"""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if validated_token.get(api_settings.JTI_CLAIM) in revoked_tokens:
+            raise InvalidToken('Jeton révoqué')
+        changed_at = changed_users.changed_at(validated_token.get(api_settings.USER_ID_CLAIM))
+        if changed_at is not None and validated_token.get(CHANGED_AT_CLAIM) != _timestamp(changed_at):
+            raise InvalidToken('Compte ou droits modifiés depuis l\'émission du jeton')
+        return validated_token
+
+    def get_user(self, validated_token):
+        # Jetons émis avant l'ajout des claims : lecture classique en base
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Le jeton ne contient pas d\'identifiant utilisateur')
+
+        values = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        values[api_settings.USER_ID_FIELD] = validated_token[api_settings.USER_ID_CLAIM]
+        values['is_active'] = True
+
+        field_names = [
+            field.attname for field in ClaimsUser._meta.concrete_fields if field.attname in values
+        ]
+        return ClaimsUser.from_db(
+            router.db_for_read(ClaimsUser), field_names, [values[name] for name in field_names]
+        )
@@ -13,8 +13,28 @@ class User(AbstractUser):
     address = models.TextField(blank=True)
     company_name = models.CharField(max_length=100, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Dernière désactivation ou modification des claims du jeton (accounts.authentication)
+    claims_changed_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
+
+
+class ClaimsUser(User):
+    """Utilisateur reconstruit à partir des claims du jeton d'accès.
+
+    Seuls les champs portés par le jeton sont renseignés ; le premier accès à
+    un autre champ charge tous les champs manquants en une seule requête.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from btpconnect.images import srcset
+
+from .authentication import set_user_claims
 
 User = get_user_model()
 
@@ -30,12 +36,22 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 class UserUpdateSerializer(serializers.ModelSerializer):
+    profile_picture_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'first_name', 'last_name', 'email', 'user_type', 'phone', 'address', 'company_name', 'profile_picture')
+        fields = ('id', 'first_name', 'last_name', 'email', 'user_type', 'phone', 'address', 'company_name',
+                  'profile_picture', 'profile_picture_srcset')
         read_only_fields = ('id', 'user_type')
 
+    def get_profile_picture_srcset(self, obj):
+        return srcset(obj.profile_picture_renditions, obj.profile_picture.storage, self.context.get('request'))
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return set_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['user'] = {
@@ -46,4 +62,22 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'first_name': self.user.first_name,
             'last_name': self.user.last_name
         }
-        return data
\ No newline at end of file
+        return data
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rafraîchissement relisant les claims de l'utilisateur en base"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}, is_active=True
+        ).only(api_settings.USER_ID_FIELD, 'username', 'user_type', 'is_staff', 'claims_changed_at').first()
+        if user is None:
+            raise AuthenticationFailed('Utilisateur introuvable ou inactif', code='user_inactive')
+        set_user_claims(refresh, user)
+        return super().validate({**attrs, 'refresh': str(refresh)})
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from btpconnect.images import register_renditions
+from .authentication import USER_CLAIMS, revoke_user_tokens
+from .models import User, ClaimsUser
+
+# Les profils modifiés via l'API sont des ``ClaimsUser`` (voir authentication)
+register_renditions(User, 'profile_picture', 'profile_picture_renditions', senders=[ClaimsUser])
+
+# Champs dont la modification rend faux les jetons d'accès déjà émis
+TOKEN_FIELDS = ('is_active', *USER_CLAIMS)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=ClaimsUser)
+def remember_token_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._token_fields_changed = False
+    if raw or instance._state.adding:
+        return
+    fields = [
+        name for name in TOKEN_FIELDS
+        if (update_fields is None or name in update_fields) and name not in instance.get_deferred_fields()
+    ]
+    if not fields:
+        return
+    previous = User._default_manager.filter(pk=instance.pk).values(*fields).first()
+    instance._token_fields_changed = previous is not None and any(
+        previous[name] != getattr(instance, name) for name in fields
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def revoke_tokens_on_change(sender, instance, created, raw=False, **kwargs):
+    if not raw and getattr(instance, '_token_fields_changed', False):
+        revoke_user_tokens(instance)
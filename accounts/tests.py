@@ -1,3 +1,66 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .authentication import changed_users, revoked_tokens
+
+User = get_user_model()
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        # Index en mémoire partagés par le processus : repartir de la base de test
+        for index in (revoked_tokens, changed_users):
+            index._loaded_at = None
+            index._since = None
+        revoked_tokens._expires_at = {}
+        changed_users._changed_at = {}
+        self.user = User.objects.create_user('chef', 'chef@example.com', 'motdepasse', user_type='MOE', is_staff=True)
+
+    def login(self, username='chef', password='motdepasse'):
+        response = self.client.post('/api/auth/login/', {'username': username, 'password': password}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_profile(self, access):
+        return self.client.get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_demoted_user_must_refresh_claims(self):
+        tokens = self.login()
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 200)
+
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 401)
+
+        refreshed = self.client.post('/api/auth/login/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(refreshed.status_code, 200)
+        response = self.get_profile(refreshed.data['access'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.wsgi_request.user.is_staff)
+
+    def test_deactivated_user_is_rejected(self):
+        tokens = self.login()
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 401)
+        refreshed = self.client.post('/api/auth/login/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(refreshed.status_code, 401)
+
+    def test_unrelated_change_keeps_tokens(self):
+        tokens = self.login()
+        self.user.phone = '770000000'
+        self.user.save()
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 200)
+
+    def test_logout_cannot_revoke_another_users_token(self):
+        User.objects.create_user('autre', 'autre@example.com', 'motdepasse', user_type='CLIENT')
+        other = self.login('autre')
+        mine = self.login()
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh': other['refresh']}, format='json',
+            HTTP_AUTHORIZATION=f"Bearer {mine['access']}"
+        )
+        self.assertEqual(response.status_code, 403)
+        refreshed = self.client.post('/api/auth/login/refresh/', {'refresh': other['refresh']}, format='json')
+        self.assertEqual(refreshed.status_code, 200)
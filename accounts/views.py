@@ -1,8 +1,12 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, UserUpdateSerializer, CustomTokenObtainPairSerializer
+from .authentication import revoke_token
+from .serializers import UserSerializer, UserUpdateSerializer, CustomTokenObtainPairSerializer, LogoutSerializer
 
 User = get_user_model()
 
@@ -28,3 +32,29 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         return Response(serializer.data)
+
+class LogoutView(generics.GenericAPIView):
+    """Révoque le jeton d'accès courant et, s'il est fourni, le jeton de rafraîchissement"""
+    serializer_class = LogoutSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        refresh = serializer.validated_data.get('refresh')
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            # Seul le jeton de l'utilisateur connecté peut être révoqué
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(getattr(request.user, api_settings.USER_ID_FIELD)):
+                return Response(
+                    {'error': 'Ce jeton appartient à un autre utilisateur'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            revoke_token(refresh, request.user)
+        if request.auth is not None:
+            revoke_token(request.auth, request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,252 @@
+"""Sérialisation en lecture seule compilée pour les listes volumineuses.
+
+Pour un serializer DRF et une sélection de champs, ``CompiledSerializer``
+détermine une fois les chemins ORM à lire (``source='category.name'`` devient
+``category__name``) et génère une fonction ``render(row)`` qui transforme un
+tuple ``values_list`` en dictionnaire. Les conversions non triviales
+(décimaux, dates, UUID) réutilisent ``to_representation`` du champ DRF, ce
+qui garantit la même sortie que le serializer d'origine.
+
+Le serializer peut compléter la compilation dans sa ``Meta`` :
+
+- ``compiled_annotations`` : expression ORM (ou ``(expression, conversion)``,
+  la conversion recevant aussi ``None``) remplaçant un ``SerializerMethodField`` ;
+- ``field_dependencies`` (voir ``btpconnect.fieldsets``) : colonnes
+  nécessaires à une propriété du modèle exposée par un ``ReadOnlyField``.
+
+Les champs imbriqués ou les méthodes sans annotation rendent la compilation
+impossible : ``get_compiled`` renvoie alors ``None`` et la vue conserve le
+serializer DRF.
+"""
+import csv
+import json
+import threading
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+# Champs dont la représentation est la valeur lue en base
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.BooleanField, serializers.ReadOnlyField, serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class NotCompilable(Exception):
+    """Le serializer contient un champ que la compilation ne sait pas traiter"""
+
+
+def _identity(field):
+    return type(field) in IDENTITY_FIELDS
+
+
+class CompiledSerializer:
+    """Fonction ``row -> dict`` générée pour un serializer et une sélection de champs"""
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        meta = serializer_class.Meta
+        self.annotations = {}
+        self.paths = []
+        self._namespace = {'_NS': SimpleNamespace}
+        self._build(
+            serializer_class(),
+            fields,
+            getattr(meta, 'compiled_annotations', {}),
+            getattr(meta, 'field_dependencies', {}),
+        )
+
+    def _column(self, path):
+        if path not in self.paths:
+            self.paths.append(path)
+        return f'row[{self.paths.index(path)}]'
+
+    def _convert(self, expression, converter, index):
+        if converter is None:
+            return expression
+        self._namespace[f'c{index}'] = converter
+        return f'(None if {expression} is None else c{index}({expression}))'
+
+    def _model_path(self, source):
+        """Convertit ``category.name`` en ``category__name`` en vérifiant chaque étape"""
+        model, parts = self.model, source.split('.')
+        for position, part in enumerate(parts):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation and not (field.many_to_one or field.one_to_one):
+                return None
+            if field.is_relation and position < len(parts) - 1:
+                model = field.related_model
+        return '__'.join(parts)
+
+    def _build(self, serializer, selected, annotations, dependencies):
+        entries = []
+        for index, (name, field) in enumerate(serializer.fields.items()):
+            if field.write_only or (selected is not None and name not in selected):
+                continue
+
+            if name in annotations:
+                annotation = annotations[name]
+                expression, converter = annotation if isinstance(annotation, tuple) else (annotation, None)
+                self.annotations[name] = expression
+                column = self._column(name)
+                if converter is not None:
+                    self._namespace[f'c{index}'] = converter
+                    column = f'c{index}({column})'
+                entries.append((name, column))
+                continue
+
+            if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)) \
+                    or field.source == '*':
+                raise NotCompilable(f"{self.serializer_class.__name__}.{name}")
+
+            path = self._model_path(field.source)
+            if path is not None:
+                converter = None if _identity(field) else field.to_representation
+                entries.append((name, self._convert(self._column(path), converter, index)))
+                continue
+
+            # Propriété du modèle : calculée sur un objet léger portant ses dépendances
+            prop = getattr(self.model, field.source, None)
+            if not isinstance(prop, property) or name not in dependencies:
+                raise NotCompilable(f"{self.serializer_class.__name__}.{name}")
+            self._namespace[f'p{index}'] = prop.fget
+            arguments = ', '.join(
+                f'{dependency}={self._column(dependency)}' for dependency in dependencies[name]
+            )
+            entries.append((name, f'p{index}(_NS({arguments}))'))
+
+        source = ['def render(row):', '    return {']
+        source += [f'        {name!r}: {expression},' for name, expression in entries]
+        source.append('    }')
+        code = compile('\n'.join(source), f'<compiled {self.serializer_class.__name__}>', 'exec')
+        exec(code, self._namespace)
+        self.render = self._namespace['render']
+        self.fields = [name for name, _ in entries]
+
+    def values(self, queryset):
+        """Queryset de tuples correspondant aux colonnes attendues par ``render``"""
+        queryset = queryset.prefetch_related(None).annotate(**self.annotations)
+        if not queryset.ordered and queryset.model._meta.ordering:
+            # Agrégats (GROUP BY) : Django 4.1 n'applique plus Meta.ordering
+            queryset = queryset.order_by(*queryset.model._meta.ordering)
+        return queryset.values_list(*self.paths)
+
+    def serialize(self, queryset, limit=None):
+        rows = self.values(queryset)
+        if limit is not None:
+            rows = rows[:limit]
+        render = self.render
+        return [render(row) for row in rows]
+
+    def iterate(self, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        """Itère sans charger toutes les lignes (exports)"""
+        render = self.render
+        for row in self.values(queryset).iterator(chunk_size=chunk_size):
+            yield render(row)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_compiled(serializer_class, fields=None):
+    """``CompiledSerializer`` mis en cache, ou ``None`` si non compilable"""
+    key = (serializer_class, tuple(fields) if fields is not None else None)
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+    try:
+        compiled = CompiledSerializer(serializer_class, fields)
+    except NotCompilable:
+        compiled = None
+    with _cache_lock:
+        _cache[key] = compiled
+    return compiled
+
+
+class CompiledListMixin:
+    """Rend la liste avec le serializer compilé lorsque c'est possible (GET)"""
+
+    def get_compiled_serializer(self):
+        fields = self.get_sparse_fields() if hasattr(self, 'get_sparse_fields') else None
+        return get_compiled(self.get_serializer_class(), fields)
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(compiled.serialize(queryset))
+
+
+class _Echo:
+    """Tampon minimal pour ``csv.writer`` : renvoie la ligne au lieu de l'écrire"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return value
+
+
+def export_response(compiled, queryset, file_format, filename):
+    """Réponse en flux (NDJSON ou CSV) construite ligne par ligne"""
+    rows = compiled.iterate(queryset)
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        content = (
+            writer.writerow([_csv_cell(row[name]) for name in compiled.fields])
+            for row in rows
+        )
+        content_type = 'text/csv; charset=utf-8'
+
+        def stream():
+            yield writer.writerow(compiled.fields)
+            yield from content
+    else:
+        content_type = 'application/x-ndjson'
+
+        def stream():
+            for row in rows:
+                yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    response = StreamingHttpResponse(stream(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+class CompiledExportMixin(CompiledListMixin):
+    """Export en flux de la liste filtrée (``?export_format=ndjson|csv``)"""
+    export_filename = 'export'
+
+    def list(self, request, *args, **kwargs):
+        file_format = request.query_params.get('export_format', 'ndjson')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Format '{file_format}' non supporté (ndjson ou csv)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return Response(
+                {'error': 'Export indisponible pour cette ressource.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(compiled, queryset, file_format, self.export_filename)
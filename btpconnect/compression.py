@@ -0,0 +1,129 @@
+"""Compression des réponses (gzip, et Brotli si le paquet ``brotli`` est installé).
+
+Seules les réponses dont le type figure dans ``COMPRESSIBLE_TYPES`` et dont
+la taille atteint ``COMPRESSION_MIN_SIZE`` sont compressées ; les réponses
+en flux (exports) le sont morceau par morceau. Une réponse portant déjà un
+en-tête ``Content-Encoding`` (par exemple servie depuis le cache de réponses
+de ``btpconnect.conditional``) est laissée telle quelle.
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+COMPRESSIBLE_TYPES = getattr(settings, 'COMPRESSIBLE_TYPES', (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'image/svg+xml',
+))
+
+# Par ordre de préférence à qualité égale
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(request):
+    """Encodage à utiliser d'après ``Accept-Encoding``, ou ``None``"""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not header:
+        return None
+
+    weights = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+        return False
+    # Fichiers téléchargés : les plages portent sur les octets d'origine
+    if response.has_header('Accept-Ranges'):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type not in COMPRESSIBLE_TYPES:
+        return False
+    return response.streaming or len(response.content) >= COMPRESSION_MIN_SIZE
+
+
+def compress_bytes(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_response(response, encoding):
+    """Compresse ``response`` sur place ; renvoie ``False`` si le gain est nul"""
+    if response.streaming:
+        if encoding == 'br':
+            response.streaming_content = _brotli_sequence(response.streaming_content)
+        else:
+            response.streaming_content = compress_sequence(response.streaming_content)
+        del response['Content-Length']
+    else:
+        compressed = compress_bytes(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return False
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+
+    # Le corps change avec l'encodage : l'ETag fort devient faible (RFC 7232)
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = encoding
+    return True
+
+
+class CompressionMiddleware:
+    """Compresse les réponses selon ``Accept-Encoding`` (br, puis gzip)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request)
+        if encoding is not None:
+            compress_response(response, encoding)
+        return response
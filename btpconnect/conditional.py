@@ -0,0 +1,221 @@
+"""Requêtes conditionnelles (ETag / Last-Modified) pour les vues DRF.
+
+Les validateurs sont calculés sans sérialiser la ressource : un compteur de
+version de collection pour les listes, une requête d'agrégats
+(``updated_at`` le plus récent et nombre d'enfants) pour les détails. Une
+réponse 304 est renvoyée lorsque ``If-None-Match`` correspond, et
+``If-Match`` est vérifié sur PUT/PATCH (concurrence optimiste).
+
+Les listes peuvent en outre conserver leur réponse dans le cache Django
+(``response_cache_timeout``), déjà compressée pour l'encodage négocié : une
+entrée est servie sans sérialisation ni recompression, et devient
+inaccessible dès que la version de la collection change.
+"""
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .compression import compress_response, is_compressible, negotiate_encoding
+from .versioning import get_collection_version
+
+CACHE_CONTROL = 'private, no-cache'
+RESPONSE_CACHE_KEY = 'response:{}'
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def _make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def etag_matches(header, etag):
+    """Comparaison faible (le préfixe W/ est ignoré)"""
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    return any(candidate.removeprefix('W/') == etag.removeprefix('W/') for candidate in etags)
+
+
+def _not_modified(etag, last_modified=None):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def _set_validators(response, etag, last_modified=None):
+    if response.status_code < 300:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def _store_response(response, key, encoding, timeout):
+    """Callback de rendu : compresse la réponse puis la met en cache"""
+    if is_compressible(response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is not None:
+            compress_response(response, encoding)
+    cache.set(key, {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'content_encoding': response.get('Content-Encoding'),
+        'vary': response.get('Vary'),
+    }, timeout)
+
+
+def _cached_response(entry, etag):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    if entry['content_encoding']:
+        response['Content-Encoding'] = entry['content_encoding']
+        etag = 'W/' + etag
+    if entry['vary']:
+        response['Vary'] = entry['vary']
+    response['Content-Length'] = str(len(entry['content']))
+    return _set_validators(response, etag)
+
+
+class ConditionalListMixin:
+    """ETag de liste basé sur la version de la collection.
+
+    L'ETag dépend de la version, de l'URL complète (filtres, tri) et de
+    l'utilisateur (certains filtres lui sont propres). Avec
+    ``response_cache_timeout`` (secondes), la réponse rendue et compressée
+    est conservée sous une clé dérivée de l'ETag et de l'encodage.
+    """
+    conditional_collection = None
+    response_cache_timeout = None
+
+    def get_list_etag(self, request):
+        return _make_etag(
+            get_collection_version(self.conditional_collection),
+            request.get_full_path(),
+            request.user.pk,
+            request.accepted_renderer.format,
+        )
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return _not_modified(etag)
+        if not self.response_cache_timeout:
+            response = super().list(request, *args, **kwargs)
+            return _set_validators(response, etag)
+
+        encoding = negotiate_encoding(request)
+        key = RESPONSE_CACHE_KEY.format(_make_etag(etag, encoding, request.accepted_media_type)[1:-1])
+        entry = cache.get(key)
+        if entry is not None:
+            return _cached_response(entry, etag)
+
+        response = super().list(request, *args, **kwargs)
+        _set_validators(response, etag)
+        if response.status_code == status.HTTP_200_OK:
+            response.add_post_render_callback(
+                partial(_store_response, key=key, encoding=encoding, timeout=self.response_cache_timeout)
+            )
+        return response
+
+
+class ConditionalDetailMixin:
+    """ETag / Last-Modified de détail calculés par une requête d'agrégats.
+
+    ``conditional_relations`` liste les relations inverses à surveiller sous
+    la forme ``(nom_de_la_relation, champ_date)`` ; pour chacune, la date la
+    plus récente et le nombre d'éléments entrent dans l'ETag (le nombre
+    détecte les suppressions). Si ``conditional_collection`` est défini, la
+    version de la collection est ajoutée à l'ETag : utile lorsque la
+    représentation dépend d'objets extérieurs à la ressource. Dans ce cas
+    Last-Modified n'est pas émis, faute de date fiable.
+    """
+    conditional_relations = ()
+    conditional_collection = None
+
+    def _relation_subqueries(self, model):
+        annotations = {}
+        for name, date_field in self.conditional_relations:
+            relation = model._meta.get_field(name)
+            related = relation.related_model._default_manager.filter(
+                **{relation.field.name: OuterRef('pk')}
+            ).order_by().values(relation.field.name)
+            annotations[f'{name}_modified'] = Subquery(
+                related.annotate(value=Max(date_field)).values('value')[:1]
+            )
+            annotations[f'{name}_count'] = Coalesce(
+                Subquery(related.annotate(value=Count('pk')).values('value')[:1],
+                         output_field=IntegerField()),
+                0
+            )
+        return annotations
+
+    def get_validators(self):
+        """Renvoie ``(etag, last_modified)`` ou ``(None, None)`` si l'objet n'existe pas"""
+        model = self.get_queryset().model
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        annotations = self._relation_subqueries(model)
+        row = model._default_manager.filter(**lookup).order_by().annotate(
+            **annotations
+        ).values('pk', 'updated_at', *annotations).first()
+        if row is None:
+            return None, None
+
+        parts = [f'{key}={row[key]}' for key in sorted(row)]
+        # La représentation varie avec la sélection de champs (?fields=, ?expand=)
+        for param in ('fields', 'expand'):
+            if param in self.request.query_params:
+                parts.append(f'{param}={self.request.query_params[param]}')
+        if self.conditional_collection:
+            parts.append(get_collection_version(self.conditional_collection))
+            return _make_etag(*parts), None
+
+        dates = [value for key, value in row.items()
+                 if (key == 'updated_at' or key.endswith('_modified')) and value is not None]
+        return _make_etag(*parts), max(dates) if dates else None
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            if etag_matches(if_none_match, etag):
+                return _not_modified(etag, last_modified)
+        elif last_modified is not None:
+            if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            if if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since:
+                return _not_modified(etag, last_modified)
+
+        response = super().retrieve(request, *args, **kwargs)
+        return _set_validators(response, etag, last_modified)
+
+    def update(self, request, *args, **kwargs):
+        if_match = request.headers.get('If-Match')
+        if if_match:
+            etag, _ = self.get_validators()
+            if etag is not None and not etag_matches(if_match, etag):
+                return Response(
+                    {'error': 'La ressource a été modifiée entre-temps (ETag différent)'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+
+        response = super().update(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        if etag is not None:
+            _set_validators(response, etag, last_modified)
+        return response
@@ -0,0 +1,27 @@
+import copy
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def register_backend(name):
+    """Alias de connexion vers l'entrée ``name`` de ``DATABASE_BACKENDS``.
+
+    La base courante (``DB_ENGINE``) reste ``default`` ; les autres sont
+    ajoutées à la volée sous leur propre nom.
+    """
+    if name in connections.settings:
+        return name
+    if name == settings.DB_ENGINE:
+        return DEFAULT_DB_ALIAS
+    if name not in settings.DATABASE_BACKENDS:
+        raise ImproperlyConfigured(
+            f"Base inconnue : {name} (choix : {', '.join(settings.DATABASE_BACKENDS)})"
+        )
+    configured = connections.configure_settings({
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        name: copy.deepcopy(settings.DATABASE_BACKENDS[name]),
+    })
+    settings.DATABASES[name] = connections.settings[name] = configured[name]
+    return name
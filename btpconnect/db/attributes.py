@@ -0,0 +1,219 @@
+"""Index normalisé des champs JSON (tags, spécifications).
+
+Chaque élément d'un champ JSON indexé est recopié dans une table annexe
+``(champ, clé, valeur)`` indexée, tenue à jour à l'enregistrement :
+
+- liste (``tags``) : une ligne par élément, clé vide ;
+- dictionnaire (``specifications``) : une ligne par clé, ou par élément
+  lorsque la valeur est une liste.
+
+Les valeurs sont ramenées à du texte (``120``, ``"120"`` -> ``120`` ;
+``True`` -> ``true``) pour être comparées telles qu'elles arrivent dans
+l'URL (``?spec=portante:true``).
+
+Sur PostgreSQL, les filtres restent servis par les index GIN des champs
+JSON, avec la même normalisation : ``surface:120`` y cherche ``120`` comme
+``"120"``, en valeur ou dans une liste. Ailleurs (djongo, SQLite), ils
+interrogent la table annexe au lieu de parcourir le JSON sérialisé. La table sert partout au décompte des valeurs
+(``attribute_counts``). ``manage.py rebuild_attributes`` reconstruit l'index.
+"""
+import json
+
+from django.db import connections, models, transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_save
+
+from .lookups import json_contains
+
+VALUE_MAX_LENGTH = 255
+KEY_MAX_LENGTH = 100
+REINDEX_BATCH_SIZE = 500
+
+# Modèle -> (modèle d'index, colonne de la ForeignKey vers le modèle, champs JSON indexés)
+ATTRIBUTE_INDEXES = {}
+
+
+class AttributeEntry(models.Model):
+    """Ligne d'index : à hériter avec une ForeignKey vers le modèle indexé"""
+    field = models.CharField(max_length=50, verbose_name="Champ")
+    key = models.CharField(max_length=KEY_MAX_LENGTH, blank=True, verbose_name="Clé")
+    value = models.CharField(max_length=VALUE_MAX_LENGTH, verbose_name="Valeur")
+
+    class Meta:
+        abstract = True
+
+
+def attribute_text(value):
+    if isinstance(value, str):
+        text = value.strip()
+    else:
+        text = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return text[:VALUE_MAX_LENGTH]
+
+
+def _items(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            for element in (item if isinstance(item, list) else [item]):
+                yield str(key)[:KEY_MAX_LENGTH], attribute_text(element)
+    elif isinstance(value, (list, tuple)):
+        for element in value:
+            yield '', attribute_text(element)
+
+
+def attribute_rows(field, value):
+    """Lignes ``(champ, clé, valeur)`` d'une valeur JSON, sans doublons"""
+    return {(field, key, text) for key, text in _items(value) if text}
+
+
+def _index(model):
+    return ATTRIBUTE_INDEXES[model._meta.concrete_model]
+
+
+def sync_attributes(instance):
+    """Aligne l'index d'une instance sur ses champs JSON (écritures minimales)"""
+    entry_model, fk_name, fields = _index(type(instance))
+    wanted = set()
+    for field in fields:
+        wanted |= attribute_rows(field, getattr(instance, field))
+
+    existing = {}
+    for pk, *row in entry_model.objects.filter(**{fk_name: instance.pk}).values_list(
+        'pk', 'field', 'key', 'value'
+    ):
+        existing.setdefault(tuple(row), []).append(pk)
+    stale = [pk for row, pks in existing.items() for pk in (pks if row not in wanted else pks[1:])]
+    if stale:
+        entry_model.objects.filter(pk__in=stale).delete()
+    entry_model.objects.bulk_create([
+        entry_model(**{fk_name: instance.pk}, field=field, key=key, value=value)
+        for field, key, value in wanted - set(existing)
+    ])
+
+
+def reindex_attributes(model, pks=None, batch_size=REINDEX_BATCH_SIZE):
+    """Reconstruit l'index de ``model`` (objets ``pks`` ou tous), par paquets"""
+    entry_model, fk_name, fields = _index(model)
+    if pks is None:
+        entry_model.objects.all().delete()
+        pks = model._base_manager.order_by('pk').values_list('pk', flat=True).iterator()
+        replace = False
+    else:
+        replace = True
+
+    count, chunk = 0, []
+    for pk in pks:
+        chunk.append(pk)
+        if len(chunk) >= batch_size:
+            count += _reindex_chunk(model, entry_model, fk_name, fields, chunk, replace)
+            chunk = []
+    if chunk:
+        count += _reindex_chunk(model, entry_model, fk_name, fields, chunk, replace)
+    return count
+
+
+def _reindex_chunk(model, entry_model, fk_name, fields, pks, replace):
+    rows = list(model._base_manager.filter(pk__in=pks).values_list('pk', *fields))
+    with transaction.atomic():
+        if replace:
+            entry_model.objects.filter(**{f'{fk_name}__in': pks}).delete()
+        entry_model.objects.bulk_create([
+            entry_model(**{fk_name: pk}, field=field, key=key, value=value)
+            for pk, *values in rows
+            for name, data in zip(fields, values)
+            for field, key, value in attribute_rows(name, data)
+        ], batch_size=REINDEX_BATCH_SIZE)
+    return len(rows)
+
+
+def _json_values(text):
+    """Valeurs JSON ramenées à ``text`` par ``attribute_text`` (``"120"`` -> ``["120", 120]``)"""
+    values = [text]
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return values
+    if not isinstance(parsed, (str, dict, list)) and attribute_text(parsed) == text:
+        values.append(parsed)
+    return values
+
+
+def _contains_condition(field, rows):
+    """Équivalent ``@>`` des lignes ``rows`` : chaque valeur seule ou dans une liste"""
+    condition = Q()
+    for _, key, text in rows:
+        alternatives = Q()
+        for value in _json_values(text):
+            if key:
+                alternatives |= Q(**{f'{field}__contains': {key: value}})
+                alternatives |= Q(**{f'{field}__contains': {key: [value]}})
+            else:
+                alternatives |= Q(**{f'{field}__contains': [value]})
+        condition &= alternatives
+    return condition
+
+
+def filter_attributes(queryset, field, value):
+    """Filtre ``queryset`` sur ``field`` contenant ``value`` (liste ou dictionnaire)"""
+    model = queryset.model._meta.concrete_model
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(_contains_condition(field, attribute_rows(field, value)))
+    if model not in ATTRIBUTE_INDEXES:
+        return json_contains(queryset, field, value)
+    entry_model, fk_name, _ = _index(model)
+    # Une sous-requête indexée par ligne : aucun identifiant chargé en mémoire
+    for _, key, text in attribute_rows(field, value):
+        queryset = queryset.filter(pk__in=entry_model.objects.filter(
+            field=field, key=key, value=text
+        ).values(fk_name))
+    return queryset
+
+
+def attribute_counts(queryset, limit=20):
+    """Nombre d'objets de ``queryset`` par valeur de chaque champ indexé.
+
+    ``{'tags': [{'value': 'villa', 'count': 12}, ...],
+    'specifications': {'surface': [{'value': '120', 'count': 3}, ...]}}``,
+    les ``limit`` valeurs les plus fréquentes par champ ou par clé.
+    """
+    entry_model, fk_name, fields = _index(queryset.model)
+    owners = queryset.order_by().values('pk')
+    if connections[queryset.db].vendor == 'djongo':
+        owners = list(owners.values_list('pk', flat=True))
+    rows = entry_model.objects.filter(**{f'{fk_name}__in': owners}).values(
+        'field', 'key', 'value'
+    ).annotate(count=Count('pk')).order_by('-count', 'value')
+
+    # Champs liste : valeurs directement ; dictionnaires : valeurs par clé
+    counts = {field: [] if _is_list_field(queryset.model, field) else {} for field in fields}
+    for row in rows:
+        target = counts[row['field']]
+        values = target if isinstance(target, list) else target.setdefault(row['key'], [])
+        if len(values) < limit:
+            values.append({'value': row['value'], 'count': row['count']})
+    return counts
+
+
+def _is_list_field(model, field):
+    default = model._meta.get_field(field).default
+    return default is list or isinstance(default, list)
+
+
+def _sync_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    _, _, fields = _index(sender)
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    sync_attributes(instance)
+
+
+def register_attribute_index(model, entry_model, fields, senders=()):
+    """Indexe les champs JSON ``fields`` de ``model`` dans ``entry_model``"""
+    fk_name = next(
+        field.attname for field in entry_model._meta.get_fields()
+        if field.many_to_one and field.related_model is model
+    )
+    ATTRIBUTE_INDEXES[model] = (entry_model, fk_name, tuple(fields))
+    for sender in (model, *senders):
+        post_save.connect(_sync_saved, sender=sender, dispatch_uid=f'attributes-{sender._meta.label}')
@@ -0,0 +1,46 @@
+"""Filtres sur les champs JSON communs aux différentes bases.
+
+Sur PostgreSQL, ``json_contains`` utilise l'opérateur ``@>`` de ``jsonb``
+(servi par les index GIN ``jsonb_path_ops`` créés par les migrations). djongo
+et SQLite stockent le JSON sous forme de texte (``json.dumps`` avec les
+séparateurs par défaut) et ne savent pas traduire ``JSON_CONTAINS`` : on y
+recherche le fragment sérialisé correspondant, ce qui reste une sélection
+approchée (insensible à la casse, clés imbriquées comprises).
+"""
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+
+def _text_fragments(value):
+    if isinstance(value, dict):
+        return [f'{json.dumps(key)}: {json.dumps(item)}' for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [json.dumps(item) for item in value]
+    return [json.dumps(value)]
+
+
+def json_contains(queryset, field, value):
+    """Filtre ``queryset`` sur ``field`` contenant ``value`` (liste ou dictionnaire)"""
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(**{f'{field}__contains': value})
+
+    condition = Q()
+    for fragment in _text_fragments(value):
+        condition &= Q(**{f'{field}__icontains': fragment})
+    return queryset.filter(condition)
+
+
+def parse_key_values(params):
+    """``['dimension:20x20', 'portante:true']`` -> ``{'dimension': '20x20', 'portante': True}``"""
+    values = {}
+    for param in params:
+        key, sep, raw = param.partition(':')
+        if not sep or not key:
+            continue
+        try:
+            values[key] = json.loads(raw)
+        except ValueError:
+            values[key] = raw
+    return values
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+
+class RunPostgreSQL(migrations.RunSQL):
+    """``RunSQL`` exécuté uniquement sur PostgreSQL (ignoré par djongo et SQLite)"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return 'SQL spécifique à PostgreSQL'
+
+
+def gin_index(table, column):
+    """Index GIN ``jsonb_path_ops`` servant les filtres ``@>`` (``json_contains``)"""
+    name = f'{table}_{column}_gin'
+    return RunPostgreSQL(
+        sql=f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} jsonb_path_ops)',
+        reverse_sql=f'DROP INDEX IF EXISTS {name}',
+    )
+
+
+def index_attributes(app_label, model_name, entry_model_name, fk_name, fields, batch_size=500):
+    """Remplit l'index normalisé (btpconnect.db.attributes) des lignes existantes"""
+    from .attributes import attribute_rows
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        entry_model = apps.get_model(app_label, entry_model_name)
+        using = schema_editor.connection.alias
+        entries = []
+        for pk, *values in model._base_manager.using(using).values_list('pk', *fields).iterator():
+            for name, data in zip(fields, values):
+                entries.extend(
+                    entry_model(**{f'{fk_name}_id': pk}, field=field, key=key, value=value)
+                    for field, key, value in attribute_rows(name, data)
+                )
+            if len(entries) >= batch_size:
+                entry_model.objects.using(using).bulk_create(entries)
+                entries = []
+        entry_model.objects.using(using).bulk_create(entries)
+
+    return migrations.RunPython(forwards, migrations.RunPython.noop)
+
+
+def geocode_existing(app_label, model_name, place_field, region_field=None, batch_size=500):
+    """Renseigne coordonnées et geohash des lignes existantes (btpconnect.geo)"""
+    from btpconnect.geo import geocode, geohash
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        using = schema_editor.connection.alias
+        fields = [place_field, region_field] if region_field else [place_field]
+        rows = list(model._base_manager.using(using).filter(latitude__isnull=True).values_list('pk', *fields))
+        located = []
+        for pk, *values in rows:
+            coordinates = geocode(*values)
+            if coordinates:
+                located.append(model(pk=pk, latitude=coordinates[0], longitude=coordinates[1],
+                                     geohash=geohash(*coordinates)))
+        model._base_manager.using(using).bulk_update(
+            located, ['latitude', 'longitude', 'geohash'], batch_size=batch_size
+        )
+
+    return migrations.RunPython(forwards, migrations.RunPython.noop)
@@ -0,0 +1,124 @@
+"""Backend djongo avec un ``MongoClient`` partagé par processus.
+
+djongo ferme son ``MongoClient`` à chaque fermeture de connexion Django (fin
+de requête avec ``CONN_MAX_AGE = 0``) : la requête suivante rouvre la
+topologie (résolution SRV, handshakes TLS) et recharge la liste des
+collections. Ici, un client par processus et par paramètres de connexion est
+créé à la demande (après le fork du worker gunicorn) et n'est jamais fermé
+par Django : une « connexion » Django emprunte simplement un socket à son
+pool (``maxPoolSize`` / ``minPoolSize`` dans ``CLIENT``).
+
+Les instructions SQL analysées sont conservées dans un cache LRU
+(``QUERY_CACHE_SIZE`` entrées, 0 pour le désactiver ; voir ``query_cache``).
+
+Avec ``CONN_HEALTH_CHECKS``, ``is_usable`` envoie un ``ping`` au plus toutes
+les ``HEALTH_CHECK_INTERVAL`` secondes ; en cas d'échec le client partagé est
+abandonné et recréé à la connexion suivante.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from logging import getLogger
+
+from djongo import base
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from .operations import DatabaseOperations
+from .query_cache import CachingCursor, get_statement_cache
+
+logger = getLogger(__name__)
+
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+DEFAULT_QUERY_CACHE_SIZE = 512
+
+
+class SharedClient:
+    """Client pymongo et cache des collections communs aux connexions d'un processus"""
+
+    def __init__(self, params):
+        self.client = MongoClient(document_class=OrderedDict, connect=False, **params)
+        self.djongo_clients = {}
+        self.checked_at = time.monotonic()
+
+    def djongo_client(self, name, enforce_schema):
+        key = (name, enforce_schema)
+        if key not in self.djongo_clients:
+            self.djongo_clients[key] = base.DjongoClient(self.client[name], enforce_schema)
+        return self.djongo_clients[key]
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_key(params):
+    # Le pid évite de réutiliser dans un worker le client créé avant le fork
+    return os.getpid(), repr(sorted(params.items()))
+
+
+def get_shared_client(params):
+    key = _shared_key(params)
+    shared = _shared.get(key)
+    if shared is None:
+        with _shared_lock:
+            shared = _shared.get(key)
+            if shared is None:
+                logger.debug('Nouveau MongoClient partagé (pid %s)', key[0])
+                shared = _shared[key] = SharedClient(params)
+    return shared
+
+
+def discard_shared_client(shared):
+    with _shared_lock:
+        for key, value in list(_shared.items()):
+            if value is shared:
+                del _shared[key]
+    shared.client.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    ops_class = DatabaseOperations
+
+    def __init__(self, *args, **kwargs):
+        self.shared_client = None
+        super().__init__(*args, **kwargs)
+        size = self.settings_dict.get('QUERY_CACHE_SIZE', DEFAULT_QUERY_CACHE_SIZE)
+        self.statement_cache = get_statement_cache(self.alias, size) if size else None
+
+    def get_new_connection(self, connection_params):
+        name = connection_params.pop('name')
+        enforce_schema = connection_params.pop('enforce_schema')
+
+        self.shared_client = get_shared_client(connection_params)
+        self.client_connection = self.shared_client.client
+        self.djongo_connection = self.shared_client.djongo_client(name, enforce_schema)
+        return self.client_connection[name]
+
+    def create_cursor(self, name=None):
+        if self.statement_cache is None:
+            return super().create_cursor(name)
+        return CachingCursor(
+            self.client_connection, self.connection, self.djongo_connection, self.statement_cache
+        )
+
+    def is_usable(self):
+        if self.connection is None or self.shared_client is None:
+            return False
+        interval = self.settings_dict.get('HEALTH_CHECK_INTERVAL', DEFAULT_HEALTH_CHECK_INTERVAL)
+        shared = self.shared_client
+        if time.monotonic() - shared.checked_at < interval:
+            return True
+        try:
+            self.connection.command('ping')
+        except PyMongoError:
+            logger.warning('MongoDB injoignable : le client partagé sera recréé')
+            discard_shared_client(shared)
+            return False
+        shared.checked_at = time.monotonic()
+        return True
+
+    def _close(self):
+        # Le client partagé reste ouvert : ses sockets retournent au pool
+        self.shared_client = None
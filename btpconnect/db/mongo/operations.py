@@ -0,0 +1,9 @@
+from djongo.operations import DatabaseOperations as DjongoDatabaseOperations
+
+
+class DatabaseOperations(DjongoDatabaseOperations):
+
+    def conditional_expression_supported_in_where_clause(self, expression):
+        # djongo ne traduit pas « WHERE champ_booléen » (forme émise par Django 4 pour
+        # ``champ=True``) : on conserve la comparaison explicite ``champ = %s``.
+        return False
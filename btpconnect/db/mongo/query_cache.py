@@ -0,0 +1,155 @@
+"""Cache des instructions SQL analysées par djongo.
+
+djongo analyse chaque instruction SQL avec sqlparse avant de la traduire en
+requête MongoDB. L'arbre sqlparse ne dépend que du texte SQL (les valeurs
+sont des paramètres ``%s``) et n'est jamais modifié par la traduction : il
+est donc conservé dans un cache LRU par processus, indexé par le SQL
+paramétré. La traduction elle-même intègre les valeurs des paramètres dans
+le filtre MongoDB et reste faite à chaque exécution.
+
+``StatementCache.stats()`` expose le nombre de succès et d'échecs, le temps
+passé dans sqlparse et le temps de traduction des SELECT.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import djongo
+from djongo import base  # noqa: F401 - charge djongo dans l'ordre attendu par ses imports circulaires
+from djongo.cursor import Cursor
+from djongo.database import DatabaseError
+from djongo.exceptions import MigrationError, SQLDecodeError
+from djongo.sql2mongo.query import Query
+from sqlparse import parse as sqlparse
+
+PLACEHOLDER = re.compile(r'%s')
+
+
+def _number_placeholders(sql):
+    counter = iter(range(sql.count('%s')))
+    return PLACEHOLDER.sub(lambda _: '%({})s'.format(next(counter)), sql)
+
+
+class StatementCache:
+    """LRU ``sql -> (sql numéroté, instruction sqlparse, type)``"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.parse_time = 0.0
+        self.translation_time = 0.0
+        self.translations = 0
+
+    def get(self, sql):
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is not None:
+                self._entries.move_to_end(sql)
+                self.hits += 1
+                return entry
+
+        start = time.perf_counter()
+        numbered = _number_placeholders(sql)
+        statements = sqlparse(numbered)
+        if len(statements) > 1:
+            raise SQLDecodeError(err_sql=numbered)
+        entry = (numbered, statements[0], statements[0].get_type())
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.parse_time += elapsed
+            self._entries[sql] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record_translation(self, elapsed):
+        with self._lock:
+            self.translations += 1
+            self.translation_time += elapsed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.translations = 0
+            self.parse_time = self.translation_time = 0.0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'parse_time_ms': self.parse_time * 1000,
+            'translations': self.translations,
+            'translation_time_ms': self.translation_time * 1000,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_statement_cache(alias, max_size):
+    with _caches_lock:
+        cache = _caches.get(alias)
+        if cache is None:
+            cache = _caches[alias] = StatementCache(max_size)
+    return cache
+
+
+class CachedQuery(Query):
+    """``Query`` de djongo lisant l'instruction analysée dans le cache"""
+
+    def __init__(self, client_connection, db_connection, connection_properties, sql, params, statements):
+        self._params = params
+        self.db = db_connection
+        self.cli_con = client_connection
+        self.connection_properties = connection_properties
+        self.last_row_id = None
+        self._result_generator = None
+        self._statements = statements
+        self._sql, self._statement, self._statement_type = statements.get(sql)
+        self._query = self.parse()
+
+    def parse(self):
+        handler = self.FUNC_MAP.get(self._statement_type)
+        if handler is None:
+            raise SQLDecodeError(f'{self._statement_type} command not implemented for SQL {self._sql}')
+
+        start = time.perf_counter()
+        try:
+            query = handler(self, self._statement)
+        except MigrationError:
+            raise
+        except SQLDecodeError as e:
+            e.err_sql, e.params, e.version = self._sql, self._params, djongo.__version__
+            raise
+        except Exception as e:
+            raise SQLDecodeError(err_sql=self._sql, params=self._params, version=djongo.__version__) from e
+        # Les écritures s'exécutent dans le handler : seuls les SELECT sont mesurés
+        if self._statement_type == 'SELECT':
+            self._statements.record_translation(time.perf_counter() - start)
+        return query
+
+
+class CachingCursor(Cursor):
+
+    def __init__(self, client_conn, db_conn, connection_properties, statements):
+        super().__init__(client_conn, db_conn, connection_properties)
+        self.statements = statements
+
+    def execute(self, sql, params=None):
+        try:
+            self.result = CachedQuery(
+                self.client_conn, self.db_conn, self.connection_properties, sql, params, self.statements
+            )
+        except Exception as e:
+            raise DatabaseError() from e
@@ -0,0 +1,175 @@
+"""Envoi de fichiers avec requêtes partielles (``Range``) et délégation au proxy.
+
+``serve_file`` répond :
+
+- ``304`` / ``412`` selon ``If-None-Match``, ``If-Modified-Since``... ;
+- ``206`` pour une plage ``Range: bytes=début-fin`` (une seule plage ; plusieurs
+  plages ou un ``If-Range`` périmé donnent le fichier entier), ``416`` si elle
+  est hors du fichier ;
+- ``200`` sinon.
+
+Le corps est un ``FileResponse`` positionné au début de la plage :
+gunicorn l'envoie avec ``os.sendfile`` (descripteur, position courante et
+``Content-Length``), les autres serveurs le lisent par blocs sans le charger
+en mémoire.
+
+Avec ``DOWNLOAD_OFFLOAD = 'x-accel-redirect'`` (nginx) ou ``'x-sendfile'``
+(Apache, lighttpd), Django ne fait que les contrôles d'accès et d'en-têtes et
+le proxy envoie le fichier lui-même, plages comprises.
+``DOWNLOAD_ACCEL_LOCATIONS`` associe les répertoires servis aux préfixes des
+``location internal`` de nginx.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+DOWNLOAD_OFFLOAD = getattr(settings, 'DOWNLOAD_OFFLOAD', None)
+DOWNLOAD_ACCEL_LOCATIONS = getattr(settings, 'DOWNLOAD_ACCEL_LOCATIONS', {})
+DOWNLOAD_CACHE_CONTROL = getattr(settings, 'DOWNLOAD_CACHE_CONTROL', 'private, no-cache')
+
+BYTES_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangeFile:
+    """Fichier lu au plus sur ``length`` octets depuis sa position courante"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(début, fin)`` inclusifs, ou ``None`` pour envoyer tout le fichier"""
+    match = BYTES_RANGE.match(header.strip())
+    if not match or not size:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 : les 500 derniers octets ; bytes=-0 ne désigne aucun octet
+        if not int(last):
+            raise RangeNotSatisfiable()
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _accel_path(path):
+    real_path = os.path.realpath(path)
+    for directory, prefix in sorted(DOWNLOAD_ACCEL_LOCATIONS.items(), key=lambda item: -len(str(item[0]))):
+        directory = os.path.realpath(directory)
+        if real_path.startswith(directory + os.sep):
+            relative = os.path.relpath(real_path, directory).replace(os.sep, '/')
+            return prefix.rstrip('/') + '/' + quote(relative)
+    raise Http404('Fichier hors des emplacements délégués au proxy')
+
+
+def _content_disposition(filename, as_attachment):
+    """Même en-tête que ``FileResponse`` (non disponible seul avant Django 4.2)"""
+    disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        file_expr = 'filename="{}"'.format(filename.replace('\\', '\\\\').replace('"', r'\"'))
+    except UnicodeEncodeError:
+        file_expr = "filename*=utf-8''{}".format(quote(filename))
+    return f'{disposition}; {file_expr}'
+
+
+def _common_headers(response, etag, last_modified, cache_control):
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+
+
+def serve_file(request, path, *, content_type, filename, etag=None, last_modified=None,
+               as_attachment=True, cache_control=DOWNLOAD_CACHE_CONTROL):
+    """Réponse de téléchargement du fichier local ``path``"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Fichier introuvable')
+    size = stat.st_size
+    last_modified = int(last_modified if last_modified is not None else stat.st_mtime)
+    etag = etag or f'"{stat.st_mtime_ns:x}-{size:x}"'
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        _common_headers(conditional, etag, last_modified, cache_control)
+        return conditional
+
+    if DOWNLOAD_OFFLOAD:
+        response = HttpResponse(content_type=content_type)
+        if DOWNLOAD_OFFLOAD == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = _accel_path(path)
+        else:
+            response['X-Sendfile'] = os.path.realpath(path)
+        # Le proxy remplace le corps vide par le fichier
+        response['Content-Disposition'] = _content_disposition(filename, as_attachment)
+        _common_headers(response, etag, last_modified, cache_control)
+        return response
+
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            _common_headers(response, etag, last_modified, cache_control)
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        file.seek(start)
+        response = FileResponse(
+            RangeFile(file, length), status=206, content_type=content_type,
+            as_attachment=as_attachment, filename=filename,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    _common_headers(response, etag, last_modified, cache_control)
+    return response
@@ -0,0 +1,80 @@
+"""Décomptes par valeur (facettes) de la liste filtrée.
+
+Les vues de facettes héritent de la vue de liste : mêmes filtres, recherche
+et restrictions, mais la réponse donne le nombre d'objets par valeur au lieu
+des objets eux-mêmes.
+
+Avec ``facet_cache_timeout``, le résultat est conservé dans le cache Django
+sous une clé dérivée de l'ensemble des filtres normalisé (ordre des
+paramètres et des valeurs séparées par des virgules indifférent, pagination
+et tri ignorés) et de la version de ``facet_cache_collection`` : toute
+écriture sur la collection rend les entrées inaccessibles.
+"""
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .db.attributes import attribute_counts
+from .versioning import get_collection_version
+
+FACET_LIMIT = 20
+FACET_MAX_LIMIT = 100
+FACET_CACHE_KEY = 'facets:{}'
+
+# Paramètres sans effet sur les décomptes
+IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'fields', 'expand', 'format'}
+
+
+def normalized_filters(query_params):
+    """``(paramètre, valeurs triées)`` triés, sans les paramètres ignorés"""
+    filters = []
+    for name in sorted(set(query_params) - IGNORED_PARAMS):
+        values = sorted(
+            part.strip()
+            for value in query_params.getlist(name)
+            for part in value.split(',')
+            if part.strip()
+        )
+        if values:
+            filters.append((name, values))
+    return filters
+
+
+class FacetListMixin:
+    """Facettes des champs JSON indexés (``?facet_limit=`` valeurs par facette)"""
+    facet_cache_collection = None
+    facet_cache_timeout = None
+    # Clé de cache propre à l'utilisateur (filtres dépendant de ``request.user``)
+    facet_cache_per_user = False
+
+    def get_facet_limit(self):
+        try:
+            limit = int(self.request.query_params.get('facet_limit', FACET_LIMIT))
+        except ValueError:
+            return FACET_LIMIT
+        return min(max(limit, 1), FACET_MAX_LIMIT)
+
+    def get_facets(self, queryset):
+        return attribute_counts(queryset, limit=self.get_facet_limit())
+
+    def get_facet_cache_key(self, request):
+        parts = [
+            type(self).__name__,
+            get_collection_version(self.facet_cache_collection),
+            repr(normalized_filters(request.query_params)),
+        ]
+        if self.facet_cache_per_user:
+            parts.append(request.user.pk)
+        return FACET_CACHE_KEY.format(hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        if not self.facet_cache_timeout:
+            return Response(self.get_facets(self.filter_queryset(self.get_queryset())))
+
+        key = self.get_facet_cache_key(request)
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.get_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, self.facet_cache_timeout)
+        return Response(facets)
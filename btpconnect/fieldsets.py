@@ -0,0 +1,122 @@
+"""Sélection de champs (``?fields=``) et relations dépliables (``?expand=``).
+
+``?fields=id,title,status`` limite la réponse aux champs demandés.
+``?expand=tasks,images`` limite les relations imbriquées (listées dans
+``Meta.expandable_fields`` du serializer) à celles demandées ; ``?expand=``
+vide n'en déplie aucune. Sans paramètre, la réponse est inchangée.
+
+Le queryset de la vue est adapté à la sélection : ``only()`` sur les
+colonnes utilisées, ``select_related``/``prefetch_related`` uniquement pour
+les relations conservées.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+def _parse_list(value):
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def select_fields(serializer_class, request):
+    """Noms des champs du serializer à conserver, ou ``None`` si aucun filtre"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+
+    requested = _parse_list(request.query_params.get('fields') or None)
+    expand = _parse_list(request.query_params.get('expand'))
+    if requested is None and expand is None:
+        return None
+
+    expandable = set(getattr(serializer_class.Meta, 'expandable_fields', ()))
+    selected = []
+    for name in serializer_class.Meta.fields:
+        if name in expandable and expand is not None:
+            keep = name in expand
+        else:
+            keep = requested is None or name in requested or (expand is not None and name in expand)
+        if keep:
+            selected.append(name)
+    return selected
+
+
+class SparseFieldsetSerializerMixin:
+    """Retire du serializer les champs non sélectionnés (contexte ``sparse_fields``)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('sparse_fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                if not self.fields[name].write_only:
+                    self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Adapte le contexte et le queryset d'une vue à la sélection de champs.
+
+    ``sparse_prefetch`` permet de préciser le ``prefetch_related`` d'une
+    relation (par ex. ``{'comments': 'comments__author'}``, ou un tuple). Les champs
+    calculés déclarent les colonnes dont ils dépendent dans
+    ``Meta.field_dependencies`` ; si une dépendance est inconnue, ``only()``
+    n'est pas appliqué.
+    """
+    sparse_prefetch = {}
+
+    def get_sparse_fields(self):
+        return select_fields(self.get_serializer_class(), self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        selected = self.get_sparse_fields()
+        if selected is None:
+            return queryset
+        return self.optimize_queryset(queryset, selected)
+
+    def optimize_queryset(self, queryset, selected):
+        model = queryset.model
+        serializer = self.get_serializer_class()()
+        dependencies = getattr(serializer.Meta, 'field_dependencies', {})
+        only, select, prefetch = {model._meta.pk.name}, set(), set()
+        restrict_columns = True
+
+        for name in selected:
+            field = serializer.fields.get(name)
+            if field is None or field.write_only:
+                continue
+            if field.source == '*' or name in dependencies:
+                if name in dependencies:
+                    only.update(dependencies[name])
+                else:
+                    restrict_columns = False
+                continue
+
+            attribute = field.source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(attribute)
+            except FieldDoesNotExist:
+                restrict_columns = False
+                continue
+
+            if model_field.many_to_one or model_field.one_to_one and model_field.concrete:
+                only.add(attribute)
+                select.add(attribute)
+            elif model_field.is_relation:
+                lookups = self.sparse_prefetch.get(attribute, attribute)
+                prefetch.update((lookups,) if isinstance(lookups, str) else lookups)
+            else:
+                only.add(attribute)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        if restrict_columns:
+            queryset = queryset.only(*only)
+        return queryset
@@ -0,0 +1,234 @@
+"""Coordonnées géographiques : géocodage hors ligne et recherche par proximité.
+
+Les projets et les fournisseurs sans coordonnées sont localisés à
+l'enregistrement à partir du répertoire des localités du Sénégal livré avec
+l'application (``btpconnect/data/senegal_localities.csv`` : nom, région,
+latitude, longitude). Les noms sont comparés sans accents, casse ni
+ponctuation ; une localité inconnue est placée au chef-lieu de sa région.
+
+Chaque objet localisé porte son geohash (``GEOHASH_PRECISION`` caractères),
+indexé. ``filter_near`` retient d'abord les objets des cellules couvrant le
+cercle de recherche (au plus ``MAX_PREFIXES`` préfixes, ``startswith`` servi
+par l'index sur PostgreSQL et MongoDB), puis ceux qui sont réellement à moins
+de ``radius`` km (distance orthodromique).
+"""
+import csv
+import functools
+import math
+import os
+import re
+import unicodedata
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import pre_save
+from rest_framework.exceptions import ValidationError
+
+GAZETTEER_PATH = getattr(
+    settings, 'GEO_GAZETTEER_PATH', os.path.join(os.path.dirname(__file__), 'data', 'senegal_localities.csv')
+)
+GEOHASH_PRECISION = 8
+MAX_PREFIXES = 16
+NEAR_DEFAULT_RADIUS_KM = getattr(settings, 'NEAR_DEFAULT_RADIUS_KM', 10)
+NEAR_MAX_RADIUS_KM = 1000
+# Estimation des trajets routiers : détour moyen par rapport à la ligne droite, vitesse moyenne
+ROAD_FACTOR = getattr(settings, 'GEO_ROAD_FACTOR', 1.3)
+AVERAGE_SPEED_KMH = getattr(settings, 'GEO_AVERAGE_SPEED_KMH', 40)
+EARTH_RADIUS_KM = 6371.0088
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+# Modèle -> (champ du lieu, champ de la région ou None)
+GEOCODED_MODELS = {}
+# Champs renseignés par ``locate``
+GEO_FIELDS = ('latitude', 'longitude', 'geohash')
+
+
+def normalize_place(name):
+    name = unicodedata.normalize('NFKD', str(name or '').lower())
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return SEPARATORS.sub(' ', name).strip()
+
+
+@functools.lru_cache(maxsize=None)
+def gazetteer():
+    """``{(localité, région): (lat, lng)}`` et ``{localité: (lat, lng)}``, noms normalisés"""
+    by_region, by_name = {}, {}
+    with open(GAZETTEER_PATH, encoding='utf-8', newline='') as handle:
+        for row in csv.DictReader(handle):
+            coordinates = (float(row['latitude']), float(row['longitude']))
+            name, region = normalize_place(row['name']), normalize_place(row['region'])
+            by_region[(name, region)] = coordinates
+            by_name.setdefault(name, coordinates)
+    return by_region, by_name
+
+
+def geocode(place, region=''):
+    """Coordonnées du lieu (ou de l'une de ses parties séparées par des virgules), ou None"""
+    by_region, by_name = gazetteer()
+    region = normalize_place(region)
+    for part in [place, *str(place or '').split(',')]:
+        name = normalize_place(part)
+        if not name:
+            continue
+        coordinates = by_region.get((name, region)) or by_name.get(name)
+        if coordinates:
+            return coordinates
+    # Chef-lieu de la région, qui porte son nom
+    return by_region.get((region, region))
+
+
+# ---- geohash ----
+
+def _cell_size(precision):
+    """Hauteur et largeur (degrés) d'une cellule de ``precision`` caractères"""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    latitudes, longitudes = [-90.0, 90.0], [-180.0, 180.0]
+    code, bits, value, even = [], 0, 0, True
+    while len(code) < precision:
+        interval, coordinate = (longitudes, longitude) if even else (latitudes, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(code)
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Geohashes les plus fins (au plus ``MAX_PREFIXES``) couvrant le cercle"""
+    delta_latitude = radius_km / 111.32
+    delta_longitude = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+    south, north = max(latitude - delta_latitude, -90), min(latitude + delta_latitude, 90 - 1e-9)
+    west, east = max(longitude - delta_longitude, -180), min(longitude + delta_longitude, 180 - 1e-9)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = range(math.floor((south + 90) / height), math.floor((north + 90) / height) + 1)
+        columns = range(math.floor((west + 180) / width), math.floor((east + 180) / width) + 1)
+        if len(rows) * len(columns) <= MAX_PREFIXES:
+            return sorted({
+                geohash((row + 0.5) * height - 90, (column + 0.5) * width - 180, precision)
+                for row in rows for column in columns
+            })
+    return ['']
+
+
+def distance_km(latitude, longitude, latitudes, longitudes):
+    """Distance orthodromique (haversine) d'un point à des tableaux de points"""
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((latitudes - latitude) / 2) ** 2
+        + math.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def travel_hours(distance):
+    """Durée estimée (heures) d'un trajet routier de ``distance`` km à vol d'oiseau"""
+    return round(distance * ROAD_FACTOR / AVERAGE_SPEED_KMH, 1)
+
+
+# ---- requêtes ----
+
+def nearest(queryset, latitude, longitude, radius_km=None, limit=None):
+    """``[(pk, distance en km)]`` par distance croissante, dans le rayon s'il est donné"""
+    queryset = queryset.order_by().filter(latitude__isnull=False, longitude__isnull=False)
+    if radius_km is not None:
+        condition = Q()
+        for prefix in covering_prefixes(latitude, longitude, radius_km):
+            condition |= Q(geohash__startswith=prefix)
+        queryset = queryset.filter(condition)
+
+    rows = list(queryset.values_list('pk', 'latitude', 'longitude'))
+    if not rows:
+        return []
+    distances = distance_km(latitude, longitude, [row[1] for row in rows], [row[2] for row in rows])
+    order = np.argsort(distances, kind='stable')
+    if radius_km is not None:
+        order = order[distances[order] <= radius_km]
+    if limit is not None:
+        order = order[:limit]
+    return [(rows[index][0], round(float(distances[index]), 2)) for index in order]
+
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """Objets de ``queryset`` à moins de ``radius_km`` km du point"""
+    pks = [pk for pk, _ in nearest(queryset, latitude, longitude, radius_km)]
+    return queryset.filter(pk__in=pks)
+
+
+def parse_near(query_params):
+    """``?near=lat,lng&radius=km`` -> ``(lat, lng, rayon)``, None sans ``near``"""
+    near = query_params.get('near')
+    if not near:
+        return None
+    try:
+        latitude, longitude = (float(part) for part in near.split(','))
+        radius = float(query_params.get('radius', NEAR_DEFAULT_RADIUS_KM))
+    except ValueError:
+        raise ValidationError({'near': "Format attendu : near=latitude,longitude&radius=km"})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or not 0 < radius <= NEAR_MAX_RADIUS_KM:
+        raise ValidationError({'near': "Coordonnées ou rayon hors limites"})
+    return latitude, longitude, radius
+
+
+# ---- géocodage à l'enregistrement ----
+
+def locate(instance):
+    """Renseigne les coordonnées manquantes et le geohash de ``instance``"""
+    place_field, region_field = GEOCODED_MODELS[type(instance)]
+    if instance.latitude is None or instance.longitude is None:
+        region = getattr(instance, region_field) if region_field else ''
+        instance.latitude, instance.longitude = geocode(getattr(instance, place_field), region) or (None, None)
+    instance.geohash = (
+        geohash(instance.latitude, instance.longitude) if instance.latitude is not None
+        and instance.longitude is not None else ''
+    )
+
+
+def clear_stale_coordinates(instance, validated_data, address_fields):
+    """Adresse modifiée sans nouvelles coordonnées : géocodée de nouveau à l'enregistrement"""
+    if 'latitude' in validated_data or 'longitude' in validated_data:
+        return
+    if any(name in validated_data and validated_data[name] != getattr(instance, name) for name in address_fields):
+        validated_data.update(latitude=None, longitude=None)
+
+
+def _located_fields(instance):
+    place_field, region_field = GEOCODED_MODELS[type(instance)]
+    return {name for name in (place_field, region_field) if name} | set(GEO_FIELDS)
+
+
+def geocoded_update_fields(instance, fields):
+    """``update_fields`` complétés des coordonnées si l'adresse ou les coordonnées en font partie"""
+    fields = set(fields)
+    if fields & _located_fields(instance):
+        fields.update(GEO_FIELDS)
+    return fields
+
+
+def _locate_on_save(sender, instance, update_fields=None, **kwargs):
+    # Enregistrements partiels (rendus d'images...) : géocodés si l'adresse en fait partie
+    if update_fields is None or set(update_fields) & _located_fields(instance):
+        locate(instance)
+
+
+def register_geocoding(model, place_field, region_field=None):
+    """Géocode ``model`` (champs ``latitude``, ``longitude``, ``geohash``) à l'enregistrement"""
+    GEOCODED_MODELS[model] = (place_field, region_field)
+    pre_save.connect(_locate_on_save, sender=model, dispatch_uid=f'geocode_{model._meta.label}')
@@ -0,0 +1,174 @@
+"""Déclinaisons redimensionnées des images envoyées (``srcset``).
+
+Après l'enregistrement d'une nouvelle image, des versions WebP et JPEG aux
+largeurs ``IMAGE_RENDITION_WIDTHS`` sont générées en arrière-plan (pool de
+threads, Pillow libère le GIL pendant le décodage et le redimensionnement).
+L'orientation EXIF est appliquée puis les métadonnées sont supprimées.
+
+Les fichiers sont rangés sous un chemin déterministe dérivé de l'original
+(``renditions/products/photo/640w.webp``) et la table des déclinaisons est
+enregistrée dans un champ JSON du modèle ::
+
+    {'source': 'products/photo.jpg', 'width': 3024,
+     'formats': {'webp': {'320': 'renditions/products/photo/320w.webp', ...}, ...}}
+
+``source`` permet de savoir si les déclinaisons correspondent toujours à
+l'image courante. Voir la commande ``generate_renditions`` pour les images
+existantes.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = getattr(settings, 'IMAGE_RENDITION_WIDTHS', (320, 640, 1024, 1600))
+RENDITION_FORMATS = getattr(settings, 'IMAGE_RENDITION_FORMATS', ('webp', 'jpeg'))
+RENDITION_QUALITY = getattr(settings, 'IMAGE_RENDITION_QUALITY', 80)
+RENDITIONS_DIR = 'renditions'
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+SAVE_OPTIONS = {
+    'webp': {'method': 4},
+    'jpeg': {'optimize': True, 'progressive': True},
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2), thread_name_prefix='image-renditions'
+)
+
+# Envoyé après l'enregistrement des déclinaisons (``pk`` de l'objet)
+renditions_updated = Signal()
+
+# Modèle -> (champ image, champ JSON des déclinaisons)
+RENDITION_FIELDS = {}
+
+
+def rendition_path(name, width, image_format):
+    stem = posixpath.splitext(name)[0]
+    return f'{RENDITIONS_DIR}/{stem}/{width}w.{EXTENSIONS[image_format]}'
+
+
+def _prepare(image, image_format):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            return background
+        return image.convert('RGB')
+    if image_format == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+    return image
+
+
+def render(name, storage):
+    """Génère les déclinaisons de l'image ``name`` et renvoie leur table"""
+    with storage.open(name, 'rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+
+    widths = [width for width in RENDITION_WIDTHS if width < image.width] or [image.width]
+    formats = {}
+    for image_format in RENDITION_FORMATS:
+        source = _prepare(image, image_format)
+        paths = formats[image_format] = {}
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = source if width == image.width else source.resize((width, height), Image.LANCZOS)
+            buffer = BytesIO()
+            # Sans ``exif=`` Pillow n'écrit aucune métadonnée
+            resized.save(buffer, image_format.upper(), quality=RENDITION_QUALITY, **SAVE_OPTIONS[image_format])
+            path = rendition_path(name, width, image_format)
+            if storage.exists(path):
+                storage.delete(path)
+            paths[str(width)] = storage.save(path, ContentFile(buffer.getvalue()))
+    return {'source': name, 'width': image.width, 'formats': formats}
+
+
+def render_for(model_label, name):
+    """``render`` appelable depuis un autre processus : renvoie ``(table, erreur)``"""
+    model = apps.get_model(model_label)
+    image_field, _ = RENDITION_FIELDS[model]
+    try:
+        return render(name, model._meta.get_field(image_field).storage), None
+    except Exception as exc:
+        return None, f'{type(exc).__name__}: {exc}'
+
+
+def save_renditions(model, pk, name, renditions):
+    """Enregistre la table si l'image n'a pas changé entre-temps"""
+    image_field, renditions_field = RENDITION_FIELDS[model]
+    updated = model._base_manager.filter(pk=pk, **{image_field: name}).update(
+        **{renditions_field: renditions}
+    )
+    if updated:
+        renditions_updated.send(sender=model, pk=pk)
+    return updated
+
+
+def update_renditions(model, pk, name):
+    renditions, error = render_for(model._meta.label, name)
+    if error:
+        logger.error("Déclinaisons impossibles pour %s : %s", name, error)
+        return
+    save_renditions(model, pk, name, renditions)
+
+
+def _run_in_background(model, pk, name):
+    try:
+        update_renditions(model, pk, name)
+    finally:
+        connections.close_all()
+
+
+def schedule_renditions(sender, instance, raw=False, **kwargs):
+    """Planifie les déclinaisons quand l'image enregistrée a changé"""
+    if raw:
+        return
+    model = instance._meta.concrete_model
+    image_field, renditions_field = RENDITION_FIELDS[model]
+    name = getattr(instance, image_field).name or ''
+    renditions = getattr(instance, renditions_field) or {}
+    if renditions.get('source', '') == name:
+        return
+    if not name:
+        model._base_manager.filter(pk=instance.pk).update(**{renditions_field: {}})
+        return
+
+    if getattr(settings, 'IMAGE_RENDITIONS_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_run_in_background, model, instance.pk, name))
+    else:
+        transaction.on_commit(lambda: update_renditions(model, instance.pk, name))
+
+
+def register_renditions(model, image_field, renditions_field, senders=()):
+    """Active les déclinaisons pour ``model`` (et ses proxys listés dans ``senders``)"""
+    RENDITION_FIELDS[model] = (image_field, renditions_field)
+    for sender in (model, *senders):
+        post_save.connect(
+            schedule_renditions, sender=sender, dispatch_uid=f'renditions-{sender._meta.label}'
+        )
+
+
+def srcset(renditions, storage, request=None):
+    """``{'webp': 'url 320w, url 640w', ...}`` à partir d'une table de déclinaisons"""
+    result = {}
+    for image_format, paths in (renditions or {}).get('formats', {}).items():
+        candidates = []
+        for width, path in sorted(paths.items(), key=lambda item: int(item[0])):
+            url = storage.url(path)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f'{url} {width}w')
+        result[image_format] = ', '.join(candidates)
+    return result
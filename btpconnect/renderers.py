@@ -0,0 +1,91 @@
+"""Rendu et lecture JSON accélérés.
+
+Lorsque ``orjson`` est installé, ``FastJSONRenderer`` et ``FastJSONParser``
+l'utilisent à la place du module ``json`` ; sinon ils se comportent
+exactement comme ``JSONRenderer`` et ``JSONParser`` de DRF. La sortie est
+identique à celle de DRF :
+
+- dates et heures au format ISO 8601 (``Z`` pour UTC) ;
+- ``UUID`` en chaîne, ``Decimal`` en nombre (les serializers les convertissent
+  déjà en chaîne par défaut) ;
+- chaînes traduites paresseuses, querysets, tableaux numpy et autres objets
+  non natifs confiés à l'encodeur DRF ;
+- ``\\u2028`` et ``\\u2029`` échappés ;
+- ``NaN`` et infinis rendus par DRF (``ValueError`` avec ``STRICT_JSON``) au
+  lieu du ``null`` d'orjson : les données ne sont parcourues que si la sortie
+  contient ``null``.
+
+Les réponses indentées (API navigable, ``Accept: application/json; indent=4``)
+ou en ASCII (``UNICODE_JSON = False``) restent rendues par DRF.
+"""
+import codecs
+import math
+
+import numpy as np
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+else:
+    ORJSON_OPTIONS = 0
+
+_NULL = b'null'
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _has_non_finite(value):
+    """``value`` contient-il un flottant NaN ou infini ?"""
+    if isinstance(value, (float, np.floating)):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in 'fc' and not np.isfinite(value).all()
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` utilisant orjson lorsqu'il est disponible"""
+
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        if _NULL in ret and _has_non_finite(data):
+            # orjson a écrit null : DRF refuse (STRICT_JSON) ou écrit NaN/Infinity
+            return super().render(data, accepted_media_type, renderer_context)
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` utilisant orjson pour les corps encodés en UTF-8"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,325 @@
+"""Recommandations par similarité cosinus sur des vecteurs de caractéristiques.
+
+Chaque objet est décrit par des blocs de caractéristiques pondérés, chacun
+de norme 1 :
+
+- catégoriels (catégorie, fournisseur, région...) : vecteur « one-hot »,
+  conservé sous forme de code entier (le cosinus de deux one-hot vaut 1 si
+  les codes sont égaux, 0 sinon) ;
+- tranche numérique (prix, budget) : 1 pour la même tranche, 0,5 pour une
+  tranche voisine ;
+- proximité (coordonnées) : décroît linéairement de 1 à 0 avec la distance,
+  nulle au-delà de ``radius_km`` ;
+- textuels : TF-IDF (fréquences logarithmiques) haché sur ``dimensions``
+  colonnes, normalisé, dans une matrice NumPy ``float32``.
+
+Les poids étant de somme 1, la similarité de deux objets est le cosinus de
+leurs vecteurs concaténés (blocs multipliés par la racine de leur poids) :
+``Σ poids × cosinus du bloc``. Elle est calculée pour tout le catalogue en
+une passe vectorisée (comparaisons de codes et un produit matrice-vecteur),
+puis ``argpartition`` extrait les ``k`` meilleurs.
+
+L'index est construit à la première demande dans chaque processus. Lorsque
+la version de la collection change, seuls les objets modifiés depuis la
+dernière synchronisation (``updated_at``) sont recalculés ; une suppression
+(nombre d'objets différent) provoque une reconstruction complète. Les
+résultats sont mis en cache par objet, sous une clé contenant la version de
+la collection.
+"""
+import math
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .geo import distance_km
+from .versioning import get_collection_version
+
+TEXT_DIMENSIONS = getattr(settings, 'RECOMMENDATION_TEXT_DIMENSIONS', 512)
+RESULT_CACHE_TIMEOUT = getattr(settings, 'RECOMMENDATION_CACHE_TIMEOUT', 3600)
+RESULT_CACHE_KEY = 'similar:{}:{}:{}:{}'
+
+TOKEN = re.compile(r'[a-z0-9²³]{2,}')
+STOP_WORDS = frozenset(
+    'au aux avec ce ces dans de des du elle en et il ils la le les leur lui ma mais me '
+    'meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur '
+    'ta te tes toi ton tu un une vos votre vous the and for with'.split()
+)
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [token for token in TOKEN.findall(text) if token not in STOP_WORDS]
+
+
+def _bucket(token, dimensions):
+    return zlib.crc32(token.encode()) % dimensions
+
+
+class Coded:
+    """Bloc dont chaque objet est codé par une valeur de ``shape`` dans un tableau"""
+    dtype = np.int32
+    shape = ()
+    missing = -1
+
+    def encoder(self):
+        return None
+
+    def empty(self, count):
+        return np.full((count, *self.shape), self.missing, dtype=self.dtype)
+
+
+class Categorical(Coded):
+    """Bloc one-hot d'une valeur (codée en entier, vocabulaire étendu à la volée)"""
+
+    def __init__(self, weight):
+        self.weight = weight
+
+    def encoder(self):
+        return {}
+
+    def encode(self, value, vocabulary):
+        if value is None or value == '':
+            return -1
+        return vocabulary.setdefault(value, len(vocabulary))
+
+    def score(self, codes, query):
+        if query < 0:
+            return 0
+        return self.weight * (codes == query)
+
+
+class Band(Coded):
+    """Tranche d'une valeur numérique (bornes croissantes)"""
+    missing = -10
+
+    def __init__(self, weight, bounds):
+        self.weight = weight
+        self.bounds = bounds
+
+    def encode(self, value, vocabulary):
+        if value is None:
+            return -10
+        return sum(1 for bound in self.bounds if value >= bound)
+
+    def score(self, bands, query):
+        if query < 0:
+            return 0
+        # 1 pour la même tranche, 0,5 pour une voisine, 0 au-delà
+        return self.weight * np.clip(1 - np.abs(bands - query) / 2, 0, None)
+
+
+class Proximity(Coded):
+    """Distance entre coordonnées ``(latitude, longitude)``"""
+    dtype = np.float64
+    shape = (2,)
+    missing = np.nan
+
+    def __init__(self, weight, radius_km):
+        self.weight = weight
+        self.radius_km = radius_km
+
+    def encode(self, value, vocabulary):
+        if value is None or None in value:
+            return (np.nan, np.nan)
+        return value
+
+    def score(self, coordinates, query):
+        if np.isnan(query).any():
+            return 0
+        distances = distance_km(query[0], query[1], coordinates[:, 0], coordinates[:, 1])
+        return self.weight * np.nan_to_num(np.clip(1 - distances / self.radius_km, 0, None))
+
+
+class Text:
+    """TF-IDF haché des jetons d'un texte (ou d'une liste de valeurs)"""
+
+    def __init__(self, weight, dimensions=TEXT_DIMENSIONS):
+        self.weight = weight
+        self.dimensions = dimensions
+
+
+class SimilarityIndex:
+    """Index de similarité d'un modèle : à sous-classer (``blocks``, ``get_features``)"""
+    model = None
+    collection = None
+    # Nom du bloc -> Categorical / Band / Proximity / Text (poids de somme 1)
+    blocks = {}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self.ids = []
+        self.rows = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.codes = {name: block.empty(0) for name, block in self.blocks.items()
+                      if not isinstance(block, Text)}
+        self.vocabularies = {name: block.encoder() for name, block in self.blocks.items()
+                             if not isinstance(block, Text)}
+        self.matrices = {name: np.zeros((0, block.dimensions), dtype=np.float32)
+                         for name, block in self.blocks.items() if isinstance(block, Text)}
+        self.idf = {}
+        self.synced_at = None
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_values(self):
+        """Champs lus par ``get_features`` (requête ``values``)"""
+        raise NotImplementedError
+
+    def get_features(self, row):
+        """``{bloc: valeur}`` ; les blocs ``Text`` reçoivent une liste de jetons"""
+        raise NotImplementedError
+
+    # ---- construction ----
+
+    def _load(self, queryset):
+        rows = list(queryset.values('pk', 'updated_at', *self.get_values()))
+        return rows, [self.get_features(row) for row in rows]
+
+    def _term_frequencies(self, name, tokens):
+        block = self.blocks[name]
+        counts = {}
+        for token in tokens:
+            bucket = _bucket(token, block.dimensions)
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def _text_rows(self, name, token_lists):
+        block = self.blocks[name]
+        matrix = np.zeros((len(token_lists), block.dimensions), dtype=np.float32)
+        default_idf = self.idf[name].max() if self.idf[name].size else 1.0
+        for index, tokens in enumerate(token_lists):
+            for bucket, count in self._term_frequencies(name, tokens).items():
+                idf = self.idf[name][bucket] if self.idf[name][bucket] else default_idf
+                matrix[index, bucket] = (1 + math.log(count)) * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def _encode(self, features):
+        return {
+            name: np.array([
+                block.encode(feature[name], self.vocabularies[name]) for feature in features
+            ], dtype=block.dtype).reshape(len(features), *block.shape)
+            for name, block in self.blocks.items() if not isinstance(block, Text)
+        }
+
+    def build(self):
+        """Construit l'index complet"""
+        self._reset()
+        rows, features = self._load(self.get_queryset())
+        self.ids = [row['pk'] for row in rows]
+        self.rows = {pk: index for index, pk in enumerate(self.ids)}
+        self.alive = np.ones(len(rows), dtype=bool)
+        self.codes = self._encode(features)
+        for name, block in self.blocks.items():
+            if not isinstance(block, Text):
+                continue
+            document_frequency = np.zeros(block.dimensions, dtype=np.float32)
+            for feature in features:
+                document_frequency[list(self._term_frequencies(name, feature[name]))] += 1
+            self.idf[name] = np.where(
+                document_frequency > 0, np.log((1 + len(rows)) / (1 + document_frequency)) + 1, 0
+            ).astype(np.float32)
+            self.matrices[name] = self._text_rows(name, [feature[name] for feature in features])
+        self.synced_at = max((row['updated_at'] for row in rows), default=None)
+
+    def _apply_changes(self):
+        """Recalcule les objets modifiés depuis la dernière synchronisation"""
+        if self.synced_at is None:
+            return self.build()
+        queryset = self.get_queryset()
+        changed_pks = set(self.model._default_manager.filter(
+            updated_at__gte=self.synced_at
+        ).values_list('pk', flat=True))
+        rows, features = self._load(queryset.filter(pk__in=changed_pks))
+
+        # Objets sortis du queryset (désactivés) : masqués
+        present = {row['pk'] for row in rows}
+        for pk in changed_pks - present:
+            if pk in self.rows:
+                self.alive[self.rows[pk]] = False
+
+        new_rows = [row for row in rows if row['pk'] not in self.rows]
+        if new_rows:
+            start = len(self.ids)
+            self.ids.extend(row['pk'] for row in new_rows)
+            self.rows.update({row['pk']: start + offset for offset, row in enumerate(new_rows)})
+            self.alive = np.concatenate([self.alive, np.zeros(len(new_rows), dtype=bool)])
+            for name, codes in self.codes.items():
+                self.codes[name] = np.concatenate([codes, self.blocks[name].empty(len(new_rows))])
+            for name, matrix in self.matrices.items():
+                self.matrices[name] = np.vstack([
+                    matrix, np.zeros((len(new_rows), matrix.shape[1]), dtype=np.float32)
+                ])
+
+        if rows:
+            positions = [self.rows[row['pk']] for row in rows]
+            for name, codes in self._encode(features).items():
+                self.codes[name][positions] = codes
+            for name in self.matrices:
+                self.matrices[name][positions] = self._text_rows(name, [feature[name] for feature in features])
+            self.alive[positions] = True
+            self.synced_at = max(self.synced_at, *(row['updated_at'] for row in rows))
+
+        # Suppressions : le nombre d'objets ne correspond plus
+        if queryset.count() != int(self.alive.sum()):
+            self.build()
+
+    def refresh(self):
+        """Synchronise l'index si la collection a changé ; renvoie la version courante"""
+        version = get_collection_version(self.collection)
+        if version == self._version:
+            return version
+        with self._lock:
+            if version != self._version:
+                if self._version is None:
+                    self.build()
+                else:
+                    self._apply_changes()
+                self._version = version
+        return version
+
+    # ---- requêtes ----
+
+    def scores(self, row):
+        """Similarité de l'objet à la ligne ``row`` avec toutes les lignes"""
+        total = np.zeros(len(self.ids), dtype=np.float32)
+        for name, block in self.blocks.items():
+            if isinstance(block, Text):
+                total += block.weight * (self.matrices[name] @ self.matrices[name][row])
+            else:
+                total += block.score(self.codes[name], self.codes[name][row])
+        return total
+
+    def similar(self, pk, k=10):
+        """``k`` identifiants les plus proches de ``pk``, par similarité décroissante"""
+        version = self.refresh()
+        key = RESULT_CACHE_KEY.format(self.model._meta.label, pk, k, version)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        row = self.rows.get(pk)
+        if row is None or not self.alive[row]:
+            return []
+        scores = self.scores(row)
+        scores[~self.alive] = -np.inf
+        scores[row] = -np.inf
+        count = min(k, int(self.alive.sum()) - 1)
+        if count <= 0:
+            return []
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        result = [self.ids[index] for index in best if scores[index] > 0]
+        cache.set(key, result, RESULT_CACHE_TIMEOUT)
+        return result
@@ -0,0 +1,23 @@
+from unittest import skipIf
+
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import FastJSONRenderer, orjson
+
+
+@skipIf(orjson is None, "orjson n'est pas installé")
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_non_finite_floats_are_rejected_like_drf(self):
+        for value in (float('nan'), float('inf'), [1.0, -float('inf')], np.array([1.0, np.nan])):
+            data = {'value': value, 'missing': None}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(data)
+
+    def test_null_and_finite_floats_are_unchanged(self):
+        data = {'missing': None, 'values': [1.5, 0.0], 'array': np.array([2.0])}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"missing":null,"values":[1.5,0.0],"array":[2.0]}')
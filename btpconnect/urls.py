@@ -9,6 +9,9 @@ urlpatterns = [
     path('api/chatbot/', include('chatbot.urls')),
     path('api/', include('products.urls')),
     path('api/', include('projects.urls')),
+    path('api/orders/', include('orders.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/uploads/', include('uploads.urls')),
 ]
 
 if settings.DEBUG:
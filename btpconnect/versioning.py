@@ -0,0 +1,35 @@
+"""Compteurs de version par collection (projets, produits...).
+
+Chaque écriture sur une collection incrémente son compteur dans le cache
+Django ; les ETags de liste et les caches de résultats l'incluent dans leur
+clé, ce qui les invalide sans avoir à énumérer les entrées concernées.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'collection-version:{}'
+
+
+def _initial_version():
+    # Repartir d'une valeur basée sur l'horloge après une éviction du cache
+    # évite de réutiliser une version déjà distribuée dans un ETag.
+    return int(time.time() * 1000)
+
+
+def get_collection_version(name):
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_collection_version(*names):
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import DeletionJob
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'model_label', 'status', 'processed', 'total', 'created_by', 'created_at']
+    list_filter = ['status', 'model_label', 'created_at']
+    readonly_fields = [
+        'model_label', 'object_ids', 'status', 'total', 'processed', 'deleted_counts',
+        'error', 'created_by', 'created_at', 'started_at', 'finished_at', 'updated_at'
+    ]
+    ordering = ['-created_at']
@@ -0,0 +1,160 @@
+"""Suppression en lot avec planification des cascades.
+
+``Model.delete()`` sur un queryset charge en mémoire tous les objets liés
+en cascade avant de les supprimer. Ici le plan de cascade est calculé une
+fois à partir des relations du modèle, puis les enfants sont supprimés par
+paquets d'identifiants (``values_list``) avec des suppressions brutes, sans
+jamais garder plus d'un paquet en mémoire.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction, router
+from django.db.models import CASCADE, SET_NULL, DO_NOTHING
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from .models import DeletionJob, JobStatus
+from .signals import pre_bulk_delete, post_bulk_delete
+
+logger = logging.getLogger(__name__)
+
+DELETION_BATCH_SIZE = getattr(settings, 'DELETION_JOB_BATCH_SIZE', 500)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='deletion-jobs')
+
+
+class UnsupportedCascade(Exception):
+    """Relation dont le comportement ``on_delete`` n'est pas pris en charge"""
+
+
+class CascadeStep:
+    """Relation à traiter avant de supprimer les objets parents"""
+
+    def __init__(self, model, field_name, action, children=()):
+        self.model = model
+        self.field_name = field_name
+        self.action = action
+        self.children = children
+
+
+def plan_cascade(model, _path=()):
+    """Construit l'arbre des relations à supprimer ou détacher pour ``model``"""
+    if model in _path:
+        raise UnsupportedCascade(f"Cascade récursive sur {model._meta.label}")
+
+    steps = []
+    for relation in get_candidate_relations_to_delete(model._meta):
+        on_delete = relation.on_delete
+        related_model = relation.related_model
+        field_name = relation.field.name
+        if on_delete is CASCADE:
+            children = plan_cascade(related_model, _path + (model,))
+            steps.append(CascadeStep(related_model, field_name, 'delete', children))
+        elif on_delete is SET_NULL:
+            steps.append(CascadeStep(related_model, field_name, 'set_null'))
+        elif on_delete is DO_NOTHING:
+            continue
+        else:
+            raise UnsupportedCascade(
+                f"{related_model._meta.label}.{field_name} : on_delete={on_delete.__name__}"
+            )
+    return steps
+
+
+class BatchDeleter:
+    """Supprime des objets et leurs dépendances paquet par paquet"""
+
+    def __init__(self, model, batch_size=DELETION_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.plan = plan_cascade(model)
+        self.using = router.db_for_write(model)
+        self.deleted_counts = {}
+
+    def delete(self, pks):
+        """Supprime un paquet d'objets (et leurs enfants) dans une transaction"""
+        deleted = []
+        with transaction.atomic(using=self.using):
+            self._delete(self.model, self.plan, pks, deleted)
+            transaction.on_commit(lambda: self._notify(deleted), using=self.using)
+
+    def _delete(self, model, plan, pks, deleted):
+        for step in plan:
+            queryset = step.model._base_manager.using(self.using).filter(
+                **{f'{step.field_name}__in': pks}
+            ).order_by()
+            if step.action == 'set_null':
+                queryset.update(**{step.field_name: None})
+                continue
+            while True:
+                child_pks = list(queryset.values_list('pk', flat=True)[:self.batch_size])
+                if not child_pks:
+                    break
+                self._delete(step.model, step.children, child_pks, deleted)
+
+        pre_bulk_delete.send(sender=model, pks=pks)
+        count = model._base_manager.using(self.using).filter(pk__in=pks)._raw_delete(self.using)
+        label = model._meta.label
+        self.deleted_counts[label] = self.deleted_counts.get(label, 0) + count
+        deleted.append((model, pks))
+
+    def _notify(self, deleted):
+        for model, pks in deleted:
+            post_bulk_delete.send(sender=model, pks=pks)
+
+
+def run_deletion_job(job_id):
+    """Exécute une tâche de suppression (appelé par le worker de fond)"""
+    job = DeletionJob.objects.get(pk=job_id)
+    if job.status != JobStatus.PENDING:
+        return
+
+    job.status = JobStatus.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    try:
+        model = apps.get_model(job.model_label)
+        deleter = BatchDeleter(model)
+        for start in range(0, len(job.object_ids), deleter.batch_size):
+            requested = job.object_ids[start:start + deleter.batch_size]
+            pks = list(
+                model._base_manager.filter(pk__in=requested).order_by().values_list('pk', flat=True)
+            )
+            if pks:
+                deleter.delete(pks)
+            job.processed = start + len(requested)
+            job.deleted_counts = deleter.deleted_counts
+            job.save(update_fields=['processed', 'deleted_counts', 'updated_at'])
+    except Exception as exc:
+        logger.exception("Échec de la suppression en lot %s", job.pk)
+        job.status = JobStatus.FAILED
+        job.error = str(exc)
+    else:
+        job.status = JobStatus.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+
+def _run_in_background(job_id):
+    try:
+        run_deletion_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def create_deletion_job(model, pks, user=None):
+    """Enregistre une suppression en lot et la planifie après commit"""
+    object_ids = list(dict.fromkeys(pks))
+    job = DeletionJob.objects.create(
+        model_label=model._meta.label,
+        object_ids=object_ids,
+        total=len(object_ids),
+        created_by=user,
+    )
+    if getattr(settings, 'DELETION_JOBS_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_run_in_background, job.pk))
+    return job
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from jobs.deletion import run_deletion_job
+from jobs.models import DeletionJob, JobStatus
+
+
+class Command(BaseCommand):
+    help = 'Exécute les suppressions en lot en attente (worker dédié ou reprise après redémarrage)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-running',
+            action='store_true',
+            help='Reprend aussi les tâches restées "en cours" (worker interrompu)'
+        )
+
+    def handle(self, *args, **options):
+        if options['include_running']:
+            DeletionJob.objects.filter(status=JobStatus.RUNNING).update(status=JobStatus.PENDING)
+
+        job_ids = list(
+            DeletionJob.objects.filter(status=JobStatus.PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+        )
+        for job_id in job_ids:
+            run_deletion_job(job_id)
+            job = DeletionJob.objects.only('status', 'processed', 'total').get(pk=job_id)
+            self.stdout.write(f'{job_id} : {job.get_status_display()} ({job.processed}/{job.total})')
+
+        self.stdout.write(self.style.SUCCESS(f'{len(job_ids)} suppressions traitées'))
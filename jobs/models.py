@@ -0,0 +1,60 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+import uuid
+
+User = get_user_model()
+
+
+class JobStatus(models.TextChoices):
+    """Statuts possibles d'une tâche de fond"""
+    PENDING = 'pending', 'En attente'
+    RUNNING = 'running', 'En cours'
+    COMPLETED = 'completed', 'Terminée'
+    FAILED = 'failed', 'Échouée'
+
+
+class DeletionJob(models.Model):
+    """Suppression en lot exécutée en arrière-plan"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model_label = models.CharField(max_length=100, verbose_name="Modèle")
+    object_ids = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Identifiants")
+    status = models.CharField(
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING,
+        verbose_name="Statut"
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Nombre d'objets")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Objets traités")
+    deleted_counts = models.JSONField(default=dict, verbose_name="Lignes supprimées par modèle")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs',
+        verbose_name="Créée par"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Suppression en lot"
+        verbose_name_plural = "Suppressions en lot"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} ({self.processed}/{self.total}) - {self.get_status_display()}"
+
+    @property
+    def progress_percentage(self):
+        if not self.total:
+            return 100 if self.status == JobStatus.COMPLETED else 0
+        return round(self.processed * 100 / self.total)
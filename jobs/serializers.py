@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework import serializers
+from .models import DeletionJob
+
+BULK_DELETE_MAX = getattr(settings, 'BULK_DELETE_MAX', 5000)
+
+
+class BulkDeleteIdsField(serializers.ListField):
+    """Identifiants d'une suppression en lot (au plus ``BULK_DELETE_MAX``)"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('min_length', 1)
+        kwargs.setdefault('max_length', BULK_DELETE_MAX)
+        super().__init__(child=serializers.UUIDField(), **kwargs)
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    """Serializer pour le suivi d'une suppression en lot"""
+    progress_percentage = serializers.ReadOnlyField()
+
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'model_label', 'status', 'total', 'processed',
+            'progress_percentage', 'deleted_counts', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
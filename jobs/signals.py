@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# Les suppressions en lot contournent ``pre_delete``/``post_delete``.
+# ``pre_bulk_delete`` est envoyé dans la transaction, avant la suppression
+# (les lignes sont encore lisibles) ; ``post_bulk_delete`` après commit.
+# Arguments : ``pks``, la liste des clés primaires du lot.
+pre_bulk_delete = Signal()
+post_bulk_delete = Signal()
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('deletions/<uuid:pk>/', views.DeletionJobDetailView.as_view(), name='deletion-job-detail'),
+]
@@ -0,0 +1,17 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from .models import DeletionJob
+from .serializers import DeletionJobSerializer
+
+
+class DeletionJobDetailView(generics.RetrieveAPIView):
+    """Suivi de l'avancement d'une suppression en lot"""
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = DeletionJob.objects.defer('object_ids')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
@@ -0,0 +1,28 @@
+from django.contrib import admin
+from .models import Cart, Order, OrderStatusSummary
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ['user', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'total', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__username', 'idempotency_key']
+    readonly_fields = [
+        'status', 'lines', 'items_count', 'subtotal', 'delivery_fee', 'service_fee', 'total',
+        'status_history', 'idempotency_key', 'created_at', 'updated_at'
+    ]
+    ordering = ['-created_at']
+
+
+@admin.register(OrderStatusSummary)
+class OrderStatusSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'status', 'orders_count', 'total_amount']
+    list_filter = ['status']
+    search_fields = ['user__username']
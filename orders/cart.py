@@ -0,0 +1,150 @@
+"""Opérations sur le panier.
+
+Le panier tient dans une seule ligne (``Cart.items``) : chaque opération
+lit le panier une fois, modifie la liste en mémoire puis l'écrit une fois,
+par une mise à jour conditionnelle sur ``updated_at``. Si une autre requête
+a modifié le panier entre-temps, l'opération est rejouée sur le panier relu :
+deux ajouts simultanés ne s'écrasent pas.
+
+Les montants sont renvoyés en chaîne (``"1500.00"``), comme les
+``DecimalField`` des serializers.
+"""
+import uuid
+from decimal import Decimal
+
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import Cart
+
+CART_PRODUCT_FIELDS = (
+    'id', 'name', 'unit', 'price', 'image', 'in_stock', 'stock_quantity', 'min_order', 'is_active'
+)
+CART_UPDATE_ATTEMPTS = 5
+
+
+class CartConflict(Exception):
+    """Panier modifié par d'autres requêtes à chaque tentative"""
+
+
+def get_cart(user):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    return cart
+
+
+def write_items(cart, items):
+    """Remplace les articles de ``cart`` s'il n'a pas changé depuis sa lecture ; renvoie ``True`` si écrit"""
+    now = timezone.now()
+    if not Cart.objects.filter(pk=cart.pk, updated_at=cart.updated_at).update(items=items, updated_at=now):
+        return False
+    cart.items, cart.updated_at = items, now
+    return True
+
+
+def _update_items(user, change):
+    """Écrit ``change(items)`` si le panier n'a pas changé depuis sa lecture, sinon recommence.
+
+    ``change`` reçoit une copie des articles ; s'il renvoie ``None``, rien n'est écrit.
+    """
+    for _ in range(CART_UPDATE_ATTEMPTS):
+        cart = get_cart(user)
+        items = change([dict(item) for item in cart.items])
+        if items is None:
+            return None
+        if write_items(cart, items):
+            return cart
+    raise CartConflict("Le panier a été modifié entre-temps.")
+
+
+def add_to_cart(user, product, quantity):
+    """Ajoute ``quantity`` unités de ``product`` (cumulées si déjà présent)"""
+    product_id = str(product.id)
+
+    def change(items):
+        for item in items:
+            if item['product_id'] == product_id:
+                item['quantity'] += quantity
+                item['unit_price'] = str(product.price)
+                break
+        else:
+            items.append({
+                'product_id': product_id,
+                'quantity': quantity,
+                'unit_price': str(product.price),
+            })
+        return items
+
+    return _update_items(user, change)
+
+
+def set_cart_quantity(user, product_id, quantity):
+    """Modifie la quantité d'un article (0 le retire). Renvoie ``None`` s'il est absent"""
+    product_id = str(product_id)
+
+    def change(items):
+        if not any(item['product_id'] == product_id for item in items):
+            return None
+        if quantity > 0:
+            return [
+                dict(item, quantity=quantity) if item['product_id'] == product_id else item
+                for item in items
+            ]
+        return [item for item in items if item['product_id'] != product_id]
+
+    return _update_items(user, change)
+
+
+def remove_quantities(user, quantities):
+    """Retire ``{product_id: quantité}`` du panier (articles ajoutés entre-temps conservés)"""
+    quantities = {str(product_id): quantity for product_id, quantity in quantities.items()}
+
+    def change(items):
+        remaining = []
+        for item in items:
+            quantity = item['quantity'] - quantities.get(item['product_id'], 0)
+            if quantity > 0:
+                remaining.append(dict(item, quantity=quantity))
+        return remaining
+
+    return _update_items(user, change)
+
+
+def clear_cart(user):
+    Cart.objects.filter(user=user).update(items=[], updated_at=timezone.now())
+
+
+def cart_payload(cart):
+    """Représentation du panier avec les informations produit à jour (une requête)"""
+    products = Product.objects.only(*CART_PRODUCT_FIELDS).in_bulk(
+        [item['product_id'] for item in cart.items]
+    )
+    items, total = [], Decimal('0.00')
+    for item in cart.items:
+        product = products.get(uuid.UUID(item['product_id']))
+        if product is None:
+            items.append({
+                'product_id': item['product_id'],
+                'quantity': item['quantity'],
+                'available': False,
+            })
+            continue
+        line_total = product.price * item['quantity']
+        total += line_total
+        items.append({
+            'product_id': item['product_id'],
+            'name': product.name,
+            'unit': product.unit,
+            'image': product.image,
+            'quantity': item['quantity'],
+            'unit_price': str(product.price),
+            'price_changed': Decimal(str(item['unit_price'])) != product.price,
+            'available': product.is_active and product.in_stock,
+            'line_total': str(line_total),
+        })
+    return {
+        'items': items,
+        'items_count': sum(item['quantity'] for item in cart.items),
+        'total': str(total),
+        'updated_at': cart.updated_at,
+    }
@@ -0,0 +1,181 @@
+"""Passage de commande.
+
+Toutes les lignes sont validées avec une seule requête ``in_bulk`` sur les
+produits (actif, en stock, commande minimum, stock disponible, prix). Le
+stock suivi (``Product.stock_quantity``) est décrémenté par des mises à jour
+conditionnelles (voir ``products.inventory``) : deux commandes concurrentes
+ne peuvent pas vendre la même unité. Une commande peut aussi utiliser des
+réservations de stock déjà obtenues. Le panier n'est modifié (prix
+réalignés, vidage) que par mises à jour conditionnelles sur la version lue
+(voir ``orders.cart``) : un article ajouté pendant la commande est conservé. Une clé d'idempotence par utilisateur
+garantit qu'un paiement rejoué ne crée pas de seconde commande.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from products.events import record_order
+from products.inventory import InsufficientStock, ReservationError, consume, take_stock
+from products.models import Product, StockReservation, ReservationStatus
+
+from .cart import CART_PRODUCT_FIELDS, CartConflict, remove_quantities, write_items
+from .history import compute_fees, history_entry, record_new_order
+from .models import Cart, Order, OrderStatus
+
+
+class CheckoutError(Exception):
+    """Commande refusée ; ``errors`` associe chaque produit à ses erreurs"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("Commande invalide")
+
+
+def _merge_items(items):
+    """Regroupe les lignes par produit : ``{uuid: (quantité, prix_attendu)}``"""
+    merged = {}
+    for item in items:
+        product_id = uuid.UUID(str(item['product_id']))
+        quantity, expected_price = merged.get(product_id, (0, None))
+        if item.get('unit_price') is not None:
+            expected_price = Decimal(str(item['unit_price']))
+        merged[product_id] = (quantity + item['quantity'], expected_price)
+    return merged
+
+
+def _validate(product, quantity, expected_price, reserved=0):
+    if product is None or not product.is_active:
+        return ["Produit introuvable ou inactif."]
+    errors = []
+    if not product.in_stock and reserved < quantity:
+        errors.append("Produit en rupture de stock.")
+    elif product.stock_quantity is not None and product.stock_quantity + reserved < quantity:
+        errors.append(f"Stock insuffisant ({product.stock_quantity + reserved} disponibles).")
+    if quantity < product.min_order:
+        errors.append(f"La commande minimum est de {product.min_order}.")
+    if expected_price is not None and expected_price != product.price:
+        errors.append(f"Le prix a changé (nouveau prix : {product.price}).")
+    return errors
+
+
+def _refresh_cart_prices(cart, products):
+    """Aligne les prix du panier sur le catalogue, sauf s'il a changé depuis sa lecture"""
+    items = []
+    for item in cart.items:
+        product = products.get(uuid.UUID(item['product_id']))
+        items.append(dict(item, unit_price=str(product.price)) if product is not None else dict(item))
+    write_items(cart, items)
+
+
+def _reserved_items(user, reservation_ids):
+    rows = StockReservation.objects.filter(
+        pk__in=reservation_ids, user=user,
+        status=ReservationStatus.ACTIVE, expires_at__gt=timezone.now()
+    ).values_list('product_id', 'quantity')
+    items = [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in rows]
+    if len(items) != len(set(reservation_ids)):
+        raise CheckoutError({'reservation_ids': ["Réservation introuvable, expirée ou déjà utilisée."]})
+    return items
+
+
+def _take_stock(lines, reservation_ids, user):
+    reserved = consume(reservation_ids, user) if reservation_ids else {}
+    take_stock({
+        line['product_id']: line['quantity'] - reserved.get(uuid.UUID(line['product_id']), 0)
+        for line in lines
+        if line['stock_tracked'] and line['quantity'] > reserved.get(uuid.UUID(line['product_id']), 0)
+    })
+
+
+def place_order(user, idempotency_key, items=None, reservation_ids=None):
+    """Crée une commande à partir de ``items``, de réservations ou du panier.
+
+    Renvoie ``(order, created)`` ; ``created`` vaut ``False`` lorsque la clé
+    d'idempotence correspond à une commande déjà passée.
+    """
+    existing = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+    if existing is not None:
+        return existing, False
+
+    reserved = {}
+    if reservation_ids:
+        items = _reserved_items(user, reservation_ids)
+        reserved = _merge_items(items)
+    from_cart = items is None
+    if from_cart:
+        cart = Cart.objects.filter(user=user).only('items', 'updated_at').first()
+        items = cart.items if cart else []
+    if not items:
+        raise CheckoutError({'items': ["Le panier est vide."]})
+
+    merged = _merge_items(items)
+    products = Product.objects.only(*CART_PRODUCT_FIELDS).in_bulk(list(merged))
+
+    # Montants des lignes en chaîne : identiques avant et après relecture du JSON
+    errors, lines, subtotal = {}, [], Decimal('0.00')
+    for product_id, (quantity, expected_price) in merged.items():
+        product = products.get(product_id)
+        line_errors = _validate(
+            product, quantity, expected_price, reserved.get(product_id, (0, None))[0]
+        )
+        if line_errors:
+            errors[str(product_id)] = line_errors
+            continue
+        line_total = product.price * quantity
+        subtotal += line_total
+        lines.append({
+            'product_id': str(product_id),
+            'name': product.name,
+            'unit': product.unit,
+            'unit_price': str(product.price),
+            'quantity': quantity,
+            'line_total': str(line_total),
+            'stock_tracked': product.stock_quantity is not None,
+        })
+
+    if errors:
+        if from_cart and any(
+            products.get(product_id) is not None and expected_price is not None
+            and expected_price != products[product_id].price
+            for product_id, (_, expected_price) in merged.items()
+        ):
+            _refresh_cart_prices(cart, products)
+        raise CheckoutError(errors)
+
+    delivery_fee, service_fee = compute_fees(subtotal)
+    try:
+        with transaction.atomic():
+            _take_stock(lines, reservation_ids, user)
+            order = Order.objects.create(
+                user=user,
+                lines=[{key: value for key, value in line.items() if key != 'stock_tracked'}
+                       for line in lines],
+                items_count=sum(line['quantity'] for line in lines),
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                service_fee=service_fee,
+                total=subtotal + delivery_fee + service_fee,
+                status_history=[history_entry(OrderStatus.PENDING, user)],
+                idempotency_key=idempotency_key,
+            )
+            record_new_order(order)
+            record_order(order)
+            if from_cart and not write_items(cart, []):
+                # Panier modifié depuis sa lecture : seules les quantités commandées sont retirées
+                remove_quantities(user, {product_id: quantity for product_id, (quantity, _) in merged.items()})
+    except IntegrityError:
+        # Requête rejouée en parallèle : la première commande a été enregistrée
+        existing = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if existing is None:
+            raise
+        return existing, False
+    except InsufficientStock as exc:
+        raise CheckoutError({str(exc.product_id): ["Stock insuffisant."]})
+    except ReservationError as exc:
+        raise CheckoutError({'reservation_ids': [str(exc)]})
+    except CartConflict as exc:
+        raise CheckoutError({'items': [str(exc)]})
+
+    return order, True
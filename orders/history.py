@@ -0,0 +1,151 @@
+"""Frais, historique des statuts et résumé des commandes.
+
+Les montants (sous-total, frais, total) et le nombre d'articles sont
+calculés une fois au passage de commande et stockés sur la commande. Chaque
+changement de statut est ajouté à ``Order.status_history`` par une mise à
+jour conditionnelle sur le statut courant, et les compteurs
+``OrderStatusSummary`` de l'utilisateur sont ajustés par incréments ``F()``.
+"""
+from collections import Counter
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from products.inventory import restore_stock
+
+from .models import Order, OrderStatus, OrderStatusSummary
+
+DELIVERY_FEE = Decimal(str(getattr(settings, 'ORDER_DELIVERY_FEE', 0)))
+FREE_DELIVERY_THRESHOLD = Decimal(str(getattr(settings, 'ORDER_FREE_DELIVERY_THRESHOLD', 0)))
+SERVICE_FEE_RATE = Decimal(str(getattr(settings, 'ORDER_SERVICE_FEE_RATE', 0)))
+
+ALLOWED_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+
+class InvalidTransition(Exception):
+    """Changement de statut non autorisé ou commande modifiée entre-temps"""
+
+
+def compute_fees(subtotal):
+    """Renvoie ``(frais_de_livraison, frais_de_service)`` pour un sous-total"""
+    if FREE_DELIVERY_THRESHOLD and subtotal >= FREE_DELIVERY_THRESHOLD:
+        delivery_fee = Decimal('0')
+    else:
+        delivery_fee = DELIVERY_FEE
+    service_fee = (subtotal * SERVICE_FEE_RATE).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return delivery_fee, service_fee
+
+
+def history_entry(status, user=None, note=''):
+    return {
+        'status': status,
+        'changed_at': timezone.now(),
+        'changed_by': user.pk if user is not None else None,
+        'note': note,
+    }
+
+
+def adjust_summary(user_id, status, count, amount):
+    """Ajoute ``count`` commandes et ``amount`` au résumé ``(user, status)``"""
+    updated = OrderStatusSummary.objects.filter(user_id=user_id, status=status).update(
+        orders_count=F('orders_count') + count,
+        total_amount=F('total_amount') + amount,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            OrderStatusSummary.objects.create(
+                user_id=user_id, status=status, orders_count=count, total_amount=amount
+            )
+    except IntegrityError:
+        # Ligne créée en parallèle : on retombe sur l'incrément
+        adjust_summary(user_id, status, count, amount)
+
+
+def record_new_order(order):
+    adjust_summary(order.user_id, order.status, 1, order.total)
+
+
+def change_status(order, new_status, user=None, note=''):
+    """Fait passer ``order`` à ``new_status`` et l'ajoute à son historique.
+
+    Une commande annulée restitue son stock.
+    """
+    old_status = order.status
+    if new_status not in ALLOWED_TRANSITIONS[old_status]:
+        raise InvalidTransition(
+            f"Transition impossible : {OrderStatus(old_status).label} → {OrderStatus(new_status).label}"
+        )
+
+    history = order.status_history + [history_entry(new_status, user, note)]
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, status=old_status).update(
+            status=new_status, status_history=history, updated_at=now
+        )
+        if not updated:
+            raise InvalidTransition("La commande a été modifiée entre-temps.")
+        adjust_summary(order.user_id, old_status, -1, -order.total)
+        adjust_summary(order.user_id, new_status, 1, order.total)
+        if new_status == OrderStatus.CANCELLED:
+            quantities = Counter()
+            for line in order.lines:
+                quantities[line['product_id']] += line['quantity']
+            restore_stock(quantities)
+
+    order.status = new_status
+    order.status_history = history
+    order.updated_at = now
+    return order
+
+
+def user_summary(user):
+    """Résumé des commandes d'un utilisateur (une requête), montants en chaîne"""
+    by_status, orders_count, total_spent = {}, 0, Decimal('0.00')
+    for row in OrderStatusSummary.objects.filter(user=user).values(
+        'status', 'orders_count', 'total_amount'
+    ):
+        by_status[row['status']] = {
+            'count': row['orders_count'],
+            'amount': str(row['total_amount']),
+        }
+        orders_count += row['orders_count']
+        if row['status'] != OrderStatus.CANCELLED:
+            total_spent += row['total_amount']
+    return {
+        'orders_count': orders_count,
+        'total_spent': str(total_spent),
+        'by_status': by_status,
+    }
+
+
+def rebuild_summaries(user_ids=None):
+    """Recalcule les résumés à partir des commandes (réparation ponctuelle)"""
+    orders = Order.objects.all()
+    summaries = OrderStatusSummary.objects.all()
+    if user_ids is not None:
+        orders = orders.filter(user_id__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+
+    rows = orders.order_by().values('user_id', 'status').annotate(
+        orders_count=Count('id'), total_amount=Sum('total')
+    )
+    with transaction.atomic():
+        summaries.delete()
+        OrderStatusSummary.objects.bulk_create([
+            OrderStatusSummary(
+                user_id=row['user_id'], status=row['status'],
+                orders_count=row['orders_count'], total_amount=row['total_amount'] or 0
+            )
+            for row in rows
+        ], batch_size=500)
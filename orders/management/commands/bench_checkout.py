@@ -0,0 +1,139 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Sum
+
+from orders.checkout import CheckoutError, place_order
+from orders.models import Order
+from products.models import Category, Supplier, Product
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_checkout'
+
+
+class Command(BaseCommand):
+    help = 'Mesure le débit de passage de commande avec des utilisateurs concurrents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Nombre d\'utilisateurs simulés')
+        parser.add_argument('--orders', type=int, default=10, help='Commandes par utilisateur')
+        parser.add_argument('--products', type=int, default=5, help='Nombre de produits')
+        parser.add_argument('--stock', type=int, default=100, help='Stock initial par produit')
+        parser.add_argument('--threads', type=int, default=8, help='Nombre de threads')
+        parser.add_argument('--replay-rate', type=float, default=0.1,
+                            help='Proportion de commandes rejouées avec la même clé')
+        parser.add_argument('--keep', action='store_true', help='Conserve les données créées')
+
+    def handle(self, *args, **options):
+        products, users = self._setup(options)
+        try:
+            self._run(products, users, options)
+        finally:
+            if not options['keep']:
+                self._cleanup()
+
+    def _setup(self, options):
+        self._cleanup()
+        supplier_user = User.objects.create_user(f'{BENCH_PREFIX}_supplier', password=None)
+        supplier = Supplier.objects.create(
+            user=supplier_user, company_name='Bench', location='Dakar',
+            phone='0', email='bench@example.com'
+        )
+        category = Category.objects.create(name=f'{BENCH_PREFIX}_category')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'{BENCH_PREFIX}_{index}', category=category, supplier=supplier,
+                price=1000 + index, unit='pièce', description='Benchmark',
+                delivery_time='24h', stock_quantity=options['stock']
+            )
+            for index in range(options['products'])
+        ])
+        User.objects.bulk_create([
+            User(username=f'{BENCH_PREFIX}_user_{index}', email=f'bench{index}@example.com')
+            for index in range(options['users'])
+        ])
+        users = list(User.objects.filter(username__startswith=f'{BENCH_PREFIX}_user_'))
+        return products, users
+
+    def _cleanup(self):
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        Category.objects.filter(name=f'{BENCH_PREFIX}_category').delete()
+
+    def _checkout_user(self, user, products, options):
+        latencies, created, replayed, rejected = [], 0, 0, 0
+        rng = random.Random(user.pk)
+        try:
+            for index in range(options['orders']):
+                items = [
+                    {'product_id': product.id, 'quantity': rng.randint(1, 3)}
+                    for product in rng.sample(products, k=min(2, len(products)))
+                ]
+                key = f'{user.pk}-{index}'
+                attempts = 2 if rng.random() < options['replay_rate'] else 1
+                for _ in range(attempts):
+                    start = time.perf_counter()
+                    try:
+                        _, is_new = place_order(user, key, items)
+                    except CheckoutError:
+                        rejected += 1
+                    else:
+                        created += is_new
+                        replayed += not is_new
+                    latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+        return latencies, created, replayed, rejected
+
+    def _run(self, products, users, options):
+        self.stdout.write(
+            f"{len(users)} utilisateurs x {options['orders']} commandes, "
+            f"{len(products)} produits, {options['threads']} threads"
+        )
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = list(executor.map(
+                lambda user: self._checkout_user(user, products, options), users
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        created = sum(result[1] for result in results)
+        replayed = sum(result[2] for result in results)
+        rejected = sum(result[3] for result in results)
+
+        self.stdout.write(f'Durée : {elapsed:.2f} s')
+        self.stdout.write(f'Commandes créées : {created} ({created / elapsed:.1f}/s)')
+        self.stdout.write(f'Rejeux idempotents : {replayed}, refus (stock) : {rejected}')
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+            self.stdout.write(
+                f'Latence : médiane {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p95 {p95 * 1000:.1f} ms'
+            )
+
+        # Vérification : aucune survente, une commande par clé
+        sold = {str(product.id): 0 for product in products}
+        for lines in Order.objects.filter(user__in=users).values_list('lines', flat=True):
+            for line in lines:
+                sold[line['product_id']] += line['quantity']
+        remaining = Product.objects.filter(id__in=[product.id for product in products])
+        oversold = [
+            product.name for product in remaining
+            if product.stock_quantity + sold[str(product.id)] != options['stock']
+        ]
+        orders_count = Order.objects.filter(user__in=users).count()
+        total_stock = remaining.aggregate(total=Sum('stock_quantity'))['total']
+
+        self.stdout.write(f'Stock restant : {total_stock}, commandes en base : {orders_count}')
+        if oversold or orders_count != created:
+            self.stdout.write(self.style.ERROR(
+                f'Incohérence détectée (produits : {oversold}, commandes : {orders_count}/{created})'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Stock et commandes cohérents'))
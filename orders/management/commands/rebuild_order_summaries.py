@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from orders.history import rebuild_summaries
+from orders.models import OrderStatusSummary
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les résumés de commandes par utilisateur à partir des commandes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Limite le recalcul à cet utilisateur (option répétable)')
+
+    def handle(self, *args, **options):
+        rebuild_summaries(options['user_ids'])
+        count = OrderStatusSummary.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'{count} lignes de résumé recalculées'))
@@ -0,0 +1,90 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:02
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_orders(apps, schema_editor):
+    """Renseigne les montants, l'historique et les résumés des commandes existantes"""
+    Order = apps.get_model('orders', 'Order')
+    OrderStatusSummary = apps.get_model('orders', 'OrderStatusSummary')
+    summaries = {}
+    for order in Order.objects.iterator():
+        order.items_count = sum(line['quantity'] for line in order.lines)
+        order.subtotal = order.total
+        order.status_history = [
+            {'status': order.status, 'changed_at': order.created_at, 'changed_by': None, 'note': ''}
+        ]
+        order.save(update_fields=['items_count', 'subtotal', 'status_history'])
+        summary = summaries.setdefault(
+            (order.user_id, order.status),
+            OrderStatusSummary(user_id=order.user_id, status=order.status)
+        )
+        summary.orders_count += 1
+        summary.total_amount += order.total
+    OrderStatusSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('confirmed', 'Confirmée'), ('shipped', 'Expédiée'), ('delivered', 'Livrée'), ('cancelled', 'Annulée')], max_length=20, verbose_name='Statut')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de commandes')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Montant total')),
+            ],
+            options={
+                'verbose_name': 'Résumé des commandes',
+                'verbose_name_plural': 'Résumés des commandes',
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_fee',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Frais de livraison'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, verbose_name="Nombre d'articles"),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='service_fee',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Frais de service'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='status_history',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Historique des statuts'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Sous-total'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='orders_orde_user_id_0ae59f_idx'),
+        ),
+        migrations.AddField(
+            model_name='orderstatussummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='orderstatussummary',
+            unique_together={('user', 'status')},
+        ),
+        migrations.RunPython(backfill_orders, migrations.RunPython.noop),
+    ]
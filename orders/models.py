@@ -0,0 +1,102 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+import uuid
+
+User = get_user_model()
+
+
+class OrderStatus(models.TextChoices):
+    """Statuts possibles d'une commande"""
+    PENDING = 'pending', 'En attente'
+    CONFIRMED = 'confirmed', 'Confirmée'
+    SHIPPED = 'shipped', 'Expédiée'
+    DELIVERED = 'delivered', 'Livrée'
+    CANCELLED = 'cancelled', 'Annulée'
+
+
+class Cart(models.Model):
+    """Panier persistant : une seule ligne par utilisateur.
+
+    Les articles sont stockés dans ``items`` sous la forme
+    ``[{"product_id": "<uuid>", "quantity": 2, "unit_price": "1500.00"}, ...]``
+    afin qu'une opération sur le panier se fasse en une lecture et une écriture.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
+    items = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Articles")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Panier"
+        verbose_name_plural = "Paniers"
+
+    def __str__(self):
+        return f"Panier de {self.user.username} ({len(self.items)} articles)"
+
+
+class Order(models.Model):
+    """Commande passée par un utilisateur.
+
+    Les lignes sont figées au moment de la commande (nom, unité et prix du
+    produit) pour que l'historique ne dépende pas des modifications du
+    catalogue.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    status = models.CharField(
+        max_length=20,
+        choices=OrderStatus.choices,
+        default=OrderStatus.PENDING,
+        verbose_name="Statut"
+    )
+    lines = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Lignes")
+    items_count = models.PositiveIntegerField(default=0, verbose_name="Nombre d'articles")
+    subtotal = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Sous-total")
+    delivery_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Frais de livraison")
+    service_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Frais de service")
+    total = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Total")
+    status_history = models.JSONField(
+        default=list,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Historique des statuts"
+    )
+    idempotency_key = models.CharField(max_length=64, verbose_name="Clé d'idempotence")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Commande"
+        verbose_name_plural = "Commandes"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                name='unique_order_idempotency_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Commande {self.id} - {self.user.username}"
+
+
+class OrderStatusSummary(models.Model):
+    """Nombre et montant des commandes d'un utilisateur pour un statut.
+
+    Maintenu par incréments ``F()`` à chaque création ou changement de
+    statut : le résumé d'un utilisateur se lit en une requête.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_summaries')
+    status = models.CharField(max_length=20, choices=OrderStatus.choices, verbose_name="Statut")
+    orders_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de commandes")
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Montant total")
+
+    class Meta:
+        verbose_name = "Résumé des commandes"
+        verbose_name_plural = "Résumés des commandes"
+        unique_together = ['user', 'status']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_status_display()} : {self.orders_count}"
@@ -0,0 +1,60 @@
+from rest_framework import serializers
+from .models import Order, OrderStatus
+
+
+class CartItemSerializer(serializers.Serializer):
+    """Article à ajouter au panier ou à commander directement"""
+    product_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CartItemUpdateSerializer(serializers.Serializer):
+    """Nouvelle quantité d'un article du panier (0 pour le retirer)"""
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Passage de commande : articles explicites, réservations de stock ou contenu du panier"""
+    items = CartItemSerializer(many=True, required=False, allow_empty=False)
+    reservation_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
+    idempotency_key = serializers.CharField(max_length=64, required=False)
+
+    def validate(self, data):
+        if 'items' in data and 'reservation_ids' in data:
+            raise serializers.ValidationError("Utilisez soit items, soit reservation_ids.")
+        return data
+
+
+class OrderListSerializer(serializers.ModelSerializer):
+    """Serializer pour l'historique des commandes (sans les lignes)"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'status', 'status_display', 'items_count', 'subtotal',
+            'delivery_fee', 'service_fee', 'total', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Serializer détaillé pour une commande"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'status', 'status_display', 'lines', 'items_count', 'subtotal',
+            'delivery_fee', 'service_fee', 'total', 'status_history',
+            'idempotency_key', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class OrderStatusUpdateSerializer(serializers.Serializer):
+    """Changement de statut d'une commande"""
+    status = serializers.ChoiceField(choices=OrderStatus.choices)
+    note = serializers.CharField(max_length=500, required=False, allow_blank=True)
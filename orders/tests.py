@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from products.models import Category, Product, Supplier
+
+from . import checkout
+from .cart import add_to_cart, get_cart
+from .checkout import CheckoutError, place_order
+
+User = get_user_model()
+
+
+class CheckoutCartTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pw', user_type='CLIENT')
+        supplier_user = User.objects.create_user('fournisseur', 'f@example.com', 'pw', user_type='SUPPLIER')
+        supplier = Supplier.objects.create(
+            user=supplier_user, company_name='Sococim', location='Rufisque', phone='1', email='s@example.com'
+        )
+        category = Category.objects.create(name='Ciment')
+        self.cement, self.sand = [
+            Product.objects.create(
+                name=name, category=category, supplier=supplier, price=5000, unit='sac', description='d'
+            )
+            for name in ('Ciment', 'Sable')
+        ]
+
+    def test_item_added_during_checkout_stays_in_cart(self):
+        add_to_cart(self.user, self.cement, 2)
+        take_stock = checkout._take_stock
+
+        def add_during_checkout(*args):
+            add_to_cart(self.user, self.sand, 1)
+            add_to_cart(self.user, self.cement, 1)
+            take_stock(*args)
+
+        with mock.patch.object(checkout, '_take_stock', add_during_checkout):
+            order, created = place_order(self.user, 'cle')
+
+        self.assertTrue(created)
+        self.assertEqual(order.items_count, 2)
+        quantities = {item['product_id']: item['quantity'] for item in get_cart(self.user).items}
+        self.assertEqual(quantities, {str(self.sand.id): 1, str(self.cement.id): 1})
+
+    def test_price_refresh_keeps_concurrent_changes(self):
+        add_to_cart(self.user, self.cement, 2)
+        Product.objects.filter(pk=self.cement.pk).update(price=6000)
+        validate = checkout._validate
+
+        def add_during_checkout(*args):
+            add_to_cart(self.user, self.sand, 1)
+            return validate(*args)
+
+        with mock.patch.object(checkout, '_validate', add_during_checkout):
+            with self.assertRaises(CheckoutError):
+                place_order(self.user, 'cle')
+
+        items = get_cart(self.user).items
+        self.assertEqual(len(items), 2)
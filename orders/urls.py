@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Panier
+    path('cart/', views.cart_detail, name='cart-detail'),
+    path('cart/add/', views.cart_add, name='cart-add'),
+    path('cart/items/<uuid:product_id>/', views.cart_item, name='cart-item'),
+
+    # Commandes
+    path('', views.OrderListCreateView.as_view(), name='order-list-create'),
+    path('summary/', views.order_summary, name='order-summary'),
+    path('<uuid:pk>/', views.OrderDetailView.as_view(), name='order-detail'),
+    path('<uuid:pk>/status/', views.order_update_status, name='order-update-status'),
+]
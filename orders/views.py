@@ -0,0 +1,152 @@
+import uuid
+
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from products.events import record_cart_add
+from products.models import Product
+
+from .cart import CartConflict, get_cart, add_to_cart, set_cart_quantity, clear_cart, cart_payload
+from .checkout import CheckoutError, place_order
+from .history import InvalidTransition, change_status, user_summary
+from .models import Order, OrderStatus
+from .serializers import (
+    CartItemSerializer, CartItemUpdateSerializer, CheckoutSerializer,
+    OrderListSerializer, OrderSerializer, OrderStatusUpdateSerializer
+)
+
+
+# ==================== PANIER ====================
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def cart_detail(request):
+    """Contenu du panier (GET) ou vidage du panier (DELETE)"""
+    if request.method == 'DELETE':
+        clear_cart(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(cart_payload(get_cart(request.user)))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cart_add(request):
+    """Ajouter un produit au panier"""
+    serializer = CartItemSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    product = Product.objects.filter(
+        id=serializer.validated_data['product_id'], is_active=True
+    ).only('id', 'price').first()
+    if product is None:
+        return Response({'error': 'Produit non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        cart = add_to_cart(request.user, product, serializer.validated_data['quantity'])
+    except CartConflict as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    record_cart_add(request.user, product.id)
+    return Response(cart_payload(cart))
+
+
+@api_view(['PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def cart_item(request, product_id):
+    """Modifier la quantité d'un article du panier ou le retirer"""
+    if request.method == 'DELETE':
+        quantity = 0
+    else:
+        serializer = CartItemUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
+
+    try:
+        cart = set_cart_quantity(request.user, product_id, quantity)
+    except CartConflict as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    if cart is None:
+        return Response({'error': 'Article absent du panier'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(cart_payload(cart))
+
+
+# ==================== COMMANDES ====================
+
+class OrderListCreateView(generics.ListCreateAPIView):
+    """Liste des commandes et passage de commande.
+
+    La clé d'idempotence est lue dans l'en-tête ``Idempotency-Key`` ou le
+    champ ``idempotency_key`` : rejouer la même requête renvoie la commande
+    déjà créée (200) au lieu d'en créer une nouvelle (201).
+    """
+    serializer_class = OrderListSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Les montants sont stockés sur la commande : une requête, sans les lignes
+        return Order.objects.filter(user=self.request.user).defer('lines', 'status_history')
+
+    def create(self, request, *args, **kwargs):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        idempotency_key = (
+            request.headers.get('Idempotency-Key')
+            or serializer.validated_data.get('idempotency_key')
+            or uuid.uuid4().hex
+        )[:64]
+
+        try:
+            order, created = place_order(
+                request.user, idempotency_key,
+                items=serializer.validated_data.get('items'),
+                reservation_ids=serializer.validated_data.get('reservation_ids'),
+            )
+        except CheckoutError as exc:
+            return Response({'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            OrderSerializer(order).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class OrderDetailView(generics.RetrieveAPIView):
+    """Détail d'une commande"""
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Order.objects.filter(user=self.request.user)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def order_update_status(request, pk):
+    """Changer le statut d'une commande (le client peut seulement l'annuler)"""
+    serializer = OrderStatusUpdateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    new_status = serializer.validated_data['status']
+
+    queryset = Order.objects.all() if request.user.is_staff else Order.objects.filter(user=request.user)
+    order = queryset.filter(pk=pk).first()
+    if order is None:
+        return Response({'error': 'Commande non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+    if not request.user.is_staff and new_status != OrderStatus.CANCELLED:
+        return Response(
+            {'error': 'Seule l\'annulation est autorisée'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        change_status(order, new_status, request.user, serializer.validated_data.get('note', ''))
+    except InvalidTransition as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    return Response(OrderSerializer(order).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_summary(request):
+    """Résumé des commandes : nombre par statut et total dépensé"""
+    return Response(user_summary(request.user))
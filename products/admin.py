@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Supplier, Product, ProductReview, ProductImage
+from .models import Category, Supplier, Product, ProductReview, ProductImage, StockReservation
 
 
 @admin.register(Category)
@@ -62,7 +62,7 @@ class ProductAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Disponibilité', {
-            'fields': ('in_stock', 'delivery_time', 'is_active')
+            'fields': ('in_stock', 'stock_quantity', 'delivery_time', 'is_active')
         }),
         ('Dates', {
             'fields': ('created_at', 'updated_at'),
@@ -95,3 +95,12 @@ class ProductImageAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('product')
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'user', 'quantity', 'status', 'expires_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['product__name', 'user__username']
+    readonly_fields = ['product', 'user', 'quantity', 'expires_at', 'released_at', 'created_at']
+    ordering = ['-created_at']
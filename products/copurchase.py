@@ -0,0 +1,133 @@
+"""Co-occurrences produit × produit calculées par paquets avec NumPy.
+
+Chaque panier d'interactions (commande, ou journée d'un utilisateur) donne
+à chacun de ses produits le poids de l'interaction la plus forte (commande >
+panier > consultation). Deux produits d'un même panier reçoivent le produit
+de leurs poids ; la matrice creuse de co-occurrence est tenue sous forme de
+coordonnées ``(clé = i × n + j, valeur)`` triées, fusionnées paquet après
+paquet (``np.unique`` + ``np.bincount``), sans jamais matérialiser de matrice
+dense. Le score final est normalisé comme un cosinus,
+``c(i, j) / √(c(i, i) × c(j, j))``, pour ne pas recommander partout les
+produits les plus populaires.
+
+Les paniers sont limités à ``MAX_BASKET_SIZE`` produits (les plus forts) :
+le nombre de paires croît avec le carré de la taille du panier.
+"""
+import numpy as np
+
+KIND_WEIGHTS = {'view': 1.0, 'cart': 2.0, 'order': 4.0}
+MAX_BASKET_SIZE = 50
+
+
+class CooccurrenceCounter:
+    """Accumule les co-occurrences de ``item_count`` produits numérotés de 0 à n - 1"""
+
+    def __init__(self, item_count):
+        self.item_count = item_count
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.float64)
+        self.self_weights = np.zeros(item_count, dtype=np.float64)
+        self.event_count = 0
+        self.pair_count = 0
+
+    def add(self, baskets, items, weights):
+        """Ajoute un paquet d'événements de paniers complets (tableaux alignés)"""
+        baskets = np.asarray(baskets, dtype=np.int64)
+        items = np.asarray(items, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if not len(items):
+            return
+        self.event_count += len(items)
+
+        # Un produit par panier, avec son poids le plus fort ; paniers par poids décroissant
+        order = np.lexsort((-weights, items, baskets))
+        baskets, items, weights = baskets[order], items[order], weights[order]
+        first = np.ones(len(items), dtype=bool)
+        first[1:] = (baskets[1:] != baskets[:-1]) | (items[1:] != items[:-1])
+        baskets, items, weights = baskets[first], items[first], weights[first]
+        order = np.lexsort((-weights, baskets))
+        baskets, items, weights = baskets[order], items[order], weights[order]
+
+        # Rang dans le panier : au-delà de MAX_BASKET_SIZE, ignoré
+        _, starts, sizes = np.unique(baskets, return_index=True, return_counts=True)
+        rank = np.arange(len(items)) - np.repeat(starts, sizes)
+        kept = rank < MAX_BASKET_SIZE
+        baskets, items, weights = baskets[kept], items[kept], weights[kept]
+        _, starts, sizes = np.unique(baskets, return_index=True, return_counts=True)
+
+        np.add.at(self.self_weights, items, weights * weights)
+
+        # Paires (gauche, droite) de chaque panier, sans les doublons symétriques
+        element_sizes = np.repeat(sizes, sizes)
+        element_starts = np.repeat(starts, sizes)
+        left = np.repeat(np.arange(len(items)), element_sizes)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(element_sizes) - element_sizes, element_sizes)
+        right = np.repeat(element_starts, element_sizes) + offsets
+        upper = left < right
+        left, right = left[upper], right[upper]
+        if not len(left):
+            return
+        self.pair_count += len(left)
+
+        first_items = np.minimum(items[left], items[right])
+        second_items = np.maximum(items[left], items[right])
+        keys = first_items * self.item_count + second_items
+        self._merge(keys, weights[left] * weights[right])
+
+    def _merge(self, keys, values):
+        keys = np.concatenate([self.keys, keys])
+        values = np.concatenate([self.values, values])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.values = np.bincount(inverse.ravel(), weights=values)
+
+    def top_neighbors(self, limit):
+        """``{produit: [(voisin, score), ...]}``, ``limit`` voisins par score décroissant"""
+        first = self.keys // self.item_count
+        second = self.keys % self.item_count
+        norms = np.sqrt(self.self_weights[first] * self.self_weights[second])
+        scores = np.divide(self.values, norms, out=np.zeros_like(self.values), where=norms > 0)
+
+        sources = np.concatenate([first, second])
+        targets = np.concatenate([second, first])
+        scores = np.concatenate([scores, scores])
+        order = np.lexsort((-scores, sources))
+        sources, targets, scores = sources[order], targets[order], scores[order]
+
+        _, starts, sizes = np.unique(sources, return_index=True, return_counts=True)
+        rank = np.arange(len(sources)) - np.repeat(starts, sizes)
+        kept = rank < limit
+        sources, targets, scores = sources[kept], targets[kept], scores[kept]
+        if not len(sources):
+            return {}
+
+        boundaries = np.flatnonzero(np.diff(sources)) + 1
+        return {
+            int(source): list(zip(group_targets.tolist(), group_scores.round(4).tolist()))
+            for source, group_targets, group_scores in zip(
+                sources[np.r_[0, boundaries]], np.split(targets, boundaries), np.split(scores, boundaries)
+            )
+        }
+
+
+def count_baskets(rows, item_count, chunk_size=10000):
+    """Compte les co-occurrences de lignes ``(panier, produit, poids)`` triées par panier.
+
+    Les lignes sont transmises au compteur par paquets d'environ
+    ``chunk_size`` paniers complets ; la mémoire utilisée ne dépend que de
+    la taille d'un paquet et du nombre de paires distinctes.
+    """
+    counter = CooccurrenceCounter(item_count)
+    baskets, items, weights = [], [], []
+    current, basket_index = None, -1
+    for basket, item, weight in rows:
+        if basket != current:
+            if len(baskets) and basket_index % chunk_size == chunk_size - 1:
+                counter.add(baskets, items, weights)
+                baskets, items, weights = [], [], []
+            current = basket
+            basket_index += 1
+        baskets.append(basket_index)
+        items.append(item)
+        weights.append(weight)
+    counter.add(baskets, items, weights)
+    return counter
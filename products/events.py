@@ -0,0 +1,158 @@
+"""Journal des interactions produit (consultations, ajouts au panier, commandes).
+
+Les événements sont accumulés en mémoire et insérés par paquets
+(``bulk_create``) dès que ``PRODUCT_EVENT_BATCH_SIZE`` événements sont en
+attente, ou ``PRODUCT_EVENT_FLUSH_INTERVAL`` secondes après le premier
+(minuterie), dans un thread de fond : une consultation n'ajoute aucune
+écriture à la requête. Sans thread de fond (``PRODUCT_EVENTS_ASYNC = False``),
+l'intervalle n'est vérifié qu'à l'événement suivant. Les événements en attente
+sont écrits à l'arrêt du processus ; un arrêt brutal peut en perdre
+quelques-uns, ce qui est sans conséquence pour des statistiques de
+co-occurrence.
+
+Un paquet rejeté (produit supprimé entre-temps) est réécrit sans les
+événements des produits disparus.
+
+Le ``basket`` regroupe les événements considérés comme liés : les lignes
+d'une même commande, ou les consultations et ajouts au panier d'un
+utilisateur sur une journée.
+"""
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Product, ProductEvent, ProductEventKind
+
+logger = logging.getLogger(__name__)
+
+EVENT_BATCH_SIZE = getattr(settings, 'PRODUCT_EVENT_BATCH_SIZE', 200)
+EVENT_FLUSH_INTERVAL = getattr(settings, 'PRODUCT_EVENT_FLUSH_INTERVAL', 10)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='product-events')
+_lock = threading.Lock()
+_pending = []
+_oldest = None
+_timer = None
+
+
+def user_basket(user_id):
+    return f'user:{user_id}:{timezone.localdate().isoformat()}'
+
+
+def _known_product_events(events):
+    """Événements dont le produit existe encore (tous si la vérification échoue)"""
+    try:
+        known = {str(pk) for pk in Product.objects.filter(
+            id__in={event.product_id for event in events}
+        ).values_list('id', flat=True)}
+    except Exception:
+        return events
+    return [event for event in events if str(event.product_id) in known]
+
+
+def _write(events):
+    try:
+        ProductEvent.objects.bulk_create(events, batch_size=EVENT_BATCH_SIZE)
+    except IntegrityError:
+        kept = _known_product_events(events)
+        if len(kept) < len(events):
+            logger.warning("%d événements produit ignorés (produits supprimés)", len(events) - len(kept))
+            if kept:
+                _write(kept)
+            return
+        logger.exception("Écriture de %d événements produit impossible", len(events))
+    except Exception:
+        logger.exception("Écriture de %d événements produit impossible", len(events))
+
+
+def _write_in_background(events):
+    try:
+        _write(events)
+    finally:
+        connections.close_all()
+
+
+def _take_pending(force=False):
+    global _oldest, _timer
+    with _lock:
+        if not _pending:
+            return []
+        if not force and len(_pending) < EVENT_BATCH_SIZE and time.monotonic() - _oldest < EVENT_FLUSH_INTERVAL:
+            return []
+        events = _pending[:]
+        _pending.clear()
+        _oldest = None
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    return events
+
+
+def _flush_due():
+    """Minuterie : écrit le paquet incomplet dont le premier événement a expiré"""
+    events = _take_pending(force=True)
+    if events:
+        _executor.submit(_write_in_background, events)
+
+
+def record_events(events):
+    """Ajoute des ``ProductEvent`` non enregistrés à la file d'écriture"""
+    global _oldest, _timer
+    background = getattr(settings, 'PRODUCT_EVENTS_ASYNC', True)
+    with _lock:
+        if not _pending:
+            _oldest = time.monotonic()
+            if background:
+                _timer = threading.Timer(EVENT_FLUSH_INTERVAL, _flush_due)
+                _timer.daemon = True
+                _timer.start()
+        _pending.extend(events)
+
+    ready = _take_pending()
+    if not ready:
+        return
+    if background:
+        _executor.submit(_write_in_background, ready)
+    else:
+        _write(ready)
+
+
+def flush_events():
+    """Écrit immédiatement les événements en attente"""
+    events = _take_pending(force=True)
+    if events:
+        _write(events)
+
+
+atexit.register(flush_events)
+
+
+def record_view(user, product_id):
+    if user.is_authenticated:
+        record_events([ProductEvent(
+            kind=ProductEventKind.VIEW, product_id=product_id, user_id=user.pk, basket=user_basket(user.pk)
+        )])
+
+
+def record_cart_add(user, product_id):
+    record_events([ProductEvent(
+        kind=ProductEventKind.CART, product_id=product_id, user_id=user.pk, basket=user_basket(user.pk)
+    )])
+
+
+def record_order(order):
+    """Une ligne par produit commandé, une fois la commande validée"""
+    events = [
+        ProductEvent(
+            kind=ProductEventKind.ORDER, product_id=line['product_id'], user_id=order.user_id,
+            basket=f'order:{order.pk}',
+        )
+        for line in order.lines
+    ]
+    transaction.on_commit(lambda: record_events(events))
@@ -0,0 +1,85 @@
+"""Facettes du catalogue : catégorie, fournisseur, unité et tranche de prix.
+
+Toutes les facettes sont tirées d'une seule requête groupée sur la
+combinaison ``(catégorie, fournisseur, unité, tranche de prix)`` ; chaque
+groupe est ensuite ajouté au décompte de ses quatre valeurs. Le nombre de
+groupes reste faible devant celui des produits.
+
+La tranche est calculée dans la requête (``CASE``) sur les bases SQL ;
+djongo ne traduisant pas ``CASE``, le prix y est groupé tel quel et la
+tranche calculée ensuite.
+"""
+import bisect
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import Product
+
+# Bornes des tranches de prix (FCFA) : [0, 1000[, [1000, 5000[, ..., [500000, +∞[
+PRICE_BUCKETS = getattr(settings, 'PRODUCT_PRICE_BUCKETS', (1000, 5000, 10000, 50000, 100000, 500000))
+
+GROUP_FIELDS = ('category_id', 'category__name', 'supplier_id', 'supplier__company_name', 'unit')
+
+
+def price_bucket(price):
+    return bisect.bisect_right(PRICE_BUCKETS, price)
+
+
+def _price_bucket_expression():
+    return Case(
+        *[When(price__lt=bound, then=Value(index)) for index, bound in enumerate(PRICE_BUCKETS)],
+        default=Value(len(PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def _grouped_rows(queryset):
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == 'djongo':
+        for row in queryset.values(*GROUP_FIELDS, 'price').annotate(count=Count('pk')):
+            row['bucket'] = price_bucket(row.pop('price'))
+            yield row
+        return
+    yield from queryset.annotate(bucket=_price_bucket_expression()).values(
+        *GROUP_FIELDS, 'bucket'
+    ).annotate(count=Count('pk'))
+
+
+def _named_counts(counter):
+    return [
+        {'id': pk, 'name': name, 'count': count}
+        for (pk, name), count in sorted(counter.items(), key=lambda item: (-item[1], item[0][1]))
+    ]
+
+
+def catalog_facets(queryset):
+    """Nombre de produits de ``queryset`` par catégorie, fournisseur, unité et tranche de prix"""
+    categories, suppliers, units, buckets = Counter(), Counter(), Counter(), Counter()
+    total = 0
+    for row in _grouped_rows(queryset):
+        count = row['count']
+        total += count
+        categories[(row['category_id'], row['category__name'])] += count
+        suppliers[(row['supplier_id'], row['supplier__company_name'])] += count
+        units[row['unit']] += count
+        buckets[row['bucket']] += count
+
+    unit_labels = dict(Product.UNIT_CHOICES)
+    bounds = (0, *PRICE_BUCKETS, None)
+    return {
+        'count': total,
+        'category': _named_counts(categories),
+        'supplier': _named_counts(suppliers),
+        'unit': [
+            {'value': unit, 'label': unit_labels.get(unit, unit), 'count': count}
+            for unit, count in sorted(units.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'price': [
+            {'min': bounds[index], 'max': bounds[index + 1], 'count': buckets[index]}
+            for index in range(len(PRICE_BUCKETS) + 1)
+            if buckets[index]
+        ],
+    }
@@ -0,0 +1,156 @@
+"""Gestion du stock par comparaison-échange, sans verrou de ligne.
+
+``Product.stock_quantity`` représente la quantité disponible. Chaque retrait
+est une mise à jour conditionnelle ``UPDATE ... SET stock_quantity =
+stock_quantity - n WHERE stock_quantity >= n`` : si aucune ligne n'est
+modifiée, le stock était insuffisant et rien n'a été retiré. Les
+réservations retirent la quantité immédiatement et la restituent à la
+libération ou à l'expiration (balayage par lots).
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from btpconnect.versioning import bump_collection_version
+
+from .models import Product, StockReservation, ReservationStatus
+
+RESERVATION_TTL = timedelta(minutes=getattr(settings, 'STOCK_RESERVATION_TTL_MINUTES', 15))
+SWEEP_BATCH_SIZE = 500
+
+
+class InsufficientStock(Exception):
+    """Stock disponible inférieur à la quantité demandée"""
+
+    def __init__(self, product_id, quantity):
+        self.product_id = product_id
+        self.quantity = quantity
+        super().__init__(f"Stock insuffisant pour {product_id} ({quantity} demandés)")
+
+
+class ReservationError(Exception):
+    """Réservation inexistante, expirée ou déjà utilisée"""
+
+
+def _stock_changed(product_ids):
+    """Met à jour ``in_stock`` et invalide les ETags du catalogue après commit"""
+    Product.objects.filter(pk__in=product_ids, stock_quantity=0).update(in_stock=False)
+    Product.objects.filter(pk__in=product_ids, stock_quantity__gt=0, in_stock=False).update(in_stock=True)
+    transaction.on_commit(lambda: bump_collection_version('products'))
+
+
+def take_stock(quantities):
+    """Retire ``{product_id: quantité}`` du stock ; tout ou rien.
+
+    Lève ``InsufficientStock`` au premier produit insuffisant : l'appelant
+    doit être dans une transaction pour annuler les retraits déjà faits.
+    """
+    with transaction.atomic():
+        for product_id, quantity in quantities.items():
+            updated = Product.objects.filter(
+                pk=product_id, stock_quantity__gte=quantity
+            ).update(stock_quantity=F('stock_quantity') - quantity)
+            if not updated:
+                raise InsufficientStock(product_id, quantity)
+        if quantities:
+            _stock_changed(list(quantities))
+
+
+def restore_stock(quantities):
+    """Remet ``{product_id: quantité}`` en stock"""
+    for product_id, quantity in quantities.items():
+        Product.objects.filter(pk=product_id, stock_quantity__isnull=False).update(
+            stock_quantity=F('stock_quantity') + quantity
+        )
+    if quantities:
+        _stock_changed(list(quantities))
+
+
+def reserve(product, quantity, user=None, ttl=None):
+    """Retient ``quantity`` unités de ``product`` pendant ``ttl``"""
+    if product.stock_quantity is None:
+        raise ReservationError("Le stock de ce produit n'est pas suivi.")
+
+    with transaction.atomic():
+        take_stock({product.pk: quantity})
+        return StockReservation.objects.create(
+            product=product,
+            user=user,
+            quantity=quantity,
+            expires_at=timezone.now() + (ttl or RESERVATION_TTL),
+        )
+
+
+def release(reservation, status=ReservationStatus.RELEASED):
+    """Libère une réservation active. Renvoie ``False`` si elle ne l'était plus"""
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = StockReservation.objects.filter(
+            pk=reservation.pk, status=ReservationStatus.ACTIVE
+        ).update(status=status, released_at=now)
+        if claimed:
+            restore_stock({reservation.product_id: reservation.quantity})
+    return bool(claimed)
+
+
+def consume(reservation_ids, user):
+    """Marque des réservations actives comme utilisées par une commande.
+
+    Le stock ayant déjà été retiré, seule la réservation change de statut ;
+    ``ReservationError`` est levée si l'une d'elles n'est plus active.
+    Renvoie ``{product_id: quantité}``.
+    """
+    reservation_ids = list(dict.fromkeys(reservation_ids))
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = StockReservation.objects.filter(
+            pk__in=reservation_ids, user=user,
+            status=ReservationStatus.ACTIVE, expires_at__gt=now
+        )
+        rows = list(queryset.values_list('product_id', 'quantity'))
+        claimed = queryset.update(status=ReservationStatus.CONSUMED, released_at=now)
+        if claimed != len(reservation_ids) or len(rows) != claimed:
+            raise ReservationError("Réservation introuvable, expirée ou déjà utilisée.")
+
+    quantities = Counter()
+    for product_id, quantity in rows:
+        quantities[product_id] += quantity
+    return dict(quantities)
+
+
+def release_expired(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """Restitue le stock des réservations expirées, par lots. Renvoie le nombre libéré.
+
+    Chaque lot est réclamé par une mise à jour conditionnelle (statut encore
+    actif) horodatée : seules les lignes portant cet horodatage sont
+    restituées, même si une commande ou un autre balayage s'exécute en
+    parallèle.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        batch = list(
+            StockReservation.objects.filter(
+                status=ReservationStatus.ACTIVE, expires_at__lte=now
+            ).order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+
+        sweep_time = timezone.now()
+        with transaction.atomic():
+            StockReservation.objects.filter(
+                pk__in=batch, status=ReservationStatus.ACTIVE
+            ).update(status=ReservationStatus.EXPIRED, released_at=sweep_time)
+            quantities = Counter()
+            for product_id, quantity in StockReservation.objects.filter(
+                pk__in=batch, status=ReservationStatus.EXPIRED, released_at=sweep_time
+            ).values_list('product_id', 'quantity'):
+                quantities[product_id] += quantity
+                released += 1
+            restore_stock(quantities)
+    return released
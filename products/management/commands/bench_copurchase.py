@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from products.copurchase import CooccurrenceCounter, KIND_WEIGHTS
+
+
+class Command(BaseCommand):
+    help = 'Calcul des co-occurrences sur un journal synthétique (sans base de données)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1_000_000, help="Nombre d'interactions")
+        parser.add_argument('--products', type=int, default=20_000, help='Taille du catalogue')
+        parser.add_argument('--basket-size', type=float, default=5, help='Interactions par panier en moyenne')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Paniers traités par paquet')
+        parser.add_argument('--limit', type=int, default=10, help='Produits associés conservés par produit')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        event_count, product_count = options['events'], options['products']
+
+        # Popularité en loi de puissance (quelques produits très consultés), paniers triés
+        popularity = 1 / np.arange(1, product_count + 1) ** 1.1
+        items = rng.choice(product_count, size=event_count, p=popularity / popularity.sum())
+        baskets = np.sort(rng.integers(0, int(event_count / options['basket_size']), size=event_count))
+        weights = rng.choice(list(KIND_WEIGHTS.values()), size=event_count, p=[0.7, 0.2, 0.1])
+
+        start = time.perf_counter()
+        counter = CooccurrenceCounter(product_count)
+        chunk_size = options['chunk_size']
+        bounds = np.searchsorted(baskets, np.arange(0, baskets[-1] + chunk_size + 1, chunk_size))
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            counter.add(baskets[low:high], items[low:high], weights[low:high])
+        counted = time.perf_counter()
+        neighbors = counter.top_neighbors(options['limit'])
+        ranked = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{event_count} interactions, {product_count} produits : '
+            f'{counter.pair_count} paires ({len(counter.keys)} distinctes) en {counted - start:.2f} s, '
+            f'{len(neighbors)} listes de voisins en {ranked - counted:.2f} s'
+        ))
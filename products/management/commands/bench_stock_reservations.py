@@ -0,0 +1,105 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Barrier
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Sum
+
+from products.inventory import InsufficientStock, release_expired, reserve
+from products.models import Category, Supplier, Product, StockReservation, ReservationStatus
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_reservations'
+
+
+class Command(BaseCommand):
+    help = 'Réservations concurrentes sur un même produit : vérifie l\'absence de survente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservers', type=int, default=100, help='Nombre de réservations simultanées')
+        parser.add_argument('--stock', type=int, default=60, help='Stock initial du produit')
+        parser.add_argument('--quantity', type=int, default=1, help='Quantité par réservation')
+
+    def handle(self, *args, **options):
+        self._cleanup()
+        product = self._setup(options)
+        try:
+            self._run(product, options)
+        finally:
+            self._cleanup()
+
+    def _setup(self, options):
+        supplier_user = User.objects.create_user(f'{BENCH_PREFIX}_supplier', password=None)
+        supplier = Supplier.objects.create(
+            user=supplier_user, company_name='Bench', location='Dakar',
+            phone='0', email='bench@example.com'
+        )
+        category = Category.objects.create(name=f'{BENCH_PREFIX}_category')
+        return Product.objects.create(
+            name=f'{BENCH_PREFIX}_ciment', category=category, supplier=supplier,
+            price=5000, unit='tonne', description='Benchmark', delivery_time='24h',
+            stock_quantity=options['stock']
+        )
+
+    def _cleanup(self):
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        Category.objects.filter(name=f'{BENCH_PREFIX}_category').delete()
+
+    def _run(self, product, options):
+        reservers = options['reservers']
+        barrier = Barrier(reservers)
+
+        def attempt(_):
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                reserve(product, options['quantity'], ttl=timedelta(seconds=-1))
+                outcome = 'reserved'
+            except InsufficientStock:
+                outcome = 'refused'
+            except Exception as exc:
+                outcome = f'error: {exc.__class__.__name__}'
+            finally:
+                connections.close_all()
+            return outcome, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=reservers) as executor:
+            results = list(executor.map(attempt, range(reservers)))
+        elapsed = time.perf_counter() - start
+
+        outcomes = [outcome for outcome, _ in results]
+        reserved = outcomes.count('reserved')
+        refused = outcomes.count('refused')
+        errors = len(outcomes) - reserved - refused
+
+        product.refresh_from_db(fields=['stock_quantity'])
+        held = StockReservation.objects.filter(
+            product=product, status=ReservationStatus.ACTIVE
+        ).aggregate(total=Sum('quantity'))['total'] or 0
+
+        self.stdout.write(f'{reservers} réservations simultanées en {elapsed:.2f} s')
+        self.stdout.write(f'Acceptées : {reserved}, refusées : {refused}, erreurs : {errors}')
+        self.stdout.write(f'Stock restant : {product.stock_quantity}, quantité réservée : {held}')
+
+        consistent = (
+            product.stock_quantity >= 0
+            and product.stock_quantity + held == options['stock']
+            and held == reserved * options['quantity']
+        )
+        if not consistent:
+            self.stdout.write(self.style.ERROR('Survente ou stock incohérent'))
+            return
+
+        # Les réservations du test sont créées déjà expirées : le balayage doit tout restituer
+        released = release_expired()
+        product.refresh_from_db(fields=['stock_quantity'])
+        self.stdout.write(f'Balayage : {released} réservations libérées, stock {product.stock_quantity}')
+        if product.stock_quantity == options['stock']:
+            self.stdout.write(self.style.SUCCESS('Aucune survente, stock intégralement restitué'))
+        else:
+            self.stdout.write(self.style.ERROR('Stock non restitué après balayage'))
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from products.copurchase import KIND_WEIGHTS, count_baskets
+from products.models import Product, ProductEvent, ProductNeighbors
+
+WRITE_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Calcule les produits consultés ou achetés ensemble à partir du journal des interactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180, help="Ancienneté maximale des interactions")
+        parser.add_argument('--limit', type=int, default=10, help='Produits associés conservés par produit')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Paniers traités par paquet')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        product_ids = list(Product.objects.order_by().values_list('id', flat=True))
+        product_index = {pk: index for index, pk in enumerate(product_ids)}
+        events = ProductEvent.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=options['days'])
+        ).order_by('basket').values_list('basket', 'product_id', 'kind').iterator(chunk_size=5000)
+        rows = (
+            (basket, product_index[product_id], KIND_WEIGHTS[kind])
+            for basket, product_id, kind in events
+            if product_id in product_index
+        )
+        counter = count_baskets(rows, len(product_ids), chunk_size=options['chunk_size'])
+        neighbors = counter.top_neighbors(options['limit'])
+        counted = time.perf_counter()
+
+        with transaction.atomic():
+            ProductNeighbors.objects.all().delete()
+            ProductNeighbors.objects.bulk_create([
+                ProductNeighbors(
+                    product_id=product_ids[source],
+                    neighbors=[[str(product_ids[target]), score] for target, score in targets],
+                )
+                for source, targets in neighbors.items()
+            ], batch_size=WRITE_BATCH_SIZE)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{counter.event_count} interactions, {counter.pair_count} paires ({len(counter.keys)} distinctes), '
+            f'{len(neighbors)} produits associés : calcul {counted - start:.1f} s, '
+            f'écriture {time.perf_counter() - counted:.1f} s'
+        ))
@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from btpconnect.images import RENDITION_FIELDS, render_for, save_renditions
+
+
+class Command(BaseCommand):
+    help = 'Génère en parallèle les déclinaisons manquantes ou obsolètes des images existantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processus de rendu')
+        parser.add_argument('--force', action='store_true', help='Régénérer aussi les déclinaisons à jour')
+
+    def handle(self, *args, **options):
+        pending = []
+        for model, (image_field, renditions_field) in RENDITION_FIELDS.items():
+            rows = model._base_manager.exclude(**{image_field: ''}).exclude(
+                **{f'{image_field}__isnull': True}
+            ).values_list('pk', image_field, renditions_field).iterator()
+            pending += [
+                (model, pk, name) for pk, name, renditions in rows
+                if options['force'] or (renditions or {}).get('source') != name
+            ]
+        if not pending:
+            self.stdout.write('Aucune image à traiter')
+            return
+
+        # Les processus de rendu n'accèdent pas à la base : ne pas leur léguer de connexion
+        connections.close_all()
+        start = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            results = pool.map(
+                render_for, [model._meta.label for model, _, _ in pending], [name for _, _, name in pending],
+                chunksize=4,
+            )
+            for (model, pk, name), (renditions, error) in zip(pending, results):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{model._meta.label} {pk} ({name}) : {error}')
+                    continue
+                save_renditions(model, pk, name, renditions)
+                done += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} images traitées en {time.perf_counter() - start:.1f} s, {failed} en échec'
+        ))
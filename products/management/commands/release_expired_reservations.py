@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.inventory import SWEEP_BATCH_SIZE, release_expired
+
+
+class Command(BaseCommand):
+    help = 'Libère les réservations de stock expirées et restitue les quantités'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+                            help='Nombre de réservations traitées par transaction')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Relance le balayage toutes les N secondes (0 = une seule fois)')
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{released} réservations expirées libérées'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
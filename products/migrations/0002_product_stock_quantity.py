@@ -0,0 +1,18 @@
+# Generated by Django 4.1.4 on 2026-10-18 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_quantity',
+            field=models.PositiveIntegerField(blank=True, help_text="Laisser vide si le stock n'est pas suivi", null=True, verbose_name='Quantité en stock'),
+        ),
+    ]
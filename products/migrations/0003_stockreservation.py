@@ -0,0 +1,39 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0002_product_stock_quantity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantité')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('consumed', 'Utilisée'), ('released', 'Libérée'), ('expired', 'Expirée')], default='active', max_length=20, verbose_name='Statut')),
+                ('expires_at', models.DateTimeField(verbose_name='Expire le')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Libérée le')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Réservation de stock',
+                'verbose_name_plural': 'Réservations de stock',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockreservation',
+            index=models.Index(fields=['status', 'expires_at'], name='products_st_status_657db7_idx'),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from btpconnect.db.migration_operations import gin_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_stockreservation'),
+    ]
+
+    operations = [
+        gin_index('products_product', 'specifications'),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from btpconnect.db.migration_operations import index_attributes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productimage_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=50, verbose_name='Champ')),
+                ('key', models.CharField(blank=True, max_length=100, verbose_name='Clé')),
+                ('value', models.CharField(max_length=255, verbose_name='Valeur')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Attribut de produit',
+                'verbose_name_plural': 'Attributs de produits',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productattribute',
+            index=models.Index(fields=['field', 'key', 'value'], name='products_pr_field_a07fd6_idx'),
+        ),
+        index_attributes('products', 'Product', 'ProductAttribute', 'product', ['specifications']),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0006_productattribute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductNeighbors',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='products.product')),
+                ('neighbors', models.JSONField(default=list, verbose_name='Voisins')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Produits associés',
+                'verbose_name_plural': 'Produits associés',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('view', 'Consultation'), ('cart', 'Ajout au panier'), ('order', 'Commande')], max_length=10, verbose_name='Type')),
+                ('basket', models.CharField(max_length=80, verbose_name="Panier d'interactions")),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='products.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='product_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Interaction produit',
+                'verbose_name_plural': 'Interactions produits',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productevent',
+            index=models.Index(fields=['created_at'], name='products_pr_created_da85bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productevent',
+            index=models.Index(fields=['basket'], name='products_pr_basket_732959_idx'),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import uuid
 
+from btpconnect.db.attributes import AttributeEntry
+
 User = get_user_model()
 
 
@@ -27,6 +30,14 @@ class Supplier(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='supplier_profile')
     company_name = models.CharField(max_length=200, verbose_name="Nom de l'entreprise")
     location = models.CharField(max_length=100, verbose_name="Localisation")
+    # Coordonnées : géocodées depuis la localisation si absentes (btpconnect.geo)
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)], verbose_name="Latitude"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)], verbose_name="Longitude"
+    )
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     phone = models.CharField(max_length=20, verbose_name="Téléphone")
     email = models.EmailField(verbose_name="Email")
     description = models.TextField(verbose_name="Description")
@@ -74,6 +85,12 @@ class Product(models.Model):
     image = models.CharField(max_length=500, blank=True, verbose_name="Image principale")
     images = models.JSONField(default=list, verbose_name="Galerie d'images")
     in_stock = models.BooleanField(default=True, verbose_name="En stock")
+    stock_quantity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Quantité en stock",
+        help_text="Laisser vide si le stock n'est pas suivi"
+    )
     delivery_time = models.CharField(max_length=50, verbose_name="Délai de livraison")
     min_order = models.PositiveIntegerField(default=1, verbose_name="Commande minimum")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
@@ -89,6 +106,21 @@ class Product(models.Model):
         return f"{self.name} - {self.supplier.company_name}"
 
 
+class ProductAttribute(AttributeEntry):
+    """Index des spécifications des produits (voir btpconnect.db.attributes)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attributes')
+
+    class Meta:
+        verbose_name = "Attribut de produit"
+        verbose_name_plural = "Attributs de produits"
+        indexes = [
+            models.Index(fields=['field', 'key', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+
 class ProductReview(models.Model):
     """Avis sur les produits"""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
@@ -117,6 +149,8 @@ class ProductImage(models.Model):
     image = models.ImageField(upload_to='products/', verbose_name="Image")
     alt_text = models.CharField(max_length=200, blank=True, verbose_name="Texte alternatif")
     order = models.PositiveIntegerField(default=0, verbose_name="Ordre")
+    # Déclinaisons redimensionnées (btpconnect.images)
+    renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -126,3 +160,95 @@ class ProductImage(models.Model):
 
     def __str__(self):
         return f"Image de {self.product.name}"
+
+
+class ReservationStatus(models.TextChoices):
+    """Statuts possibles d'une réservation de stock"""
+    ACTIVE = 'active', 'Active'
+    CONSUMED = 'consumed', 'Utilisée'
+    RELEASED = 'released', 'Libérée'
+    EXPIRED = 'expired', 'Expirée'
+
+
+class StockReservation(models.Model):
+    """Quantité de stock retenue pour un utilisateur pendant une durée limitée.
+
+    La quantité est retirée de ``Product.stock_quantity`` à la réservation et
+    y est restituée à la libération ou à l'expiration.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='stock_reservations'
+    )
+    quantity = models.PositiveIntegerField(verbose_name="Quantité")
+    status = models.CharField(
+        max_length=20,
+        choices=ReservationStatus.choices,
+        default=ReservationStatus.ACTIVE,
+        verbose_name="Statut"
+    )
+    expires_at = models.DateTimeField(verbose_name="Expire le")
+    released_at = models.DateTimeField(null=True, blank=True, verbose_name="Libérée le")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Réservation de stock"
+        verbose_name_plural = "Réservations de stock"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} ({self.get_status_display()})"
+
+
+class ProductEventKind(models.TextChoices):
+    """Interactions enregistrées pour les recommandations"""
+    VIEW = 'view', 'Consultation'
+    CART = 'cart', 'Ajout au panier'
+    ORDER = 'order', 'Commande'
+
+
+class ProductEvent(models.Model):
+    """Journal des interactions (voir products.events)"""
+    kind = models.CharField(max_length=10, choices=ProductEventKind.choices, verbose_name="Type")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='events')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='product_events')
+    # Groupe d'achats : une commande, ou les interactions d'un utilisateur sur une journée
+    basket = models.CharField(max_length=80, verbose_name="Panier d'interactions")
+    # Heure de l'interaction, et non de l'insertion différée
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Interaction produit"
+        verbose_name_plural = "Interactions produits"
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['basket']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.product_id} ({self.basket})"
+
+
+class ProductNeighbors(models.Model):
+    """Produits le plus souvent consultés ou achetés avec un produit (``manage.py build_copurchase``)"""
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='neighbors'
+    )
+    # [["<uuid>", score], ...] par score décroissant
+    neighbors = models.JSONField(default=list, verbose_name="Voisins")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Produits associés"
+        verbose_name_plural = "Produits associés"
+
+    def __str__(self):
+        return f"{len(self.neighbors)} produits associés à {self.product_id}"
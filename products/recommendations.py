@@ -0,0 +1,43 @@
+"""Produits similaires : catégorie, fournisseur, unité, tranche de prix et texte.
+
+Voir ``btpconnect.similarity`` pour le calcul et la mise à jour de l'index.
+"""
+from btpconnect.similarity import Band, Categorical, SimilarityIndex, Text, tokenize
+
+from .facets import PRICE_BUCKETS
+from .models import Product
+
+
+class ProductSimilarity(SimilarityIndex):
+    model = Product
+    collection = 'products'
+    blocks = {
+        'category': Categorical(0.3),
+        'supplier': Categorical(0.1),
+        'unit': Categorical(0.1),
+        'price': Band(0.15, PRICE_BUCKETS),
+        # Nom, description et spécifications
+        'text': Text(0.35),
+    }
+
+    def get_queryset(self):
+        return Product.objects.filter(is_active=True)
+
+    def get_values(self):
+        return ['category_id', 'supplier_id', 'unit', 'price', 'name', 'description', 'specifications']
+
+    def get_features(self, row):
+        # Le nom compte double face à la description
+        tokens = tokenize(row['name']) * 2 + tokenize(row['description'])
+        for key, value in (row['specifications'] or {}).items():
+            tokens += tokenize(f'{key} {value}')
+        return {
+            'category': row['category_id'],
+            'supplier': row['supplier_id'],
+            'unit': row['unit'],
+            'price': row['price'],
+            'text': tokens,
+        }
+
+
+product_similarity = ProductSimilarity()
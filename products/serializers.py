@@ -1,5 +1,12 @@
 from rest_framework import serializers
-from .models import Category, Supplier, Product, ProductReview, ProductImage
+from django.db.models import Avg, Count
+
+from btpconnect.fieldsets import SparseFieldsetSerializerMixin
+from btpconnect.geo import clear_stale_coordinates
+from btpconnect.images import srcset
+from jobs.serializers import BulkDeleteIdsField
+
+from .models import Category, Supplier, Product, ProductReview, ProductImage, StockReservation
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -23,12 +30,16 @@ class SupplierSerializer(serializers.ModelSerializer):
     class Meta:
         model = Supplier
         fields = [
-            'id', 'company_name', 'location', 'phone', 'email', 
+            'id', 'company_name', 'location', 'latitude', 'longitude', 'phone', 'email',
             'description', 'rating', 'certifications', 'products_count',
             'average_rating', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'user']
 
+    def update(self, instance, validated_data):
+        clear_stale_coordinates(instance, validated_data, ('location',))
+        return super().update(instance, validated_data)
+
     def get_products_count(self, obj):
         return obj.products.filter(is_active=True).count()
 
@@ -41,11 +52,17 @@ class SupplierSerializer(serializers.ModelSerializer):
 
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer pour les images de produits"""
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'order', 'created_at']
+        fields = ['id', 'image', 'srcset', 'alt_text', 'order', 'created_at']
         read_only_fields = ['created_at']
 
+    def get_srcset(self, obj):
+        """``{'webp': 'url 320w, ...', 'jpeg': ...}``, vide tant que les déclinaisons sont en cours"""
+        return srcset(obj.renditions, obj.image.storage, self.context.get('request'))
+
 
 class ProductReviewSerializer(serializers.ModelSerializer):
     """Serializer pour les avis produits"""
@@ -64,7 +81,7 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer pour la liste des produits (vue simplifiée)"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     supplier_name = serializers.CharField(source='supplier.company_name', read_only=True)
@@ -79,6 +96,12 @@ class ProductListSerializer(serializers.ModelSerializer):
             'price', 'unit', 'image', 'in_stock', 'delivery_time', 
             'average_rating', 'reviews_count', 'created_at'
         ]
+        field_dependencies = {'average_rating': (), 'reviews_count': ()}
+        compiled_annotations = {
+            # Pas de COALESCE : djongo ne sait pas le traduire
+            'average_rating': (Avg('reviews__rating'), lambda value: round(value or 0.0, 1)),
+            'reviews_count': Count('reviews', distinct=True),
+        }
 
     def get_average_rating(self, obj):
         reviews = obj.reviews.all()
@@ -90,7 +113,7 @@ class ProductListSerializer(serializers.ModelSerializer):
         return obj.reviews.count()
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer détaillé pour un produit"""
     category = CategorySerializer(read_only=True)
     supplier = SupplierSerializer(read_only=True)
@@ -108,11 +131,13 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'category', 'category_id', 'supplier', 'supplier_id',
             'price', 'unit', 'description', 'specifications', 'image', 'images',
-            'in_stock', 'delivery_time', 'min_order', 'is_active',
+            'in_stock', 'stock_quantity', 'delivery_time', 'min_order', 'is_active',
             'reviews', 'additional_images', 'average_rating', 'reviews_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        expandable_fields = ['category', 'supplier', 'reviews', 'additional_images']
+        field_dependencies = {'average_rating': (), 'reviews_count': ()}
 
     def get_average_rating(self, obj):
         reviews = obj.reviews.all()
@@ -144,8 +169,8 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'name', 'category', 'supplier', 'price', 'unit', 'description',
-            'specifications', 'image', 'images', 'in_stock', 'delivery_time',
-            'min_order', 'is_active'
+            'specifications', 'image', 'images', 'in_stock', 'stock_quantity',
+            'delivery_time', 'min_order', 'is_active'
         ]
 
     def validate_price(self, value):
@@ -156,4 +181,28 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     def validate_min_order(self, value):
         if value <= 0:
             raise serializers.ValidationError("La commande minimum doit être supérieure à 0.")
-        return value
\ No newline at end of file
+        return value
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    """Serializer pour les réservations de stock"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = [
+            'id', 'product', 'quantity', 'status', 'status_display',
+            'expires_at', 'released_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class StockReservationCreateSerializer(serializers.Serializer):
+    """Demande de réservation de stock"""
+    quantity = serializers.IntegerField(min_value=1)
+    ttl_minutes = serializers.IntegerField(min_value=1, max_value=120, required=False)
+
+
+class ProductBulkDeleteSerializer(serializers.Serializer):
+    """Produits à supprimer en lot"""
+    product_ids = BulkDeleteIdsField()
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from btpconnect.db.attributes import register_attribute_index
+from btpconnect.geo import register_geocoding
+from btpconnect.images import register_renditions, renditions_updated
+from btpconnect.versioning import bump_collection_version
+from jobs.signals import post_bulk_delete
+from .models import Category, Supplier, Product, ProductReview, ProductImage, ProductAttribute
+
+PRODUCTS_COLLECTION = 'products'
+
+
+def invalidate_products(sender, **kwargs):
+    """Invalide les ETags et caches dépendant du catalogue"""
+    transaction.on_commit(lambda: bump_collection_version(PRODUCTS_COLLECTION))
+
+
+for model in (Category, Supplier, Product, ProductReview, ProductImage):
+    post_save.connect(invalidate_products, sender=model)
+    post_delete.connect(invalidate_products, sender=model)
+    post_bulk_delete.connect(invalidate_products, sender=model)
+
+register_renditions(ProductImage, 'image', 'renditions')
+renditions_updated.connect(invalidate_products, sender=ProductImage)
+register_attribute_index(Product, ProductAttribute, ('specifications',))
+register_geocoding(Supplier, 'location')
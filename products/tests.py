@@ -1,3 +1,68 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import Category, Product, Supplier
+
+User = get_user_model()
+
+
+class ProductTestCase(APITestCase):
+    """Fournisseur connecté, catégorie et fabrique de produits"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('fournisseur', 'f@example.com', 'pw', user_type='SUPPLIER')
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Ciment')
+        self.supplier = Supplier.objects.create(
+            user=self.user, company_name='Sococim', location='Rufisque', phone='1', email='s@example.com'
+        )
+
+    def create_product(self, **kwargs):
+        data = {
+            'name': 'Ciment', 'category': self.category, 'supplier': self.supplier,
+            'price': 5000, 'unit': 'sac', 'description': 'd',
+        }
+        data.update(kwargs)
+        return Product.objects.create(**data)
+
+
+class ProductSearchTests(ProductTestCase):
+
+    def test_results_are_the_newest_products(self):
+        now = timezone.now()
+        for index in range(30):
+            product = self.create_product(name=f'Ciment {index}')
+            # Ordre d'insertion différent de l'ordre chronologique
+            Product.objects.filter(pk=product.pk).update(
+                created_at=now - timedelta(days=(index * 7) % 30)
+            )
+        expected = list(Product.objects.order_by('-created_at').values_list('name', flat=True)[:20])
+
+        response = self.client.get('/api/products/search/', {'q': 'ciment'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['name'] for product in response.data['results']], expected)
+
+
+class ProductSpecificationFilterTests(ProductTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.text_surface = self.create_product(name='Dalle A', specifications={'surface': '120', 'portante': True})
+        self.number_surface = self.create_product(name='Dalle B', specifications={'surface': 120, 'portante': False})
+        self.listed_surface = self.create_product(name='Dalle C', specifications={'surface': [80, '120']})
+        self.create_product(name='Dalle D', specifications={'surface': 90})
+
+    def filter_names(self, *specs):
+        response = self.client.get('/api/products/', {'spec': list(specs)})
+        self.assertEqual(response.status_code, 200)
+        return sorted(product['name'] for product in response.data)
+
+    def test_number_and_text_values_match_alike(self):
+        self.assertEqual(self.filter_names('surface:120'), ['Dalle A', 'Dalle B', 'Dalle C'])
+        self.assertEqual(self.filter_names('surface:"120"'), ['Dalle A', 'Dalle B', 'Dalle C'])
+
+    def test_all_specifications_must_match(self):
+        self.assertEqual(self.filter_names('surface:120', 'portante:true'), ['Dalle A'])
@@ -16,7 +16,10 @@ urlpatterns = [
     path('products/', views.ProductListCreateView.as_view(), name='product-list-create'),
     path('products/<uuid:pk>/', views.ProductDetailView.as_view(), name='product-detail'),
     path('products/search/', views.product_search, name='product-search'),
+    path('products/export/', views.ProductExportView.as_view(), name='product-export'),
+    path('products/facets/', views.ProductFacetView.as_view(), name='product-facets'),
     path('products/<uuid:product_id>/recommendations/', views.product_recommendations, name='product-recommendations'),
+    path('products/<uuid:product_id>/also-bought/', views.product_also_bought, name='product-also-bought'),
     
     # ==================== PRODUCT REVIEWS ====================
     path('products/<uuid:product_id>/reviews/', views.ProductReviewListCreateView.as_view(), name='product-review-list-create'),
@@ -26,6 +29,10 @@ urlpatterns = [
     path('products/<uuid:product_id>/images/', views.ProductImageListCreateView.as_view(), name='product-image-list-create'),
     path('images/<int:pk>/', views.ProductImageDetailView.as_view(), name='product-image-detail'),
     
+    # ==================== STOCK RESERVATIONS ====================
+    path('products/<uuid:product_id>/reserve/', views.product_reserve, name='product-reserve'),
+    path('reservations/<uuid:pk>/', views.StockReservationDetailView.as_view(), name='stock-reservation-detail'),
+    
     # ==================== STATISTICS ====================
     path('statistics/', views.product_statistics, name='product-statistics'),
     
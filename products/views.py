@@ -1,3 +1,5 @@
+import uuid
+
 from rest_framework import generics, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -5,11 +7,31 @@ from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnl
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
 from django.db.models import Q, Avg, Count
-from .models import Category, Supplier, Product, ProductReview, ProductImage
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from btpconnect.compiled import CompiledListMixin, CompiledExportMixin, get_compiled
+from btpconnect.conditional import ConditionalListMixin, ConditionalDetailMixin, RESPONSE_CACHE_TIMEOUT
+from btpconnect.db.attributes import filter_attributes
+from btpconnect.db.lookups import parse_key_values
+from btpconnect.facets import FacetListMixin
+from btpconnect.fieldsets import SparseFieldsetMixin
+from btpconnect.geo import filter_near, parse_near
+from jobs.deletion import create_deletion_job
+from .events import record_view
+from .facets import catalog_facets
+from .inventory import InsufficientStock, ReservationError, reserve, release
+from .models import (
+    Category, Supplier, Product, ProductReview, ProductImage, StockReservation, ProductNeighbors
+)
+from .recommendations import product_similarity
+from .signals import invalidate_products
 from .serializers import (
     CategorySerializer, SupplierSerializer, ProductListSerializer,
     ProductDetailSerializer, ProductCreateUpdateSerializer, 
-    ProductReviewSerializer, ProductImageSerializer
+    ProductReviewSerializer, ProductImageSerializer,
+    StockReservationSerializer, StockReservationCreateSerializer,
+    ProductBulkDeleteSerializer
 )
 
 
@@ -41,6 +63,14 @@ class SupplierListCreateView(generics.ListCreateAPIView):
     ordering_fields = ['company_name', 'rating', 'created_at']
     ordering = ['-rating']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?near=14.69,-17.44&radius=10 (km)
+        near = parse_near(self.request.query_params)
+        if near:
+            queryset = filter_near(queryset, *near)
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -54,9 +84,11 @@ class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ==================== PRODUCTS ====================
 
-class ProductListCreateView(generics.ListCreateAPIView):
+class ProductListCreateView(ConditionalListMixin, CompiledListMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
     """Liste et création des produits"""
-    queryset = Product.objects.filter(is_active=True)
+    conditional_collection = 'products'
+    response_cache_timeout = RESPONSE_CACHE_TIMEOUT
+    queryset = Product.objects.filter(is_active=True).select_related('category', 'supplier')
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'supplier', 'in_stock', 'unit']
@@ -86,13 +118,42 @@ class ProductListCreateView(generics.ListCreateAPIView):
             queryset = queryset.filter(category__name__icontains=category_name)
         if supplier_name:
             queryset = queryset.filter(supplier__company_name__icontains=supplier_name)
+        
+        # ?spec=dimension:20x20&spec=portante:true
+        specifications = parse_key_values(self.request.query_params.getlist('spec'))
+        if specifications:
+            queryset = filter_attributes(queryset, 'specifications', specifications)
             
-        return queryset.select_related('category', 'supplier')
+        return queryset
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductExportView(CompiledExportMixin, ProductListCreateView):
+    """Export en flux des produits filtrés (mêmes filtres que la liste)"""
+    http_method_names = ['get', 'head', 'options']
+    export_filename = 'produits'
+
+
+class ProductFacetView(FacetListMixin, ProductListCreateView):
+    """Décomptes pour la barre de filtres du catalogue (mêmes filtres que la liste)"""
+    http_method_names = ['get', 'head', 'options']
+    facet_cache_collection = 'products'
+    facet_cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def get_facets(self, queryset):
+        facets = catalog_facets(queryset)
+        facets.update(super().get_facets(queryset))
+        return facets
+
+
+class ProductDetailView(ConditionalDetailMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Détail, modification et suppression d'un produit"""
-    queryset = Product.objects.all()
+    # Le fournisseur imbriqué agrège les avis de tous ses produits :
+    # l'ETag suit donc la version du catalogue entier.
+    conditional_collection = 'products'
+    sparse_prefetch = {'reviews': 'reviews__user'}
+    queryset = Product.objects.select_related('category', 'supplier').prefetch_related(
+        'reviews__user', 'additional_images'
+    )
     serializer_class = ProductDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -101,6 +162,12 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
             return ProductCreateUpdateSerializer
         return ProductDetailSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        # Après la lecture : un identifiant inconnu (404) n'est pas journalisé
+        response = super().retrieve(request, *args, **kwargs)
+        record_view(request.user, kwargs['pk'])
+        return response
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
@@ -116,28 +183,41 @@ def product_search(request):
         Q(category__name__icontains=query) |
         Q(supplier__company_name__icontains=query),
         is_active=True
-    ).select_related('category', 'supplier')[:20]
+    )
     
-    serializer = ProductListSerializer(products, many=True)
-    return Response({'results': serializer.data})
+    return Response({'results': get_compiled(ProductListSerializer).serialize(products, limit=20)})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def product_recommendations(request, product_id):
-    """Produits recommandés basés sur la catégorie"""
-    try:
-        product = Product.objects.get(id=product_id)
-        recommendations = Product.objects.filter(
-            category=product.category,
-            is_active=True
-        ).exclude(id=product_id)[:6]
-        
-        serializer = ProductListSerializer(recommendations, many=True)
-        return Response({'recommendations': serializer.data})
-    except Product.DoesNotExist:
+    """Produits les plus similaires (catégorie, fournisseur, prix, unité, texte)"""
+    if not Product.objects.filter(id=product_id).exists():
+        return Response({'error': 'Produit non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+
+    ids = product_similarity.similar(product_id, k=6)
+    products = Product.objects.filter(id__in=ids).select_related('category', 'supplier').in_bulk()
+    recommendations = [products[pk] for pk in ids if pk in products]
+    serializer = ProductListSerializer(recommendations, many=True)
+    return Response({'recommendations': serializer.data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def product_also_bought(request, product_id):
+    """Produits consultés ou achetés avec celui-ci (``manage.py build_copurchase``)"""
+    if not Product.objects.filter(id=product_id).exists():
         return Response({'error': 'Produit non trouvé'}, status=status.HTTP_404_NOT_FOUND)
 
+    entry = ProductNeighbors.objects.filter(product_id=product_id).only('neighbors').first()
+    neighbors = entry.neighbors if entry else []
+    products = Product.objects.filter(
+        id__in=[pk for pk, _ in neighbors], is_active=True
+    ).select_related('category', 'supplier').in_bulk()
+    ranked = [products[uuid.UUID(pk)] for pk, _ in neighbors if uuid.UUID(pk) in products]
+    serializer = ProductListSerializer(ranked, many=True)
+    return Response({'results': serializer.data})
+
 
 # ==================== PRODUCT REVIEWS ====================
 
@@ -190,6 +270,53 @@ class ProductImageDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
+# ==================== STOCK RESERVATIONS ====================
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def product_reserve(request, product_id):
+    """Réserver une quantité de stock pour une durée limitée"""
+    serializer = StockReservationCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    product = Product.objects.filter(id=product_id, is_active=True).only('id', 'stock_quantity').first()
+    if product is None:
+        return Response({'error': 'Produit non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+
+    ttl_minutes = serializer.validated_data.get('ttl_minutes')
+    try:
+        reservation = reserve(
+            product,
+            serializer.validated_data['quantity'],
+            user=request.user,
+            ttl=timedelta(minutes=ttl_minutes) if ttl_minutes else None,
+        )
+    except ReservationError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    except InsufficientStock:
+        return Response({'error': 'Stock insuffisant'}, status=status.HTTP_409_CONFLICT)
+
+    return Response(StockReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+
+class StockReservationDetailView(generics.RetrieveDestroyAPIView):
+    """Détail d'une réservation ; DELETE la libère et restitue le stock"""
+    serializer_class = StockReservationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return StockReservation.objects.filter(user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        reservation = self.get_object()
+        if not release(reservation):
+            return Response(
+                {'error': 'Réservation déjà utilisée, libérée ou expirée'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # ==================== STATISTICS ====================
 
 @api_view(['GET'])
@@ -252,9 +379,11 @@ def bulk_update_products(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # ``updated_at`` explicite : ``update`` n'applique pas ``auto_now``
     updated_count = Product.objects.filter(
         id__in=product_ids
-    ).update(**filtered_data)
+    ).update(updated_at=timezone.now(), **filtered_data)
+    invalidate_products(sender=Product)
     
     return Response({
         'message': f'{updated_count} produits mis à jour',
@@ -265,20 +394,26 @@ def bulk_update_products(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def bulk_delete_products(request):
-    """Suppression en lot des produits"""
-    product_ids = request.data.get('product_ids', [])
-    
-    if not product_ids:
+    """Suppression en lot des produits (exécutée en arrière-plan)"""
+    serializer = ProductBulkDeleteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    product_ids = set(serializer.validated_data['product_ids'])
+
+    # Seuls les produits du fournisseur connecté (tous pour le staff)
+    products = Product.objects.filter(id__in=product_ids)
+    if not request.user.is_staff:
+        products = products.filter(supplier__user=request.user)
+    found = set(products.values_list('id', flat=True))
+    if found != product_ids:
         return Response(
-            {'error': 'product_ids est requis'},
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Certains produits sont introuvables', 'missing_ids': sorted(map(str, product_ids - found))},
+            status=status.HTTP_404_NOT_FOUND
         )
-    
-    deleted_count, _ = Product.objects.filter(
-        id__in=product_ids
-    ).delete()
+
+    job = create_deletion_job(Product, list(found), user=request.user)
     
     return Response({
-        'message': f'{deleted_count} produits supprimés',
-        'deleted_count': deleted_count
-    })
+        'message': f'Suppression de {job.total} produits planifiée',
+        'job_id': job.id,
+        'status_url': request.build_absolute_uri(reverse('deletion-job-detail', args=[job.id]))
+    }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,178 @@
+"""Moteur de mise à jour en lot des projets.
+
+Les valeurs sont validées une seule fois avec les champs du modèle
+(``to_python`` et validateurs), les projets sont traités par paquets
+d'identifiants dans une transaction, ``updated_at`` est renseigné
+explicitement (``auto_now`` ne s'applique pas à ``update``/``bulk_update``)
+et chaque modification est tracée dans ``ProjectChangeLog``. Seuls les
+champs demandés sont écrits : les compteurs de tâches (``projects.progress``)
+ne le sont jamais, et l'avancement n'est accepté que pour des projets sans
+tâche.
+"""
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, ProjectChangeLog
+from .signals import projects_bulk_changed
+
+BULK_UPDATE_CHUNK_SIZE = 500
+
+BULK_UPDATE_ALLOWED_FIELDS = [
+    'status', 'priority', 'estimated_budget',
+    'actual_budget', 'start_date', 'end_date', 'deadline', 'progress_percentage'
+]
+
+
+class ProjectsNotFound(Exception):
+    """Certains projets demandés n'existent pas ou n'appartiennent pas à l'utilisateur"""
+
+    def __init__(self, missing_ids):
+        self.missing_ids = missing_ids
+        super().__init__(f"{len(missing_ids)} projets introuvables")
+
+
+class ProgressFromTasks(Exception):
+    """Avancement demandé pour des projets dont il est déduit des tâches"""
+
+    def __init__(self, project_ids):
+        self.project_ids = project_ids
+        super().__init__(f"{len(project_ids)} projets ont des tâches")
+
+
+def _check_progress(fields, rows):
+    """``rows`` : ``(id, tasks_total)`` des projets modifiés"""
+    if 'progress_percentage' in fields:
+        with_tasks = [pk for pk, tasks_total in rows if tasks_total]
+        if with_tasks:
+            raise ProgressFromTasks(with_tasks)
+
+
+def clean_update_data(update_data):
+    """Convertit et valide les valeurs avec les champs du modèle ``Project``"""
+    if not update_data:
+        raise ValidationError("Aucun champ à mettre à jour.")
+
+    cleaned, errors = {}, {}
+    for name, value in update_data.items():
+        if name not in BULK_UPDATE_ALLOWED_FIELDS:
+            errors[name] = [f"Le champ '{name}' n'est pas autorisé pour la mise à jour en lot."]
+            continue
+        try:
+            cleaned[name] = Project._meta.get_field(name).clean(value, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _unique(ids):
+    return list(dict.fromkeys(ids))
+
+
+class ProjectBulkUpdater:
+    """Applique des mises à jour en lot de façon transactionnelle"""
+
+    def __init__(self, user, chunk_size=BULK_UPDATE_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.batch_id = uuid.uuid4()
+
+    def _projects(self):
+        """Projets modifiables : ceux de l'utilisateur, tous pour le staff"""
+        if self.user.is_staff:
+            return Project.objects.all()
+        return Project.objects.filter(created_by=self.user)
+
+    def _log(self, project_id, field_name, old_value, new_value):
+        return ProjectChangeLog(
+            project_id=project_id,
+            field_name=field_name,
+            old_value=old_value,
+            new_value=new_value,
+            changed_by=self.user,
+            batch_id=self.batch_id,
+        )
+
+    def _notify(self, project_ids, fields):
+        transaction.on_commit(lambda: projects_bulk_changed.send(
+            sender=Project, project_ids=project_ids, fields=sorted(fields), created=False
+        ))
+
+    def update(self, project_ids, update_data):
+        """Applique les mêmes valeurs (déjà validées) à tous les projets"""
+        project_ids = _unique(project_ids)
+        fields = list(update_data)
+        now = timezone.now()
+
+        with transaction.atomic():
+            for chunk in _chunks(project_ids, self.chunk_size):
+                queryset = self._projects().filter(id__in=chunk)
+                previous = list(queryset.values('id', 'tasks_total', *fields))
+                if len(previous) != len(chunk):
+                    found = {row['id'] for row in previous}
+                    raise ProjectsNotFound([pk for pk in chunk if pk not in found])
+                _check_progress(fields, [(row['id'], row['tasks_total']) for row in previous])
+
+                queryset.update(updated_at=now, **update_data)
+                ProjectChangeLog.objects.bulk_create([
+                    self._log(row['id'], field, row[field], update_data[field])
+                    for row in previous
+                    for field in fields
+                    if row[field] != update_data[field]
+                ])
+            self._notify(project_ids, fields)
+
+        return len(project_ids)
+
+    def update_each(self, updates):
+        """Applique des valeurs différentes par projet via ``bulk_update``.
+
+        ``updates`` est une liste de ``{'id': uuid, 'data': {...}}`` dont les
+        données sont déjà validées.
+        """
+        merged = {}
+        for entry in updates:
+            merged.setdefault(entry['id'], {}).update(entry['data'])
+        project_ids = list(merged)
+        all_fields = set()
+        now = timezone.now()
+
+        with transaction.atomic():
+            for chunk in _chunks(project_ids, self.chunk_size):
+                fields = {field for pk in chunk for field in merged[pk]}
+                projects = self._projects().only('id', 'tasks_total', *fields).in_bulk(chunk)
+                if len(projects) != len(chunk):
+                    raise ProjectsNotFound([pk for pk in chunk if pk not in projects])
+                _check_progress(fields, [
+                    (pk, project.tasks_total) for pk, project in projects.items()
+                    if 'progress_percentage' in merged[pk]
+                ])
+
+                logs = []
+                for pk in chunk:
+                    project = projects[pk]
+                    for field, value in merged[pk].items():
+                        old_value = getattr(project, field)
+                        if old_value != value:
+                            logs.append(self._log(pk, field, old_value, value))
+                            setattr(project, field, value)
+                    project.updated_at = now
+
+                Project.objects.bulk_update(
+                    projects.values(), [*fields, 'updated_at'], batch_size=self.chunk_size
+                )
+                ProjectChangeLog.objects.bulk_create(logs)
+                all_fields |= fields
+            self._notify(project_ids, all_fields)
+
+        return len(project_ids)
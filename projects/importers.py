@@ -0,0 +1,249 @@
+"""Import en masse de projets depuis un fichier CSV ou NDJSON.
+
+Le fichier est lu ligne par ligne et traité par lots : chaque lot est validé
+avec les règles de ``ProjectCreateUpdateSerializer``, les catégories et les
+utilisateurs sont résolus en une requête par lot, puis les projets et leurs
+assignations sont insérés avec ``bulk_create``. La mémoire consommée reste
+bornée par la taille d'un lot, quel que soit le nombre de lignes. La vue
+d'import exécute l'ensemble dans une transaction : une erreur en cours de
+fichier n'en laisse aucun lot en base.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from btpconnect.geo import locate
+
+from .models import ProjectCategory, Project
+from .serializers import ProjectImportRowSerializer
+from .signals import projects_bulk_changed
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+SUPPORTED_FORMATS = ('csv', 'ndjson')
+
+
+class RowParseError(Exception):
+    """Ligne illisible dans le fichier importé"""
+
+
+def guess_format(upload, requested=None):
+    """Détermine le format du fichier à partir du paramètre, du nom ou du type MIME"""
+    if requested:
+        requested = requested.lower()
+        if requested not in SUPPORTED_FORMATS:
+            raise ValueError(f"Format '{requested}' non supporté (csv ou ndjson).")
+        return requested
+
+    name = (upload.name or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+
+    content_type = (upload.content_type or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+
+    raise ValueError("Impossible de déterminer le format du fichier (csv ou ndjson).")
+
+
+def _split_list(value):
+    value = value.strip()
+    if value.startswith('['):
+        return json.loads(value)
+    return [item.strip() for item in value.split(';') if item.strip()]
+
+
+def _normalize_csv_row(row):
+    """Convertit les cellules CSV (chaînes) vers les types attendus par le serializer"""
+    data = {
+        key.strip(): value for key, value in row.items()
+        if key and value not in (None, '')
+    }
+    try:
+        if 'tags' in data:
+            data['tags'] = _split_list(data['tags'])
+        if 'assigned_to_ids' in data:
+            data['assigned_to_ids'] = _split_list(data['assigned_to_ids'])
+        if 'specifications' in data:
+            data['specifications'] = json.loads(data['specifications'])
+    except json.JSONDecodeError as exc:
+        raise RowParseError(f"JSON invalide : {exc.msg}")
+    return data
+
+
+ENCODING_ERROR = "Encodage invalide : le fichier doit être en UTF-8."
+
+
+def _decode_lines(upload, invalid):
+    """Décode le fichier ligne par ligne ; ``invalid[0]`` : dernière ligne non UTF-8"""
+    for number, line in enumerate(upload, start=1):
+        if number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            invalid[0] = number
+            yield line.decode('utf-8', errors='replace')
+
+
+def iter_csv_rows(upload):
+    invalid = [0]
+    reader = csv.DictReader(_decode_lines(upload, invalid))
+    if reader.fieldnames and invalid[0]:
+        yield RowParseError(ENCODING_ERROR)
+        return
+    previous = reader.line_num
+    for row in reader:
+        # Une des lignes physiques de l'enregistrement n'était pas en UTF-8
+        if invalid[0] > previous:
+            yield RowParseError(ENCODING_ERROR)
+        else:
+            try:
+                yield _normalize_csv_row(row)
+            except RowParseError as exc:
+                yield exc
+        previous = reader.line_num
+
+
+def iter_ndjson_rows(upload):
+    invalid = [0]
+    for number, line in enumerate(_decode_lines(upload, invalid), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if invalid[0] == number:
+            yield RowParseError(ENCODING_ERROR)
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield RowParseError(f"JSON invalide : {exc.msg}")
+            continue
+        if not isinstance(data, dict):
+            yield RowParseError("Chaque ligne doit être un objet JSON.")
+            continue
+        yield data
+
+
+def iter_rows(upload, file_format):
+    """Itère sur les lignes du fichier sans le charger entièrement en mémoire"""
+    if file_format == 'csv':
+        return iter_csv_rows(upload)
+    return iter_ndjson_rows(upload)
+
+
+class ProjectImporter:
+    """Valide et insère des projets par lots"""
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.created_count = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch)
+
+        return {
+            'created_count': self.created_count,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+    def _add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def _build_context(self, batch):
+        """Résout catégories et utilisateurs du lot en une requête chacun"""
+        category_ids, category_names, user_ids = set(), set(), set()
+        for _, data in batch:
+            if isinstance(data, Exception):
+                continue
+            category = str(data.get('category', '')).strip()
+            if category.isdigit():
+                category_ids.add(int(category))
+            elif category:
+                category_names.add(category)
+            for user_id in data.get('assigned_to_ids') or []:
+                try:
+                    user_ids.add(int(user_id))
+                except (TypeError, ValueError):
+                    pass
+
+        categories = {}
+        if category_ids or category_names:
+            for category in ProjectCategory.objects.filter(
+                Q(id__in=category_ids) | Q(name__in=category_names)
+            ):
+                categories[category.name] = category
+                categories[str(category.id)] = category
+
+        existing_user_ids = set()
+        if user_ids:
+            existing_user_ids = set(
+                User.objects.filter(id__in=user_ids).values_list('id', flat=True)
+            )
+
+        return {'categories': categories, 'user_ids': existing_user_ids}
+
+    def _import_batch(self, batch):
+        context = self._build_context(batch)
+        projects = []
+        assignments = []
+
+        for row_number, data in batch:
+            if isinstance(data, Exception):
+                self._add_error(row_number, {'non_field_errors': [str(data)]})
+                continue
+
+            serializer = ProjectImportRowSerializer(data=data, context=context)
+            if not serializer.is_valid():
+                self._add_error(row_number, serializer.errors)
+                continue
+
+            validated_data = dict(serializer.validated_data)
+            assigned_to_ids = validated_data.pop('assigned_to_ids', [])
+            project = Project(created_by=self.user, **validated_data)
+            # bulk_create ne déclenche pas pre_save
+            locate(project)
+            projects.append(project)
+            assignments.extend(
+                Project.assigned_to.through(project_id=project.id, user_id=user_id)
+                for user_id in set(assigned_to_ids)
+            )
+
+        if not projects:
+            return
+
+        project_ids = [project.id for project in projects]
+        with transaction.atomic():
+            Project.objects.bulk_create(projects, batch_size=self.batch_size)
+            if assignments:
+                Project.assigned_to.through.objects.bulk_create(
+                    assignments, batch_size=self.batch_size
+                )
+            transaction.on_commit(lambda: projects_bulk_changed.send(
+                sender=Project, project_ids=project_ids, fields=[], created=True
+            ))
+        self.created_count += len(projects)
@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from products.models import Product
+from products.views import ProductListCreateView
+from projects.models import Project
+from projects.views import ProjectListCreateView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les temps de réponse des principaux endpoints sur plusieurs bases "
+        "(un processus par base via DB_ENGINE ; mêmes données, voir migrate_data)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', nargs='+', default=['mongo', 'postgres'],
+                            help='Entrées de DATABASE_BACKENDS à comparer')
+        parser.add_argument('--requests', type=int, default=20, help='Requêtes mesurées par endpoint')
+        parser.add_argument('--worker', action='store_true', help='Usage interne : mesure la base courante')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self._measure(options['requests'])))
+            return
+
+        results = {}
+        for backend in options['backends']:
+            completed = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_backends',
+                 '--worker', '--requests', str(options['requests'])],
+                env={**os.environ, 'DB_ENGINE': backend}, capture_output=True, text=True,
+            )
+            if completed.returncode:
+                error = completed.stderr.strip().splitlines()[-1:] or ['erreur inconnue']
+                self.stderr.write(f'{backend} : échec ({error[0]})')
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        if not results:
+            return
+        backends = list(results)
+        self.stdout.write('Médiane / p95 en ms')
+        self.stdout.write(f"{'Endpoint':<28}" + ''.join(f'{backend:>22}' for backend in backends))
+        labels = dict.fromkeys(label for timings in results.values() for label in timings)
+        for label in labels:
+            cells = []
+            for backend in backends:
+                timing = results[backend].get(label)
+                cells.append(f"{timing['median']:.1f} / {timing['p95']:.1f}" if timing else '-')
+            self.stdout.write(f'{label:<28}' + ''.join(f'{cell:>22}' for cell in cells))
+
+    def _measure(self, requests):
+        setup_test_environment()
+        # Mesurer la base et non le cache des listes
+        ProjectListCreateView.response_cache_timeout = None
+        ProductListCreateView.response_cache_timeout = None
+
+        client = APIClient()
+        user = get_user_model().objects.filter(is_active=True).order_by('-is_staff', 'pk').first()
+        if user is not None:
+            client.force_authenticate(user)
+
+        timings = {}
+        for label, url in self._endpoints(user):
+            if client.get(url).status_code >= 400:
+                continue
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.get(url)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            timings[label] = {
+                'median': statistics.median(samples),
+                'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            }
+        return timings
+
+    def _endpoints(self, user):
+        endpoints = [
+            ('Liste des produits', reverse('products:product-list-create')),
+            ('Recherche de produits', reverse('products:product-search') + '?q=ciment'),
+        ]
+        product = Product.objects.filter(is_active=True).order_by('pk').first()
+        if product is not None:
+            endpoints.append(('Détail produit', reverse('products:product-detail', args=[product.pk])))
+        if user is None:
+            return endpoints
+
+        endpoints += [
+            ('Liste des projets', reverse('project-list-create')),
+            ('Statistiques des projets', reverse('project-statistics')),
+            ('Liste des commandes', reverse('order-list-create')),
+        ]
+        project = Project.objects.order_by('pk').first()
+        if project is not None:
+            endpoints.append(('Détail projet', reverse('project-detail', args=[project.pk])))
+        return endpoints
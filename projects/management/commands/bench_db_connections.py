@@ -0,0 +1,53 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût de connexion par requête : backend djongo d'origine "
+        "(client fermé en fin de requête) contre btpconnect.db.mongo (client partagé)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Nombre de requêtes simulées')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options['database']].settings_dict
+        if settings_dict['ENGINE'] not in ('djongo', 'btpconnect.db.mongo'):
+            raise CommandError('Ce benchmark nécessite une base MongoDB (djongo)')
+
+        from djongo.base import DatabaseWrapper as DjongoWrapper
+        from btpconnect.db.mongo.base import DatabaseWrapper as SharedClientWrapper
+
+        before = copy.deepcopy(settings_dict)
+        before.update(ENGINE='djongo', CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        after = copy.deepcopy(settings_dict)
+        after['ENGINE'] = 'btpconnect.db.mongo'
+
+        for label, wrapper in (
+            ('djongo (avant)', DjongoWrapper(before, 'bench_before')),
+            ('client partagé (après)', SharedClientWrapper(after, 'bench_after')),
+        ):
+            timings = self._simulate(wrapper, options['requests'])
+            wrapper.close()
+            self.stdout.write(
+                f'{label} : moyenne {statistics.mean(timings):.1f} ms, '
+                f'médiane {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms'
+            )
+
+    def _simulate(self, wrapper, requests):
+        """Cycle d'une requête Django : vérification, lecture, fermeture éventuelle"""
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            wrapper.close_if_unusable_or_obsolete()
+            wrapper.ensure_connection()
+            wrapper.connection['django_migrations'].find_one({}, {'_id': 1})
+            wrapper.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from products.views import ProductListCreateView
+from projects.views import ProjectListCreateView
+
+
+class Command(BaseCommand):
+    help = "Compare l'analyse et la traduction SQL -> MongoDB de djongo avec et sans cache d'instructions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Traductions par forme de requête')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        try:
+            from btpconnect.db.mongo.query_cache import CachedQuery, Query, StatementCache
+        except ImportError:
+            raise CommandError('djongo doit être installé pour ce benchmark')
+
+        compiler_alias = options['database']
+        iterations = options['iterations']
+        statements = StatementCache(max_size=64)
+
+        for label, sql, params in self._query_shapes(compiler_alias):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                Query(None, None, None, sql, params)
+            stock = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                CachedQuery(None, None, None, sql, params, statements)
+            cached = time.perf_counter() - start
+
+            self.stdout.write(
+                f'{label} : djongo {stock / iterations * 1000:.2f} ms, '
+                f'avec cache {cached / iterations * 1000:.2f} ms par requête, gain x{stock / cached:.1f}'
+            )
+
+        stats = statements.stats()
+        self.stdout.write(
+            f"Cache : {stats['hits']} succès, {stats['misses']} échecs "
+            f"(taux {stats['hit_rate']:.0%}), sqlparse {stats['parse_time_ms']:.1f} ms, "
+            f"traduction {stats['translation_time_ms']:.1f} ms pour {stats['translations']} SELECT"
+        )
+
+    def _query_shapes(self, alias):
+        """SQL principal des listes de projets et de produits, avec filtres"""
+        shapes = [
+            ('Liste des projets', ProjectListCreateView.queryset.filter(city='Dakar', status='in_progress')),
+            ('Liste des produits', ProductListCreateView.queryset.filter(category=1, in_stock=True)),
+        ]
+        for label, queryset in shapes:
+            sql, params = queryset.query.get_compiler(using=alias).as_sql()
+            yield label, sql, params
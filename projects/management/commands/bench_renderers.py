@@ -0,0 +1,83 @@
+import datetime
+import io
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from btpconnect.renderers import FastJSONParser, FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Compare le rendu et la lecture JSON de DRF et de FastJSONRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Nombre de lignes du payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures (meilleure conservée)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson non installé : FastJSONRenderer utilise le rendu DRF'))
+
+        data = self._payload(options['rows'])
+        repeat = options['repeat']
+
+        drf_time, drf_content = self._measure(lambda: JSONRenderer().render(data), repeat)
+        fast_time, fast_content = self._measure(lambda: FastJSONRenderer().render(data), repeat)
+        self._report('Rendu', len(data), drf_time, fast_time, len(drf_content))
+
+        if drf_content != fast_content:
+            self.stdout.write(self.style.ERROR('Sorties différentes du rendu DRF'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sorties identiques'))
+
+        context = {'encoding': 'utf-8'}
+        drf_time, drf_data = self._measure(
+            lambda: JSONParser().parse(io.BytesIO(drf_content), parser_context=context), repeat
+        )
+        fast_time, fast_data = self._measure(
+            lambda: FastJSONParser().parse(io.BytesIO(drf_content), parser_context=context), repeat
+        )
+        self._report('Lecture', len(data), drf_time, fast_time, len(drf_content))
+        if drf_data != fast_data:
+            self.stdout.write(self.style.ERROR('Données lues différentes'))
+
+    def _payload(self, rows):
+        """Lignes au format de la liste des projets (types non natifs compris)"""
+        now = timezone.now()
+        return [
+            {
+                'id': uuid.uuid4(),
+                'title': f'Projet {index} – Rénovation',
+                'status': 'in_progress',
+                'status_display': _('En cours'),
+                'estimated_budget': Decimal('1500000.00') + index,
+                'progress_percentage': index % 101,
+                'start_date': datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365),
+                'created_at': now - datetime.timedelta(minutes=index),
+                'city': 'Dakar',
+                'tags': ['gros œuvre', 'toiture'],
+                'client': {'name': 'Client', 'email': 'client@example.com'},
+            }
+            for index in range(rows)
+        ]
+
+    def _measure(self, function, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def _report(self, label, rows, drf_time, fast_time, size):
+        self.stdout.write(
+            f'{label} ({rows} lignes, {size / 1024:.0f} Ko) : DRF {drf_time * 1000:.1f} ms, '
+            f'rapide {fast_time * 1000:.1f} ms, gain x{drf_time / fast_time:.1f}'
+        )
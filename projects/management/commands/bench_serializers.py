@@ -0,0 +1,115 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from btpconnect.compiled import get_compiled
+from products.models import Category, Supplier, Product, ProductReview
+from products.serializers import ProductListSerializer
+from projects.models import ProjectCategory, Project, ProjectTask
+from projects.serializers import ProjectListSerializer
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_serializers'
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare les serializers de liste DRF et leur version compilée (données temporaires)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Nombre de lignes par liste')
+        parser.add_argument('--repeat', type=int, default=3, help='Nombre de mesures (meilleure conservée)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._populate(options['rows'])
+                self._compare(
+                    'Projets', ProjectListSerializer,
+                    Project.objects.filter(title__startswith=BENCH_PREFIX).select_related('category', 'created_by'),
+                    options['repeat']
+                )
+                self._compare(
+                    'Produits', ProductListSerializer,
+                    Product.objects.filter(name__startswith=BENCH_PREFIX).select_related('category', 'supplier'),
+                    options['repeat']
+                )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _populate(self, rows):
+        User.objects.bulk_create([
+            User(username=f'{BENCH_PREFIX}_{index}', email=f'bench{index}@example.com')
+            for index in range(3)
+        ])
+        users = list(User.objects.filter(username__startswith=BENCH_PREFIX))
+        project_category = ProjectCategory.objects.create(name=f'{BENCH_PREFIX}_category')
+        projects = Project.objects.bulk_create([
+            Project(
+                title=f'{BENCH_PREFIX}_{index}', description='Benchmark', category=project_category,
+                client_name='Client', client_email='client@example.com', address='Adresse',
+                city='Dakar', postal_code='10000', region='Dakar', created_by=users[0],
+                estimated_budget=1000000 + index, start_date='2024-01-01', end_date='2024-06-30',
+                deadline='2024-06-30'
+            )
+            for index in range(rows)
+        ])
+        ProjectTask.objects.bulk_create([
+            ProjectTask(project=project, title=f'Tâche {task}', is_completed=task == 0)
+            for project in projects
+            for task in range(2)
+        ])
+
+        supplier = Supplier.objects.create(
+            user=users[0], company_name=BENCH_PREFIX, location='Dakar', phone='0', email='bench@example.com'
+        )
+        category = Category.objects.create(name=f'{BENCH_PREFIX}_category')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'{BENCH_PREFIX}_{index}', category=category, supplier=supplier, price=1000 + index,
+                unit='pièce', description='Benchmark', delivery_time='24h'
+            )
+            for index in range(rows)
+        ])
+        ProductReview.objects.bulk_create([
+            ProductReview(product=product, user=user, rating=1 + (index + position) % 5, comment='Avis')
+            for index, product in enumerate(products)
+            for position, user in enumerate(users[:2])
+        ])
+
+    def _measure(self, function, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def _compare(self, label, serializer_class, queryset, repeat):
+        compiled = get_compiled(serializer_class)
+        drf_time, drf_data = self._measure(
+            lambda: serializer_class(queryset.all(), many=True).data, repeat
+        )
+        compiled_time, compiled_data = self._measure(
+            lambda: compiled.serialize(queryset.all()), repeat
+        )
+
+        expected = {row['id']: dict(row) for row in drf_data}
+        mismatches = sum(1 for row in compiled_data if expected.get(row['id']) != row)
+
+        self.stdout.write(
+            f'{label} ({len(drf_data)} lignes) : DRF {drf_time * 1000:.1f} ms, '
+            f'compilé {compiled_time * 1000:.1f} ms, gain x{drf_time / compiled_time:.1f}'
+        )
+        if mismatches or len(compiled_data) != len(drf_data):
+            self.stdout.write(self.style.ERROR(f'{mismatches} lignes différentes de la sortie DRF'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sorties identiques'))
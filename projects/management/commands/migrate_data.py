@@ -0,0 +1,157 @@
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from btpconnect.db import register_backend
+
+# Recréés par ``migrate`` sur la base cible, avec leurs propres identifiants :
+# les clés étrangères qui les visent sont converties par clé naturelle.
+RECREATED_MODELS = (ContentType, Permission)
+
+
+def copy_order(models):
+    """Modèles triés pour que les cibles des clés étrangères soient copiées d'abord"""
+    remaining = list(models)
+    ordered = []
+    while remaining:
+        for model in remaining:
+            targets = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model
+            }
+            if not targets & set(remaining):
+                break
+        else:
+            # Cycle : PostgreSQL vérifie les contraintes en fin de transaction
+            model = remaining[0]
+        remaining.remove(model)
+        ordered.append(model)
+    return ordered
+
+
+@contextmanager
+def preserved_timestamps(model):
+    """Désactive ``auto_now`` / ``auto_now_add`` pour recopier les dates d'origine"""
+    fields = [
+        (field, field.auto_now, field.auto_now_add) for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Copie en flux toutes les données d'une base vers une autre (ex. --from mongo --to postgres)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='source', required=True, help='Base source (DATABASE_BACKENDS)')
+        parser.add_argument('--to', dest='target', required=True, help='Base cible, déjà migrée')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Lignes lues et insérées par lot')
+        parser.add_argument('--skip-existing', action='store_true',
+                            help='Ignorer les lignes déjà présentes (reprise) au lieu de refuser une cible non vide')
+        parser.add_argument('--dry-run', action='store_true', help='Afficher les volumes sans rien écrire')
+
+    def handle(self, *args, **options):
+        try:
+            source = register_backend(options['source'])
+            target = register_backend(options['target'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        if connections[source].settings_dict == connections[target].settings_dict:
+            raise CommandError('Les bases source et cible sont identiques')
+
+        self.source, self.target = source, target
+        self.batch_size = options['batch_size']
+        self.skip_existing = options['skip_existing']
+
+        models = copy_order(
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy and model not in RECREATED_MODELS
+        )
+        if options['dry_run']:
+            for model in models:
+                count = model._base_manager.using(source).count()
+                self.stdout.write(f'{model._meta.label} : {count} lignes')
+            return
+
+        self.key_maps = self._recreated_key_maps()
+        total_start = time.perf_counter()
+        for model in models:
+            start = time.perf_counter()
+            copied = self._copy_model(model)
+            self.stdout.write(f'{model._meta.label} : {copied} lignes en {time.perf_counter() - start:.1f} s')
+
+        self._reset_sequences(models)
+        self.stdout.write(self.style.SUCCESS(f'Copie terminée en {time.perf_counter() - total_start:.1f} s'))
+
+    def _recreated_key_maps(self):
+        """Identifiant source -> identifiant cible des types de contenu et permissions"""
+        content_types = {}
+        target_content_types = {
+            content_type.natural_key(): content_type.pk
+            for content_type in ContentType.objects.using(self.target)
+        }
+        for content_type in ContentType.objects.using(self.source):
+            content_types[content_type.pk] = target_content_types.get(content_type.natural_key())
+
+        permissions = {}
+        target_permissions = {
+            permission.natural_key(): permission.pk
+            for permission in Permission.objects.using(self.target).select_related('content_type')
+        }
+        for permission in Permission.objects.using(self.source).select_related('content_type'):
+            permissions[permission.pk] = target_permissions.get(permission.natural_key())
+        return {ContentType: content_types, Permission: permissions}
+
+    def _copy_model(self, model):
+        manager = model._base_manager
+        if manager.using(self.target).exists() and not self.skip_existing:
+            raise CommandError(
+                f'{model._meta.label} contient déjà des données sur la base cible (voir --skip-existing)'
+            )
+
+        remapped = [
+            (field.attname, self.key_maps[field.related_model]) for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in self.key_maps
+        ]
+        rows = manager.using(self.source).order_by('pk').iterator(chunk_size=self.batch_size)
+        copied = 0
+        with preserved_timestamps(model), transaction.atomic(using=self.target):
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                for obj in batch:
+                    for attname, key_map in remapped:
+                        value = getattr(obj, attname)
+                        if value is not None:
+                            if key_map.get(value) is None:
+                                raise CommandError(
+                                    f'{model._meta.label} {obj.pk} : référence {attname}={value} '
+                                    f'absente de la base cible (lancer migrate sur la cible)'
+                                )
+                            setattr(obj, attname, key_map[value])
+                manager.using(self.target).bulk_create(batch, ignore_conflicts=self.skip_existing)
+                copied += len(batch)
+        return copied
+
+    def _reset_sequences(self, models):
+        connection = connections[self.target]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
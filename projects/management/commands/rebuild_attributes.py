@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from btpconnect.db.attributes import ATTRIBUTE_INDEXES, REINDEX_BATCH_SIZE, reindex_attributes
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index normalisé des tags et spécifications (projets, produits)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Modèle à réindexer (ex. projects.Project), tous par défaut')
+        parser.add_argument('--batch-size', type=int, default=REINDEX_BATCH_SIZE, help='Objets par paquet')
+
+    def handle(self, *args, **options):
+        models = [
+            model for model in ATTRIBUTE_INDEXES
+            if not options['models'] or model._meta.label in options['models']
+        ]
+        for model in models:
+            start = time.perf_counter()
+            count = reindex_attributes(model, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.label} : {count} objets indexés en {time.perf_counter() - start:.1f} s'
+            ))
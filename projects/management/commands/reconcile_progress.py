@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from btpconnect.versioning import bump_collection_version
+from projects.progress import RECONCILE_BATCH_SIZE, reconcile_progress
+from projects.signals import PROJECTS_COLLECTION
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de tâches et l'avancement des projets depuis leurs tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE, help='Projets par paquet')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        corrected = reconcile_progress(batch_size=options['batch_size'])
+        if corrected:
+            bump_collection_version(PROJECTS_COLLECTION)
+        self.stdout.write(self.style.SUCCESS(
+            f'{corrected} projets corrigés en {time.perf_counter() - start:.1f} s'
+        ))
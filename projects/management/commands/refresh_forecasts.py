@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from btpconnect.versioning import bump_collection_version
+from projects.scheduling import FORECAST_BATCH_SIZE, refresh_forecasts
+from projects.signals import PROJECTS_COLLECTION
+
+
+class Command(BaseCommand):
+    help = 'Recalcule le planning et la fin prévue des projets actifs (à lancer chaque jour)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FORECAST_BATCH_SIZE, help='Projets par paquet')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count, changed = refresh_forecasts(batch_size=options['batch_size'])
+        if changed:
+            bump_collection_version(PROJECTS_COLLECTION)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} projets planifiés en {time.perf_counter() - start:.1f} s, '
+            f'{len(changed)} prévisions modifiées'
+        ))
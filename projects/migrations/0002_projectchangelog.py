@@ -0,0 +1,39 @@
+# Generated by Django 4.1.4 on 2026-10-18 22:49
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=50, verbose_name='Champ modifié')),
+                ('old_value', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Ancienne valeur')),
+                ('new_value', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Nouvelle valeur')),
+                ('batch_id', models.UUIDField(db_index=True, verbose_name='Lot de modification')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='project_changes', to=settings.AUTH_USER_MODEL, verbose_name='Modifié par')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_logs', to='projects.project', verbose_name='Projet')),
+            ],
+            options={
+                'verbose_name': 'Modification de projet',
+                'verbose_name_plural': 'Modifications de projets',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='projectchangelog',
+            index=models.Index(fields=['project', 'created_at'], name='projects_pr_project_178dd1_idx'),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from btpconnect.db.migration_operations import gin_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectchangelog'),
+    ]
+
+    operations = [
+        gin_index('projects_project', 'tags'),
+        gin_index('projects_project', 'specifications'),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+        ('projects', '0003_json_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectdocument',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='uploads.mediablob', verbose_name='Fichier stocké'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='uploads.mediablob', verbose_name='Fichier stocké'),
+        ),
+    ]
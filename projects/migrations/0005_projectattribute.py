@@ -0,0 +1,35 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from btpconnect.db.migration_operations import index_attributes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_media_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=50, verbose_name='Champ')),
+                ('key', models.CharField(blank=True, max_length=100, verbose_name='Clé')),
+                ('value', models.CharField(max_length=255, verbose_name='Valeur')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='projects.project', verbose_name='Projet')),
+            ],
+            options={
+                'verbose_name': 'Attribut de projet',
+                'verbose_name_plural': 'Attributs de projets',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='projectattribute',
+            index=models.Index(fields=['field', 'key', 'value'], name='projects_pr_field_671d6c_idx'),
+        ),
+        index_attributes('projects', 'Project', 'ProjectAttribute', 'project', ['tags', 'specifications']),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:55
+
+import django.core.validators
+from django.db import migrations, models
+
+from btpconnect.db.migration_operations import geocode_existing
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_projectattribute'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)], verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)], verbose_name='Longitude'),
+        ),
+        geocode_existing('projects', 'Project', 'city', 'region'),
+    ]
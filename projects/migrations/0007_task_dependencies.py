@@ -0,0 +1,33 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_project_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='forecast_end_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Fin prévue'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='forecast_overdue',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Retard prévu'),
+        ),
+        migrations.AddField(
+            model_name='projecttask',
+            name='depends_on',
+            field=models.ManyToManyField(blank=True, related_name='dependents', to='projects.projecttask', verbose_name='Dépend de'),
+        ),
+        migrations.AddField(
+            model_name='projecttask',
+            name='duration_days',
+            field=models.PositiveIntegerField(default=1, verbose_name='Durée (jours)'),
+        ),
+    ]
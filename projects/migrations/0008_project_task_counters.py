@@ -0,0 +1,62 @@
+# Generated by Django 4.1.4 on 2026-10-19 00:02
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_tasks(apps, schema_editor):
+    """Compteurs et avancement des projets existants d'après leurs tâches"""
+    from projects.progress import COUNTER_FIELDS, contribution, progress
+
+    Project = apps.get_model('projects', 'Project')
+    ProjectTask = apps.get_model('projects', 'ProjectTask')
+    using = schema_editor.connection.alias
+    counters = defaultdict(lambda: [0, 0, 0, 0])
+    for row in ProjectTask.objects.using(using).order_by().values(
+        'project_id', 'is_completed', 'priority'
+    ).annotate(count=Count('id')):
+        for index, value in enumerate(contribution(row['is_completed'], row['priority'])):
+            counters[row['project_id']][index] += value * row['count']
+
+    projects = []
+    for project in Project.objects.using(using).filter(id__in=list(counters)).only('id'):
+        for name, value in zip(COUNTER_FIELDS, counters[project.id]):
+            setattr(project, name, value)
+        project.progress_percentage = progress(*counters[project.id])
+        projects.append(project)
+    Project.objects.using(using).bulk_update(
+        projects, [*COUNTER_FIELDS, 'progress_percentage'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_task_dependencies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='task_weight_completed',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_weight_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_completed',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tâches terminées'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tâches'),
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
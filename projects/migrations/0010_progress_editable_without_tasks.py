@@ -0,0 +1,19 @@
+# Generated by Django 4.1.4 on 2026-10-19 00:33
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_progress_read_only'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='progress_percentage',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name="Pourcentage d'avancement"),
+        ),
+    ]
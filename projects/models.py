@@ -2,6 +2,10 @@ from django.db import models
 from django.contrib.auth import get_user_model
 import uuid
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
+
+from btpconnect.db.attributes import AttributeEntry
+from uploads.models import MediaBlob
 
 User = get_user_model()
 
@@ -61,6 +65,14 @@ class Project(models.Model):
     city = models.CharField(max_length=100, verbose_name="Ville")
     postal_code = models.CharField(max_length=10, verbose_name="Code postal")
     region = models.CharField(max_length=100, verbose_name="Région")
+    # Coordonnées : géocodées depuis la ville et la région si absentes (btpconnect.geo)
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)], verbose_name="Latitude"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)], verbose_name="Longitude"
+    )
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     
     # Gestion du projet
     status = models.CharField(
@@ -99,12 +111,20 @@ class Project(models.Model):
         verbose_name="Budget réel"
     )
     
-    # Progression
+    # Planning des tâches (projects.scheduling)
+    forecast_end_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Fin prévue")
+    forecast_overdue = models.BooleanField(default=False, db_index=True, editable=False, verbose_name="Retard prévu")
+    
+    # Progression : saisie sans tâche, déduite des tâches dès qu'il y en a (projects.progress)
     progress_percentage = models.IntegerField(
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(100)],
         verbose_name="Pourcentage d'avancement"
     )
+    tasks_total = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tâches")
+    tasks_completed = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tâches terminées")
+    task_weight_total = models.PositiveIntegerField(default=0, editable=False)
+    task_weight_completed = models.PositiveIntegerField(default=0, editable=False)
     
     # Métadonnées
     specifications = models.JSONField(default=dict, blank=True, verbose_name="Spécifications techniques")
@@ -155,6 +175,10 @@ class Project(models.Model):
             return timezone.now().date() > self.deadline
         return False
 
+    @property
+    def tasks_pending(self):
+        return self.tasks_total - self.tasks_completed
+
     @property
     def duration_days(self):
         """Calcule la durée du projet en jours"""
@@ -162,6 +186,32 @@ class Project(models.Model):
             return (self.end_date - self.start_date).days
         return None
 
+    def is_accessible_by(self, user):
+        """Administrateur, créateur ou membre assigné du projet"""
+        if user.is_staff or self.created_by_id == user.pk:
+            return True
+        return self.assigned_to.filter(pk=user.pk).exists()
+
+
+class ProjectAttribute(AttributeEntry):
+    """Index des tags et spécifications des projets (voir btpconnect.db.attributes)"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='attributes',
+        verbose_name="Projet"
+    )
+
+    class Meta:
+        verbose_name = "Attribut de projet"
+        verbose_name_plural = "Attributs de projets"
+        indexes = [
+            models.Index(fields=['field', 'key', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.field} {self.key}={self.value}"
+
 
 class ProjectImage(models.Model):
     """Images associées aux projets"""
@@ -172,6 +222,14 @@ class ProjectImage(models.Model):
         verbose_name="Projet"
     )
     image = models.CharField(max_length=255, verbose_name="Chemin de l'image")
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Fichier stocké"
+    )
     alt_text = models.CharField(max_length=200, blank=True, verbose_name="Texte alternatif")
     caption = models.CharField(max_length=200, blank=True, verbose_name="Légende")
     order = models.PositiveIntegerField(default=0, verbose_name="Ordre")
@@ -204,6 +262,16 @@ class ProjectTask(models.Model):
     due_date = models.DateField(null=True, blank=True, verbose_name="Date d'échéance")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminée le")
     
+    # Planning : durée estimée et tâches à terminer avant celle-ci
+    duration_days = models.PositiveIntegerField(default=1, verbose_name="Durée (jours)")
+    depends_on = models.ManyToManyField(
+        'self',
+        symmetrical=False,
+        blank=True,
+        related_name='dependents',
+        verbose_name="Dépend de"
+    )
+    
     # Assignation
     assigned_to = models.ForeignKey(
         User, 
@@ -280,6 +348,14 @@ class ProjectDocument(models.Model):
     file_path = models.CharField(max_length=500, verbose_name="Chemin du fichier")
     file_type = models.CharField(max_length=50, verbose_name="Type de fichier")
     file_size = models.PositiveIntegerField(null=True, blank=True, verbose_name="Taille du fichier")
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Fichier stocké"
+    )
     
     uploaded_by = models.ForeignKey(
         User, 
@@ -295,3 +371,37 @@ class ProjectDocument(models.Model):
 
     def __str__(self):
         return f"{self.title} - {self.project.title}"
+
+
+class ProjectChangeLog(models.Model):
+    """Historique des modifications appliquées aux projets"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='change_logs',
+        verbose_name="Projet"
+    )
+    field_name = models.CharField(max_length=50, verbose_name="Champ modifié")
+    old_value = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Ancienne valeur")
+    new_value = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Nouvelle valeur")
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='project_changes',
+        verbose_name="Modifié par"
+    )
+    batch_id = models.UUIDField(db_index=True, verbose_name="Lot de modification")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Modification de projet"
+        verbose_name_plural = "Modifications de projets"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} - {self.field_name}"
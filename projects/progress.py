@@ -0,0 +1,120 @@
+"""Avancement des projets tenu à jour à partir de leurs tâches.
+
+``Project`` porte le nombre de tâches (``tasks_total``, ``tasks_completed``)
+et leur poids (``task_weight_total``, ``task_weight_completed``, selon la
+priorité : ``PROJECT_TASK_PRIORITY_WEIGHTS``). Chaque création, modification
+ou suppression de tâche applique l'écart par incrément atomique
+(``UPDATE ... SET tasks_total = tasks_total + 1``) : aucune lecture préalable
+du projet, aucune perte de mise à jour entre requêtes concurrentes.
+
+Dès que le projet a des tâches, ``progress_percentage`` en est déduit : part
+des tâches terminées, ou de leur poids si ``PROJECT_PROGRESS_WEIGHTED``.
+Sans tâche, il est saisi à la main (``set_manual_progress``, refusé par l'API
+et les mises à jour en lot sur un projet qui a des tâches) ; la suppression
+de la dernière tâche le remet à 0. Les mises à jour de projet ne nomment que
+les champs reçus (``update_fields``) et n'écrivent donc jamais ces colonnes.
+``manage.py reconcile_progress`` recalcule les compteurs depuis les tâches
+(après un import direct en base, par exemple) et conserve l'avancement saisi
+des projets sans tâche.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, Count, F, Value, When
+
+from .models import Project, ProjectPriority, ProjectTask
+
+PRIORITY_WEIGHTS = getattr(settings, 'PROJECT_TASK_PRIORITY_WEIGHTS', {
+    ProjectPriority.LOW: 1,
+    ProjectPriority.MEDIUM: 2,
+    ProjectPriority.HIGH: 3,
+    ProjectPriority.URGENT: 4,
+})
+WEIGHTED = getattr(settings, 'PROJECT_PROGRESS_WEIGHTED', False)
+RECONCILE_BATCH_SIZE = 500
+
+COUNTER_FIELDS = ('tasks_total', 'tasks_completed', 'task_weight_total', 'task_weight_completed')
+
+
+def contribution(is_completed, priority):
+    """Apport d'une tâche aux compteurs ``COUNTER_FIELDS``"""
+    weight = PRIORITY_WEIGHTS.get(priority, 1)
+    return (1, int(bool(is_completed)), weight, weight if is_completed else 0)
+
+
+def progress(tasks_total, tasks_completed, task_weight_total, task_weight_completed):
+    """Pourcentage d'avancement, None sans tâche"""
+    total, completed = (task_weight_total, task_weight_completed) if WEIGHTED else (tasks_total, tasks_completed)
+    if not total:
+        return None
+    return 100 * completed // total
+
+
+def _progress_expression():
+    total, completed = ('task_weight_total', 'task_weight_completed') if WEIGHTED else \
+        ('tasks_total', 'tasks_completed')
+    return Case(
+        When(**{f'{total}__gt': 0}, then=F(completed) * 100 / F(total)),
+        default=Value(0),
+    )
+
+
+def apply_delta(project_id, delta):
+    """Ajoute ``delta`` (un écart par champ de ``COUNTER_FIELDS``) aux compteurs du projet"""
+    if not any(delta):
+        return
+    projects = Project.objects.filter(pk=project_id)
+    projects.update(**{name: F(name) + value for name, value in zip(COUNTER_FIELDS, delta) if value})
+
+    # L'avancement est recalculé d'après les compteurs à jour, dans une seconde
+    # instruction (les expressions d'un même UPDATE lisent les anciennes valeurs).
+    # djongo ne traduit pas CASE : relu puis écrit.
+    if connections[projects.db].vendor != 'djongo':
+        projects.update(progress_percentage=_progress_expression())
+        return
+    counters = projects.values_list(*COUNTER_FIELDS).first()
+    if counters:
+        projects.update(progress_percentage=progress(*counters) or 0)
+
+
+def set_manual_progress(project_ids, value):
+    """Avancement saisi pour les projets sans tâche ; renvoie le nombre de projets modifiés"""
+    # Condition dans l'UPDATE : une tâche créée entre-temps l'emporte
+    return Project.objects.filter(pk__in=project_ids, tasks_total=0).update(progress_percentage=value)
+
+
+def reconcile_progress(project_ids=None, batch_size=RECONCILE_BATCH_SIZE):
+    """Recalcule compteurs et avancement depuis les tâches ; renvoie le nombre de projets corrigés"""
+    queryset = Project.objects.order_by()
+    if project_ids is not None:
+        queryset = queryset.filter(id__in=project_ids)
+    ids = list(queryset.values_list('id', flat=True))
+
+    corrected = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        counters = defaultdict(lambda: [0, 0, 0, 0])
+        for row in ProjectTask.objects.filter(project_id__in=chunk).order_by().values(
+            'project_id', 'is_completed', 'priority'
+        ).annotate(count=Count('id')):
+            project_counters = counters[row['project_id']]
+            for index, value in enumerate(contribution(row['is_completed'], row['priority'])):
+                project_counters[index] += value * row['count']
+
+        changed = []
+        for project_id, *stored, current_progress in Project.objects.filter(id__in=chunk).values_list(
+            'id', *COUNTER_FIELDS, 'progress_percentage'
+        ):
+            expected = counters[project_id]
+            expected_progress = progress(*expected)
+            if expected_progress is None:
+                expected_progress = current_progress
+            if list(stored) != expected or current_progress != expected_progress:
+                changed.append(Project(
+                    id=project_id, progress_percentage=expected_progress,
+                    **dict(zip(COUNTER_FIELDS, expected)),
+                ))
+        Project.objects.bulk_update(changed, [*COUNTER_FIELDS, 'progress_percentage'])
+        corrected += len(changed)
+    return corrected
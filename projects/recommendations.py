@@ -0,0 +1,50 @@
+"""Projets similaires : catégorie, localisation, tranche de budget, tags et texte.
+
+Voir ``btpconnect.similarity`` pour le calcul et la mise à jour de l'index.
+"""
+from django.conf import settings
+
+from btpconnect.similarity import Band, Categorical, Proximity, SimilarityIndex, Text, tokenize
+
+from .models import Project
+
+# Bornes des tranches de budget estimé (FCFA)
+BUDGET_BUCKETS = getattr(
+    settings, 'PROJECT_BUDGET_BUCKETS', (1_000_000, 5_000_000, 10_000_000, 50_000_000, 100_000_000, 500_000_000)
+)
+
+# Distance au-delà de laquelle la proximité ne compte plus (km)
+PROXIMITY_RADIUS_KM = getattr(settings, 'PROJECT_PROXIMITY_RADIUS_KM', 50)
+
+
+class ProjectSimilarity(SimilarityIndex):
+    model = Project
+    collection = 'projects'
+    blocks = {
+        'category': Categorical(0.3),
+        'region': Categorical(0.1),
+        # Ville identique, et distance pour les projets géolocalisés
+        'city': Categorical(0.05),
+        'location': Proximity(0.1, radius_km=PROXIMITY_RADIUS_KM),
+        'budget': Band(0.1, BUDGET_BUCKETS),
+        'tags': Text(0.15, dimensions=64),
+        # Titre et description
+        'text': Text(0.2),
+    }
+
+    def get_values(self):
+        return ['category_id', 'region', 'city', 'latitude', 'longitude', 'estimated_budget', 'tags', 'title', 'description']
+
+    def get_features(self, row):
+        return {
+            'category': row['category_id'],
+            'region': (row['region'] or '').strip().lower(),
+            'city': (row['city'] or '').strip().lower(),
+            'location': (row['latitude'], row['longitude']),
+            'budget': row['estimated_budget'],
+            'tags': [str(tag).strip().lower() for tag in row['tags'] or []],
+            'text': tokenize(row['title']) * 2 + tokenize(row['description']),
+        }
+
+
+project_similarity = ProjectSimilarity()
@@ -0,0 +1,315 @@
+"""Planning des projets : chemin critique, marges et date de fin prévue.
+
+Les tâches et leurs dépendances (``depends_on``) forment un graphe orienté
+sans cycle, parcouru dans l'ordre topologique (algorithme de Kahn), en temps
+linéaire en nombre de tâches et de dépendances :
+
+- passe avant : une tâche non terminée commence au plus tôt aujourd'hui,
+  au début du projet et à la fin de ses prédécesseurs, et dure
+  ``duration_days`` ; une tâche terminée finit le jour de ``completed_at`` ;
+- passe arrière : ``tail``, durée restante de la plus longue chaîne menant
+  de la tâche à la fin du projet.
+
+La fin prévue du projet est la plus tardive des fins au plus tôt ; la marge
+d'une tâche vaut ``fin prévue - (début au plus tôt + tail)`` et s'annule sur
+le chemin critique. ``tail`` ne dépendant pas de la fin du projet, la
+modification d'une tâche ne recalcule que les débuts de ses descendants et
+les ``tail`` de ses ancêtres, à partir du planning conservé dans le cache.
+Un changement de dépendances, de tâches ou de jour provoque un recalcul
+complet.
+
+La fin prévue et le retard prévu (fin prévue postérieure à ``deadline``)
+sont recopiés dans ``Project`` pour filtrer les listes ; ``manage.py
+refresh_forecasts`` les recalcule chaque jour pour les projets actifs.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Project, ProjectStatus, ProjectTask
+
+SCHEDULE_CACHE_KEY = 'schedule:{}'
+SCHEDULE_CACHE_TIMEOUT = 24 * 3600
+FORECAST_BATCH_SIZE = 200
+
+ACTIVE_STATUSES = [ProjectStatus.PLANNING, ProjectStatus.IN_PROGRESS, ProjectStatus.ON_HOLD]
+
+TASK_FIELDS = ('id', 'project_id', 'duration_days', 'is_completed', 'completed_at', 'due_date')
+PROJECT_FIELDS = ('id', 'start_date', 'deadline', 'status')
+
+Dependency = ProjectTask.depends_on.through
+
+
+class DependencyCycle(Exception):
+    """Les dépendances des tâches forment un cycle"""
+
+
+def creates_cycle(task_id, dependency_ids, edges):
+    """``task_id`` dépendant de ``dependency_ids`` fermerait-elle un cycle ?
+
+    ``edges`` : couples ``(tâche, prédécesseur)`` existants du projet.
+    """
+    predecessors = defaultdict(list)
+    for task, predecessor in edges:
+        if task != task_id:
+            predecessors[task].append(predecessor)
+    stack, seen = list(dependency_ids), set()
+    while stack:
+        current = stack.pop()
+        if current == task_id:
+            return True
+        if current not in seen:
+            seen.add(current)
+            stack.extend(predecessors[current])
+    return False
+
+
+class Schedule:
+    """Planning d'un projet, en jours (``date.toordinal``)"""
+
+    def __init__(self, project, tasks, edges, today=None):
+        self.project_id = project['id']
+        self.today = (today or timezone.localdate()).toordinal()
+        self.start = max(self.today, project['start_date'].toordinal() if project['start_date'] else 0)
+        self.deadline = project['deadline']
+        self.tasks = {}
+        self.predecessors = defaultdict(list)
+        self.successors = defaultdict(list)
+        for row in tasks:
+            self._set_task(row)
+        for task, predecessor in edges:
+            if task in self.tasks and predecessor in self.tasks:
+                self.predecessors[task].append(predecessor)
+                self.successors[predecessor].append(task)
+        self.order = self._topological_order()
+        self.position = {task: index for index, task in enumerate(self.order)}
+        self.earliest, self.tail = {}, {}
+        self._forward(self.order)
+        self._backward(reversed(self.order))
+
+    def _set_task(self, row):
+        done = None
+        if row['is_completed']:
+            # Terminée sans date connue : la veille
+            done = (timezone.localtime(row['completed_at']).date().toordinal()
+                    if row['completed_at'] else self.today - 1)
+        self.tasks[row['id']] = (row['duration_days'], done, row['due_date'])
+
+    def _topological_order(self):
+        remaining = {task: len(self.predecessors[task]) for task in self.tasks}
+        ready = [task for task, count in remaining.items() if not count]
+        order = []
+        while ready:
+            task = ready.pop()
+            order.append(task)
+            for successor in self.successors[task]:
+                remaining[successor] -= 1
+                if not remaining[successor]:
+                    ready.append(successor)
+        if len(order) != len(self.tasks):
+            raise DependencyCycle(self.project_id)
+        return order
+
+    # ---- passes ----
+
+    def _finish(self, task):
+        duration, done, _ = self.tasks[task]
+        if done is not None:
+            return done + 1
+        return self.earliest[task] + duration
+
+    def _forward(self, tasks):
+        for task in tasks:
+            duration, done, _ = self.tasks[task]
+            if done is not None:
+                self.earliest[task] = done + 1 - duration
+            else:
+                self.earliest[task] = max(
+                    [self.start, *(self._finish(predecessor) for predecessor in self.predecessors[task])]
+                )
+
+    def _backward(self, tasks):
+        for task in tasks:
+            duration, done, _ = self.tasks[task]
+            self.tail[task] = (0 if done is not None else duration) + max(
+                (self.tail[successor] for successor in self.successors[task]), default=0
+            )
+
+    def _reachable(self, tasks, graph):
+        stack, seen = list(tasks), set(tasks)
+        while stack:
+            for neighbour in graph[stack.pop()]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return seen
+
+    def update(self, rows):
+        """Applique des tâches modifiées (mêmes dépendances) : descendants et ancêtres seulement"""
+        for row in rows:
+            self._set_task(row)
+        changed = [row['id'] for row in rows]
+        self._forward(sorted(self._reachable(changed, self.successors), key=self.position.__getitem__))
+        self._backward(sorted(
+            self._reachable(changed, self.predecessors), key=self.position.__getitem__, reverse=True
+        ))
+
+    # ---- résultats ----
+
+    def _finish_day(self):
+        return max(self._finish(task) for task in self.tasks)
+
+    @property
+    def finish(self):
+        """Fin prévue (dernier jour), None sans tâche"""
+        return date.fromordinal(self._finish_day() - 1) if self.tasks else None
+
+    @property
+    def forecast_overdue(self):
+        finish = self.finish
+        return bool(self.deadline and finish and finish > self.deadline)
+
+    def as_dict(self):
+        finish_day = self._finish_day() if self.tasks else None
+        tasks = []
+        for task in self.order:
+            _, done, due_date = self.tasks[task]
+            end = date.fromordinal(self._finish(task) - 1)
+            # Marge des seules tâches restant à faire
+            slack = None if done is not None else finish_day - self.earliest[task] - self.tail[task]
+            tasks.append({
+                'id': task,
+                'start': date.fromordinal(self.earliest[task]),
+                'end': end,
+                'slack_days': slack,
+                'critical': slack == 0,
+                'late': bool(done is None and due_date and end > due_date),
+            })
+        return {
+            'forecast_end_date': self.finish,
+            'forecast_overdue': self.forecast_overdue,
+            'critical_path': [task['id'] for task in tasks if task['critical']],
+            'tasks': tasks,
+        }
+
+
+# ---- chargement et cache ----
+
+def _load(project_ids):
+    """Projets, tâches et dépendances de ``project_ids`` en trois requêtes"""
+    projects = {row['id']: row for row in Project.objects.filter(id__in=project_ids).values(*PROJECT_FIELDS)}
+    tasks = defaultdict(list)
+    for row in ProjectTask.objects.filter(project_id__in=project_ids).values(*TASK_FIELDS):
+        tasks[row['project_id']].append(row)
+    task_projects = {row['id']: project_id for project_id, rows in tasks.items() for row in rows}
+    edges = defaultdict(list)
+    for task, predecessor in Dependency.objects.filter(
+        from_projecttask_id__in=list(task_projects)
+    ).values_list('from_projecttask_id', 'to_projecttask_id'):
+        edges[task_projects[task]].append((task, predecessor))
+    return projects, tasks, edges
+
+
+def compute_schedule(project_id):
+    """Recalcule et met en cache le planning complet ; None si le projet n'existe plus"""
+    projects, tasks, edges = _load([project_id])
+    if project_id not in projects:
+        cache.delete(SCHEDULE_CACHE_KEY.format(project_id))
+        return None
+    schedule = Schedule(projects[project_id], tasks[project_id], edges[project_id])
+    cache.set(SCHEDULE_CACHE_KEY.format(project_id), schedule, SCHEDULE_CACHE_TIMEOUT)
+    return schedule
+
+
+def get_schedule(project_id):
+    """Planning du jour, depuis le cache s'il y est"""
+    schedule = cache.get(SCHEDULE_CACHE_KEY.format(project_id))
+    if schedule is None or schedule.today != timezone.localdate().toordinal():
+        schedule = compute_schedule(project_id)
+    return schedule
+
+
+def task_changed(project_id, task_ids):
+    """Mise à jour après modification de tâches, incrémentale si les dépendances sont inchangées.
+
+    Renvoie les identifiants des projets dont la prévision a changé.
+    """
+    schedule = cache.get(SCHEDULE_CACHE_KEY.format(project_id))
+    rows = list(ProjectTask.objects.filter(id__in=task_ids).values(*TASK_FIELDS))
+    edges = defaultdict(list)
+    for task, predecessor in Dependency.objects.filter(
+        from_projecttask_id__in=task_ids
+    ).values_list('from_projecttask_id', 'to_projecttask_id'):
+        edges[task].append(predecessor)
+
+    if (
+        schedule is None
+        or schedule.today != timezone.localdate().toordinal()
+        or len(rows) != len(task_ids)
+        or any(row['id'] not in schedule.tasks
+               or sorted(edges[row['id']]) != sorted(schedule.predecessors[row['id']]) for row in rows)
+    ):
+        schedule = compute_schedule(project_id)
+    else:
+        schedule.update(rows)
+        cache.set(SCHEDULE_CACHE_KEY.format(project_id), schedule, SCHEDULE_CACHE_TIMEOUT)
+    return save_forecasts([schedule] if schedule else [])
+
+
+def save_forecasts(schedules):
+    """Recopie fin prévue et retard prévu dans les projets dont ils ont changé.
+
+    Un projet terminé ou annulé n'est jamais en retard prévu (comme dans ``refresh_forecasts``).
+    """
+    expected = {}
+    for pk, finish, overdue, project_status in Project.objects.filter(
+        id__in=[schedule.project_id for schedule in schedules]
+    ).values_list('id', 'forecast_end_date', 'forecast_overdue', 'status'):
+        expected[pk] = (finish, overdue), project_status in ACTIVE_STATUSES
+    changed = []
+    for schedule in schedules:
+        if schedule.project_id not in expected:
+            continue
+        current, active = expected[schedule.project_id]
+        forecast = (schedule.finish, schedule.forecast_overdue and active)
+        if forecast != current:
+            changed.append(Project(
+                id=schedule.project_id, forecast_end_date=forecast[0], forecast_overdue=forecast[1]
+            ))
+    Project.objects.bulk_update(changed, ['forecast_end_date', 'forecast_overdue'], batch_size=FORECAST_BATCH_SIZE)
+    return [project.id for project in changed]
+
+
+def refresh_forecasts(project_ids=None, batch_size=FORECAST_BATCH_SIZE):
+    """Recalcule par paquets le planning des projets actifs (tous, ou ``project_ids``).
+
+    Renvoie ``(projets traités, identifiants des projets dont la prévision a changé)``.
+    """
+    queryset = Project.objects.filter(status__in=ACTIVE_STATUSES)
+    if project_ids is not None:
+        queryset = queryset.filter(id__in=project_ids)
+    ids = list(queryset.order_by().values_list('id', flat=True))
+
+    # Projets terminés ou annulés : plus de retard prévu
+    inactive = Project.objects.exclude(status__in=ACTIVE_STATUSES).filter(forecast_overdue=True)
+    if project_ids is not None:
+        inactive = inactive.filter(id__in=project_ids)
+    changed = list(inactive.values_list('id', flat=True))
+    inactive.update(forecast_overdue=False)
+
+    today = timezone.localdate()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        projects, tasks, edges = _load(chunk)
+        schedules = []
+        for project_id in chunk:
+            try:
+                schedule = Schedule(projects[project_id], tasks[project_id], edges[project_id], today)
+            except DependencyCycle:
+                continue
+            cache.set(SCHEDULE_CACHE_KEY.format(project_id), schedule, SCHEDULE_CACHE_TIMEOUT)
+            schedules.append(schedule)
+        changed += save_forecasts(schedules)
+    return len(ids), changed
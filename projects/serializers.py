@@ -1,9 +1,20 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.urls import reverse
 from .models import (
     ProjectCategory, Project, ProjectImage, ProjectTask, 
     ProjectComment, ProjectDocument
 )
+from btpconnect.fieldsets import SparseFieldsetSerializerMixin
+from btpconnect.geo import clear_stale_coordinates, geocoded_update_fields
+from jobs.serializers import BulkDeleteIdsField
+from uploads.serializers import BlobField
+from uploads.storage import blob_storage
+
+from .bulk import clean_update_data
+from .progress import set_manual_progress
+from .scheduling import creates_cycle
 
 User = get_user_model()
 
@@ -29,23 +40,53 @@ class UserBasicSerializer(serializers.ModelSerializer):
 
 class ProjectImageSerializer(serializers.ModelSerializer):
     """Serializer pour les images de projets"""
+    blob = BlobField()
+
     class Meta:
         model = ProjectImage
-        fields = ['id', 'image', 'alt_text', 'caption', 'order', 'uploaded_at']
+        fields = ['id', 'image', 'blob', 'alt_text', 'caption', 'order', 'uploaded_at']
+        extra_kwargs = {'image': {'required': False}}
+
+    def validate(self, attrs):
+        # Fichier envoyé via /api/uploads/ : chemin renseigné d'après le blob
+        blob = attrs.get('blob')
+        if blob is not None:
+            attrs['image'] = blob_storage.url(blob.path)
+        elif self.instance is None and not attrs.get('image'):
+            raise serializers.ValidationError({'image': "Indiquer le chemin de l'image ou un fichier envoyé (blob)."})
+        return attrs
 
 
 class ProjectTaskSerializer(serializers.ModelSerializer):
     """Serializer pour les tâches de projets"""
     assigned_to_details = UserBasicSerializer(source='assigned_to', read_only=True)
+    depends_on = serializers.PrimaryKeyRelatedField(
+        many=True, required=False, queryset=ProjectTask.objects.only('id', 'project_id')
+    )
 
     class Meta:
         model = ProjectTask
         fields = [
             'id', 'title', 'description', 'is_completed', 'due_date', 
             'completed_at', 'assigned_to', 'assigned_to_details', 'order', 
-            'priority', 'created_at', 'updated_at'
+            'priority', 'duration_days', 'depends_on', 'created_at', 'updated_at'
         ]
 
+    def validate_depends_on(self, value):
+        if self.instance is not None:
+            project_id = self.instance.project_id
+        else:
+            project_id = self.context['view'].kwargs.get('project_id')
+        if any(str(task.project_id) != str(project_id) for task in value):
+            raise serializers.ValidationError("Les dépendances doivent appartenir au même projet.")
+        if self.instance is not None:
+            edges = ProjectTask.depends_on.through.objects.filter(
+                from_projecttask__project_id=project_id
+            ).values_list('from_projecttask_id', 'to_projecttask_id')
+            if creates_cycle(self.instance.pk, [task.pk for task in value], edges):
+                raise serializers.ValidationError("Ces dépendances créeraient un cycle.")
+        return value
+
     def validate(self, data):
         if data.get('is_completed') and not data.get('completed_at'):
             from django.utils import timezone
@@ -74,25 +115,44 @@ class ProjectCommentSerializer(serializers.ModelSerializer):
 class ProjectDocumentSerializer(serializers.ModelSerializer):
     """Serializer pour les documents de projets"""
     uploaded_by_details = UserBasicSerializer(source='uploaded_by', read_only=True)
+    blob = BlobField()
+    download_url = serializers.SerializerMethodField()
 
     class Meta:
         model = ProjectDocument
         fields = [
             'id', 'title', 'description', 'file_path', 'file_type', 
-            'file_size', 'uploaded_by', 'uploaded_by_details', 'uploaded_at'
+            'file_size', 'blob', 'download_url', 'uploaded_by', 'uploaded_by_details', 'uploaded_at'
         ]
+        extra_kwargs = {'file_path': {'required': False}, 'file_type': {'required': False}}
+
+    def validate(self, attrs):
+        # Fichier envoyé via /api/uploads/ : chemin, type et taille lus sur le blob
+        blob = attrs.get('blob')
+        if blob is not None:
+            attrs.update(file_path=blob_storage.url(blob.path), file_type=blob.file_type, file_size=blob.size)
+        elif self.instance is None and not (attrs.get('file_path') and attrs.get('file_type')):
+            raise serializers.ValidationError(
+                {'file_path': "Indiquer le chemin et le type du fichier ou un fichier envoyé (blob)."}
+            )
+        return attrs
+
+    def get_download_url(self, obj):
+        url = reverse('project-document-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     def create(self, validated_data):
         validated_data['uploaded_by'] = self.context['request'].user
         return super().create(validated_data)
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer pour la liste des projets (vue simplifiée)"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
-    tasks_count = serializers.SerializerMethodField()
-    completed_tasks_count = serializers.SerializerMethodField()
+    tasks_count = serializers.IntegerField(source='tasks_total', read_only=True)
+    completed_tasks_count = serializers.IntegerField(source='tasks_completed', read_only=True)
     is_overdue = serializers.ReadOnlyField()
     duration_days = serializers.ReadOnlyField()
 
@@ -100,20 +160,19 @@ class ProjectListSerializer(serializers.ModelSerializer):
         model = Project
         fields = [
             'id', 'title', 'description', 'category_name', 'client_name',
-            'city', 'status', 'priority', 'start_date', 'end_date', 'deadline',
+            'city', 'latitude', 'longitude', 'status', 'priority', 'start_date', 'end_date', 'deadline',
             'estimated_budget', 'progress_percentage', 'main_image',
+            'forecast_end_date', 'forecast_overdue',
             'created_by_name', 'tasks_count', 'completed_tasks_count',
             'is_overdue', 'duration_days', 'created_at', 'updated_at'
         ]
+        field_dependencies = {
+            'is_overdue': ('deadline', 'status'),
+            'duration_days': ('start_date', 'end_date'),
+        }
 
-    def get_tasks_count(self, obj):
-        return obj.tasks.count()
-
-    def get_completed_tasks_count(self, obj):
-        return obj.tasks.filter(is_completed=True).count()
 
-
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer détaillé pour un projet"""
     category = ProjectCategorySerializer(read_only=True)
     created_by = UserBasicSerializer(read_only=True)
@@ -123,10 +182,10 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     comments = ProjectCommentSerializer(many=True, read_only=True)
     documents = ProjectDocumentSerializer(many=True, read_only=True)
     
-    # Champs calculés
-    tasks_count = serializers.SerializerMethodField()
-    completed_tasks_count = serializers.SerializerMethodField()
-    pending_tasks_count = serializers.SerializerMethodField()
+    # Champs calculés (compteurs tenus à jour par projects.progress)
+    tasks_count = serializers.IntegerField(source='tasks_total', read_only=True)
+    completed_tasks_count = serializers.IntegerField(source='tasks_completed', read_only=True)
+    pending_tasks_count = serializers.ReadOnlyField(source='tasks_pending')
     is_overdue = serializers.ReadOnlyField()
     duration_days = serializers.ReadOnlyField()
     budget_variance = serializers.SerializerMethodField()
@@ -136,23 +195,22 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'category', 'client_name',
             'client_email', 'client_phone', 'address', 'city', 'postal_code',
-            'region', 'status', 'priority', 'start_date', 'end_date', 'deadline',
+            'region', 'latitude', 'longitude', 'status', 'priority', 'start_date', 'end_date', 'deadline',
             'estimated_budget', 'actual_budget', 'progress_percentage',
+            'forecast_end_date', 'forecast_overdue',
             'specifications', 'notes', 'tags', 'main_image', 'created_by',
             'assigned_to', 'images', 'tasks', 'comments', 'documents',
             'tasks_count', 'completed_tasks_count', 'pending_tasks_count',
             'is_overdue', 'duration_days', 'budget_variance',
             'created_at', 'updated_at'
         ]
-
-    def get_tasks_count(self, obj):
-        return obj.tasks.count()
-
-    def get_completed_tasks_count(self, obj):
-        return obj.tasks.filter(is_completed=True).count()
-
-    def get_pending_tasks_count(self, obj):
-        return obj.tasks.filter(is_completed=False).count()
+        expandable_fields = ['assigned_to', 'images', 'tasks', 'comments', 'documents']
+        field_dependencies = {
+            'pending_tasks_count': ('tasks_total', 'tasks_completed'),
+            'is_overdue': ('deadline', 'status'),
+            'duration_days': ('start_date', 'end_date'),
+            'budget_variance': ('estimated_budget', 'actual_budget'),
+        }
 
     def get_budget_variance(self, obj):
         """Calcule l'écart budgétaire"""
@@ -174,7 +232,7 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'title', 'description', 'category', 'client_name', 'client_email',
             'client_phone', 'address', 'city', 'postal_code', 'region',
-            'status', 'priority', 'start_date', 'end_date', 'deadline',
+            'latitude', 'longitude', 'status', 'priority', 'start_date', 'end_date', 'deadline',
             'estimated_budget', 'actual_budget', 'progress_percentage',
             'specifications', 'notes', 'tags', 'main_image', 'assigned_to_ids'
         ]
@@ -209,6 +267,12 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
                 "Le budget réel ne peut pas être négatif."
             )
 
+        # Avancement saisi seulement sans tâche (projects.progress)
+        if 'progress_percentage' in data and self.instance is not None and self.instance.tasks_total:
+            raise serializers.ValidationError({
+                'progress_percentage': "L'avancement d'un projet avec des tâches est déduit de celles-ci."
+            })
+
         return data
 
     def create(self, validated_data):
@@ -225,10 +289,15 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         assigned_to_ids = validated_data.pop('assigned_to_ids', None)
+        progress_percentage = validated_data.pop('progress_percentage', None)
+        clear_stale_coordinates(instance, validated_data, ('city', 'region'))
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        # Champs reçus seulement : les compteurs de tâches lus avec l'instance ne sont pas réécrits
+        instance.save(update_fields=geocoded_update_fields(instance, [*validated_data, 'updated_at']))
+        if progress_percentage is not None and set_manual_progress([instance.pk], progress_percentage):
+            instance.progress_percentage = progress_percentage
         
         if assigned_to_ids is not None:
             users = User.objects.filter(id__in=assigned_to_ids)
@@ -237,6 +306,29 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ProjectImportRowSerializer(ProjectCreateUpdateSerializer):
+    """Validation d'une ligne d'import sans requête par ligne.
+
+    Les catégories et utilisateurs du lot sont résolus à l'avance par
+    l'importeur et transmis via le contexte.
+    """
+    category = serializers.CharField()
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value.strip())
+        if category is None:
+            raise serializers.ValidationError(f"Catégorie '{value}' introuvable.")
+        return category
+
+    def validate_assigned_to_ids(self, value):
+        unknown = sorted(set(value) - self.context['user_ids'])
+        if unknown:
+            raise serializers.ValidationError(
+                f"Utilisateurs introuvables : {', '.join(str(user_id) for user_id in unknown)}"
+            )
+        return value
+
+
 class ProjectStatsSerializer(serializers.Serializer):
     """Serializer pour les statistiques des projets"""
     total_projects = serializers.IntegerField()
@@ -249,24 +341,58 @@ class ProjectStatsSerializer(serializers.Serializer):
     recent_projects = ProjectListSerializer(many=True)
 
 
+def _clean_bulk_update_data(value):
+    try:
+        return clean_update_data(value)
+    except DjangoValidationError as exc:
+        raise serializers.ValidationError(
+            exc.message_dict if hasattr(exc, 'error_dict') else exc.messages
+        )
+
+
+class ProjectUpdateEntrySerializer(serializers.Serializer):
+    """Mise à jour propre à un projet dans une opération en lot"""
+    id = serializers.UUIDField()
+    data = serializers.DictField()
+
+    def validate_data(self, value):
+        return _clean_bulk_update_data(value)
+
+
+class ProjectBulkDeleteSerializer(serializers.Serializer):
+    """Projets à supprimer en lot"""
+    project_ids = BulkDeleteIdsField()
+
+
 class ProjectBulkUpdateSerializer(serializers.Serializer):
-    """Serializer pour les mises à jour en lot"""
+    """Serializer pour les mises à jour en lot.
+
+    Deux formes sont acceptées : ``project_ids`` + ``update_data`` (mêmes
+    valeurs pour tous les projets) ou ``updates`` (valeurs par projet).
+    """
     project_ids = serializers.ListField(
         child=serializers.UUIDField(),
-        min_length=1
+        min_length=1,
+        required=False
+    )
+    update_data = serializers.DictField(required=False)
+    updates = serializers.ListField(
+        child=ProjectUpdateEntrySerializer(),
+        min_length=1,
+        required=False
     )
-    update_data = serializers.DictField()
 
     def validate_update_data(self, value):
-        allowed_fields = [
-            'status', 'priority', 'progress_percentage', 'estimated_budget',
-            'actual_budget', 'start_date', 'end_date', 'deadline'
-        ]
-        
-        for field in value.keys():
-            if field not in allowed_fields:
-                raise serializers.ValidationError(
-                    f"Le champ '{field}' n'est pas autorisé pour la mise à jour en lot."
-                )
-        
-        return value
\ No newline at end of file
+        return _clean_bulk_update_data(value)
+
+    def validate(self, data):
+        uniform = 'project_ids' in data or 'update_data' in data
+        if uniform and 'updates' in data:
+            raise serializers.ValidationError(
+                "Utilisez soit project_ids/update_data, soit updates."
+            )
+        if 'updates' not in data and not ('project_ids' in data and 'update_data' in data):
+            raise serializers.ValidationError(
+                "project_ids et update_data sont requis (ou updates)."
+            )
+        return data
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import Signal
+
+from btpconnect.db.attributes import register_attribute_index, reindex_attributes
+from btpconnect.geo import register_geocoding
+from btpconnect.versioning import bump_collection_version
+from jobs.signals import post_bulk_delete
+from uploads.references import track_blob_references
+from .models import (
+    ProjectCategory, Project, ProjectImage, ProjectTask,
+    ProjectComment, ProjectDocument, ProjectAttribute
+)
+from .progress import apply_delta, contribution
+from .scheduling import refresh_forecasts, task_changed
+
+ATTRIBUTE_FIELDS = ('tags', 'specifications')
+
+PROJECTS_COLLECTION = 'projects'
+
+# Envoyé après commit pour chaque opération en lot sur des projets
+# (mise à jour, import), une seule fois par transaction.
+# Arguments : ``project_ids``, ``fields`` et ``created`` (import).
+projects_bulk_changed = Signal()
+
+
+def invalidate_projects(sender, **kwargs):
+    """Invalide les ETags et caches dépendant de la collection des projets"""
+    transaction.on_commit(lambda: bump_collection_version(PROJECTS_COLLECTION))
+
+
+for model in (ProjectCategory, Project, ProjectImage, ProjectTask, ProjectComment, ProjectDocument):
+    post_save.connect(invalidate_projects, sender=model)
+    post_delete.connect(invalidate_projects, sender=model)
+    post_bulk_delete.connect(invalidate_projects, sender=model)
+
+m2m_changed.connect(invalidate_projects, sender=Project.assigned_to.through)
+projects_bulk_changed.connect(invalidate_projects, sender=Project)
+
+track_blob_references(ProjectImage)
+track_blob_references(ProjectDocument)
+
+register_attribute_index(Project, ProjectAttribute, ATTRIBUTE_FIELDS)
+register_geocoding(Project, 'city', 'region')
+
+
+def reindex_bulk_changed(sender, project_ids, fields, created=False, **kwargs):
+    """Import et mises à jour en lot passent outre ``post_save``"""
+    if created or set(fields) & set(ATTRIBUTE_FIELDS):
+        reindex_attributes(Project, project_ids)
+
+
+projects_bulk_changed.connect(reindex_bulk_changed, sender=Project)
+
+
+# ---- planning (projects.scheduling) ----
+
+SCHEDULE_FIELDS = {'start_date', 'deadline', 'status'}
+
+
+def _refresh_schedule(refresh, *args):
+    """Après commit : planning recalculé, caches invalidés si la prévision a changé"""
+    def run():
+        changed = refresh(*args)
+        if changed:
+            bump_collection_version(PROJECTS_COLLECTION)
+    transaction.on_commit(run)
+
+
+def _refresh_forecasts(project_ids):
+    return refresh_forecasts(project_ids)[1]
+
+
+def schedule_task_saved(sender, instance, **kwargs):
+    _refresh_schedule(task_changed, instance.project_id, [instance.pk])
+
+
+def schedule_task_deleted(sender, instance, origin=None, **kwargs):
+    # Suppression du projet lui-même : rien à recalculer
+    if not isinstance(origin, Project):
+        _refresh_schedule(_refresh_forecasts, [instance.project_id])
+
+
+def schedule_dependencies_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _refresh_schedule(_refresh_forecasts, [instance.project_id])
+
+
+def schedule_project_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if not created and (update_fields is None or SCHEDULE_FIELDS & set(update_fields)):
+        _refresh_schedule(_refresh_forecasts, [instance.pk])
+
+
+def schedule_bulk_changed(sender, project_ids, fields, created=False, **kwargs):
+    if not created and SCHEDULE_FIELDS & set(fields):
+        _refresh_schedule(_refresh_forecasts, project_ids)
+
+
+post_save.connect(schedule_task_saved, sender=ProjectTask)
+post_delete.connect(schedule_task_deleted, sender=ProjectTask)
+m2m_changed.connect(schedule_dependencies_changed, sender=ProjectTask.depends_on.through)
+post_save.connect(schedule_project_saved, sender=Project)
+projects_bulk_changed.connect(schedule_bulk_changed, sender=Project)
+
+
+# ---- avancement (projects.progress) ----
+
+def remember_task_state(sender, instance, **kwargs):
+    """État enregistré de la tâche, pour calculer l'écart après l'enregistrement"""
+    instance._progress_previous = None if instance._state.adding else ProjectTask.objects.filter(
+        pk=instance.pk
+    ).values_list('project_id', 'is_completed', 'priority').first()
+
+
+def count_task_saved(sender, instance, **kwargs):
+    current = contribution(instance.is_completed, instance.priority)
+    previous = getattr(instance, '_progress_previous', None)
+    if previous is None:
+        apply_delta(instance.project_id, current)
+        return
+    project_id, is_completed, priority = previous
+    before = contribution(is_completed, priority)
+    if project_id != instance.project_id:
+        apply_delta(project_id, [-value for value in before])
+        apply_delta(instance.project_id, current)
+    else:
+        apply_delta(project_id, [new - old for new, old in zip(current, before)])
+
+
+def count_task_deleted(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, Project):
+        apply_delta(instance.project_id, [-value for value in contribution(instance.is_completed, instance.priority)])
+
+
+pre_save.connect(remember_task_state, sender=ProjectTask)
+post_save.connect(count_task_saved, sender=ProjectTask)
+post_delete.connect(count_task_deleted, sender=ProjectTask)
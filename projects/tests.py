@@ -1,3 +1,137 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+
+from btpconnect.geo import geohash
+from .importers import ProjectImporter
+from .models import Project, ProjectCategory, ProjectTask
+
+User = get_user_model()
+
+CSV_HEADER = 'title,description,category,client_name,client_email,address,city,postal_code,region'
+
+
+class ProjectTestCase(APITestCase):
+    """Utilisateur connecté, catégorie et fabrique de projets"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pw', user_type='CLIENT')
+        self.client.force_authenticate(self.user)
+        self.category = ProjectCategory.objects.create(name='Résidentiel')
+
+    def create_project(self, **kwargs):
+        data = {
+            'title': 'Villa', 'description': 'd', 'category': self.category, 'client_name': 'c',
+            'client_email': 'c@example.com', 'address': 'a', 'city': 'Dakar', 'postal_code': '10000',
+            'region': 'Dakar', 'created_by': self.user,
+        }
+        data.update(kwargs)
+        return Project.objects.create(**data)
+
+
+class ProjectImportTests(ProjectTestCase):
+
+    def post_csv(self, rows):
+        upload = SimpleUploadedFile('projets.csv', '\n'.join([CSV_HEADER, *rows]).encode(), 'text/csv')
+        return self.client.post('/api/projects/import/', {'file': upload}, format='multipart')
+
+    def test_header_only_file_is_not_an_error(self):
+        response = self.post_csv([])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created_count'], 0)
+
+    def test_failure_rolls_back_committed_batches(self):
+        rows = [f'P{index},d,{self.category.id},c,c@example.com,a,Dakar,1,Dakar' for index in range(3)]
+        import_batch = ProjectImporter._import_batch
+        calls = []
+
+        def failing_batch(importer, batch):
+            calls.append(batch)
+            if len(calls) > 1:
+                raise RuntimeError('base indisponible')
+            import_batch(importer, batch)
+
+        # Lots de deux lignes : le premier est inséré, le second échoue
+        with mock.patch.object(ProjectImporter.__init__, '__defaults__', (2,)), \
+                mock.patch.object(ProjectImporter, '_import_batch', failing_batch):
+            with self.assertRaises(RuntimeError):
+                self.post_csv(rows)
+        self.assertFalse(Project.objects.exists())
+
+
+class ProjectBulkUpdateTests(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user('autre', 'autre@example.com', 'pw', user_type='CLIENT')
+        self.own_project = self.create_project()
+        self.other_project = self.create_project(created_by=self.other)
+
+    def test_cannot_update_projects_of_other_users(self):
+        for payload in (
+            {'project_ids': [str(self.own_project.id), str(self.other_project.id)], 'update_data': {'priority': 'high'}},
+            {'updates': [{'id': str(self.other_project.id), 'data': {'priority': 'high'}}]},
+        ):
+            response = self.client.post('/api/projects/bulk-update/', payload, format='json')
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.data['missing_ids'], [self.other_project.id])
+        self.assertFalse(Project.objects.filter(priority='high').exists())
+
+    def test_staff_can_update_any_project(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post('/api/projects/bulk-update/', {
+            'project_ids': [str(self.other_project.id)], 'update_data': {'priority': 'high'}
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.other_project.refresh_from_db()
+        self.assertEqual(self.other_project.priority, 'high')
+
+
+class ProjectUpdateTests(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project = self.create_project()
+
+    def patch(self, data):
+        return self.client.patch(f'/api/projects/{self.project.id}/', data, format='json')
+
+    def test_city_change_geocodes_again(self):
+        self.assertAlmostEqual(self.project.latitude, 14.6928)
+        response = self.patch({'city': 'Thiès', 'region': 'Thiès'})
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertAlmostEqual(self.project.latitude, 14.7910)
+        self.assertAlmostEqual(self.project.longitude, -16.9359)
+        self.assertEqual(self.project.geohash, geohash(self.project.latitude, self.project.longitude))
+
+    def test_update_keeps_task_counters(self):
+        ProjectTask.objects.create(project=self.project, title='Fondations', is_completed=True)
+        # Instance lue avant la tâche : ses compteurs sont périmés
+        response = self.patch({'title': 'Villa R+1'})
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.progress_percentage), (1, 100))
+
+    def test_progress_is_manual_without_tasks(self):
+        self.assertEqual(self.patch({'progress_percentage': 40}).status_code, 200)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.progress_percentage, 40)
+
+        task = ProjectTask.objects.create(project=self.project, title='Fondations')
+        self.assertEqual(self.patch({'progress_percentage': 80}).status_code, 400)
+        response = self.client.post('/api/projects/bulk-update/', {
+            'project_ids': [str(self.project.id)], 'update_data': {'progress_percentage': 80}
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.progress_percentage, 0)
+
+        task.is_completed = True
+        task.save()
+        task.delete()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.progress_percentage), (0, 0))
@@ -10,7 +10,11 @@ urlpatterns = [
     path('projects/', views.ProjectListCreateView.as_view(), name='project-list-create'),
     path('projects/<uuid:id>/', views.ProjectDetailView.as_view(), name='project-detail'),
     path('projects/search/', views.project_search, name='project-search'),
+    path('projects/export/', views.ProjectExportView.as_view(), name='project-export'),
+    path('projects/facets/', views.ProjectFacetView.as_view(), name='project-facets'),
     path('projects/<uuid:project_id>/recommendations/', views.project_recommendations, name='project-recommendations'),
+    path('projects/<uuid:project_id>/schedule/', views.project_schedule, name='project-schedule'),
+    path('projects/<uuid:project_id>/nearby-suppliers/', views.project_nearby_suppliers, name='project-nearby-suppliers'),
     
     # ==================== TÂCHES DE PROJETS ====================
     path('projects/<uuid:project_id>/tasks/', views.ProjectTaskListCreateView.as_view(), name='project-task-list-create'),
@@ -27,6 +31,7 @@ urlpatterns = [
     # ==================== DOCUMENTS DE PROJETS ====================
     path('projects/<uuid:project_id>/documents/', views.ProjectDocumentListCreateView.as_view(), name='project-document-list-create'),
     path('documents/<int:pk>/', views.ProjectDocumentDetailView.as_view(), name='project-document-detail'),
+    path('documents/<int:pk>/download/', views.project_document_download, name='project-document-download'),
     
     # ==================== STATISTIQUES ET TABLEAU DE BORD ====================
     path('projects/statistics/', views.project_statistics, name='project-statistics'),
@@ -35,4 +40,5 @@ urlpatterns = [
     # ==================== OPÉRATIONS EN LOT ====================
     path('projects/bulk-update/', views.project_bulk_update, name='project-bulk-update'),
     path('projects/bulk-delete/', views.project_bulk_delete, name='project-bulk-delete'),
+    path('projects/import/', views.project_import, name='project-import'),
 ]
\ No newline at end of file
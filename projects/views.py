@@ -1,12 +1,36 @@
+import mimetypes
+import os
+
 from rest_framework import generics, status, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Q, Count, Avg, Sum
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils._os import safe_join
+from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from btpconnect.compiled import CompiledListMixin, CompiledExportMixin, get_compiled
+from btpconnect.conditional import ConditionalListMixin, ConditionalDetailMixin, RESPONSE_CACHE_TIMEOUT
+from btpconnect.db.attributes import filter_attributes
+from btpconnect.db.lookups import parse_key_values
+from btpconnect.facets import FacetListMixin
+from btpconnect.downloads import serve_file
+from btpconnect.geo import filter_near, nearest, parse_near, travel_hours
+from btpconnect.fieldsets import SparseFieldsetMixin
+from jobs.deletion import create_deletion_job
+from products.models import Product, Supplier
+from products.serializers import SupplierSerializer
+from uploads.storage import blob_storage
+
 from .models import (
     ProjectCategory, Project, ProjectImage, ProjectTask, 
     ProjectComment, ProjectDocument, ProjectStatus, ProjectPriority
@@ -15,8 +39,12 @@ from .serializers import (
     ProjectCategorySerializer, ProjectListSerializer, ProjectDetailSerializer,
     ProjectCreateUpdateSerializer, ProjectImageSerializer, ProjectTaskSerializer,
     ProjectCommentSerializer, ProjectDocumentSerializer, ProjectStatsSerializer,
-    ProjectBulkUpdateSerializer
+    ProjectBulkUpdateSerializer, ProjectBulkDeleteSerializer
 )
+from .recommendations import project_similarity
+from .bulk import ProgressFromTasks, ProjectBulkUpdater, ProjectsNotFound
+from .importers import ProjectImporter, guess_format, iter_rows
+from .scheduling import DependencyCycle, get_schedule
 
 
 # ==================== CATÉGORIES DE PROJETS ====================
@@ -60,8 +88,10 @@ class ProjectFilter(DjangoFilterBackend):
         }
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(ConditionalListMixin, CompiledListMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
     """Liste et création des projets"""
+    conditional_collection = 'projects'
+    response_cache_timeout = RESPONSE_CACHE_TIMEOUT
     queryset = Project.objects.select_related('category', 'created_by').prefetch_related('assigned_to')
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -103,17 +133,61 @@ class ProjectListCreateView(generics.ListCreateAPIView):
         if assigned_to_me == 'true':
             queryset = queryset.filter(assigned_to=self.request.user)
         
+        # Fin prévue (planning des tâches) postérieure à la date limite
+        forecast_overdue = self.request.query_params.get('forecast_overdue')
+        if forecast_overdue in ('true', 'false'):
+            queryset = queryset.filter(forecast_overdue=forecast_overdue == 'true')
+        
         created_by_me = self.request.query_params.get('created_by_me')
         if created_by_me == 'true':
             queryset = queryset.filter(created_by=self.request.user)
         
+        # ?tags=gros-oeuvre,dakar et ?spec=surface:120
+        tags = self.request.query_params.get('tags')
+        if tags:
+            queryset = filter_attributes(queryset, 'tags', [tag.strip() for tag in tags.split(',') if tag.strip()])
+        specifications = parse_key_values(self.request.query_params.getlist('spec'))
+        if specifications:
+            queryset = filter_attributes(queryset, 'specifications', specifications)
+
+        # ?near=14.69,-17.44&radius=10 (km)
+        near = parse_near(self.request.query_params)
+        if near:
+            queryset = filter_near(queryset, *near)
+        
         return queryset
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectExportView(CompiledExportMixin, ProjectListCreateView):
+    """Export en flux des projets filtrés (mêmes filtres que la liste)"""
+    http_method_names = ['get', 'head', 'options']
+    export_filename = 'projets'
+
+
+class ProjectFacetView(FacetListMixin, ProjectListCreateView):
+    """Nombre de projets par tag et par spécification (mêmes filtres que la liste)"""
+    http_method_names = ['get', 'head', 'options']
+    facet_cache_collection = 'projects'
+    facet_cache_timeout = RESPONSE_CACHE_TIMEOUT
+    # ?assigned_to_me= et ?created_by_me= dépendent de l'utilisateur
+    facet_cache_per_user = True
+
+
+class ProjectDetailView(ConditionalDetailMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Détail, modification et suppression d'un projet"""
+    sparse_prefetch = {
+        'tasks': ('tasks__assigned_to', 'tasks__depends_on'),
+        'comments': 'comments__author',
+        'documents': 'documents__uploaded_by',
+    }
+    conditional_relations = (
+        ('tasks', 'updated_at'),
+        ('comments', 'updated_at'),
+        ('documents', 'uploaded_at'),
+        ('images', 'uploaded_at'),
+    )
     queryset = Project.objects.select_related('category', 'created_by').prefetch_related(
-        'assigned_to', 'images', 'tasks', 'comments__author', 'documents__uploaded_by'
+        'assigned_to', 'images', 'tasks__depends_on', 'comments__author', 'documents__uploaded_by'
     )
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'
@@ -139,30 +213,70 @@ def project_search(request):
         Q(address__icontains=query) |
         Q(city__icontains=query) |
         Q(category__name__icontains=query)
-    ).select_related('category', 'created_by')[:20]
+    )
 
-    serializer = ProjectListSerializer(projects, many=True)
-    return Response({'results': serializer.data})
+    return Response({'results': get_compiled(ProjectListSerializer).serialize(projects, limit=20)})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def project_recommendations(request, project_id):
-    """Recommandations de projets similaires"""
+    """Projets les plus similaires (catégorie, localisation, budget, tags, texte)"""
+    if not Project.objects.filter(id=project_id).exists():
+        return Response({'error': 'Projet non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+
+    ids = project_similarity.similar(project_id, k=10)
+    projects = Project.objects.filter(id__in=ids).select_related('category', 'created_by').in_bulk()
+    serializer = ProjectListSerializer([projects[pk] for pk in ids if pk in projects], many=True)
+    return Response({'recommendations': serializer.data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def project_schedule(request, project_id):
+    """Planning des tâches : dates prévues, marges, chemin critique et fin prévue"""
     try:
-        project = Project.objects.get(id=project_id)
-    except Project.DoesNotExist:
+        schedule = get_schedule(project_id)
+    except DependencyCycle:
+        return Response({'error': 'Les dépendances des tâches forment un cycle'},
+                        status=status.HTTP_409_CONFLICT)
+    if schedule is None:
         return Response({'error': 'Projet non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(schedule.as_dict())
 
-    # Projets similaires basés sur la catégorie et la localisation
-    similar_projects = Project.objects.filter(
-        Q(category=project.category) |
-        Q(city=project.city) |
-        Q(region=project.region)
-    ).exclude(id=project.id).select_related('category', 'created_by')[:10]
 
-    serializer = ProjectListSerializer(similar_projects, many=True)
-    return Response({'recommendations': serializer.data})
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def project_nearby_suppliers(request, project_id):
+    """Fournisseurs les plus proches du chantier et durée de livraison estimée.
+
+    ``?category=`` : fournisseurs ayant des produits actifs de cette catégorie ;
+    ``?radius=`` : distance maximale (km).
+    """
+    project = get_object_or_404(Project.objects.only('latitude', 'longitude'), id=project_id)
+    if project.latitude is None or project.longitude is None:
+        return Response({'error': 'Projet non localisé'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        radius = float(request.query_params['radius']) if request.query_params.get('radius') else None
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'Paramètres radius ou limit invalides'}, status=status.HTTP_400_BAD_REQUEST)
+
+    suppliers = Supplier.objects.all()
+    category = request.query_params.get('category')
+    if category:
+        suppliers = suppliers.filter(pk__in=set(Product.objects.filter(
+            category_id=category, is_active=True
+        ).values_list('supplier_id', flat=True)))
+
+    ranked = nearest(suppliers, project.latitude, project.longitude, radius_km=radius, limit=limit)
+    found = Supplier.objects.in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, distance in ranked:
+        data = SupplierSerializer(found[pk]).data
+        data.update(distance_km=distance, estimated_delivery_hours=travel_hours(distance))
+        results.append(data)
+    return Response({'results': results})
 
 
 # ==================== TÂCHES DE PROJETS ====================
@@ -177,7 +291,9 @@ class ProjectTaskListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         project_id = self.kwargs['project_id']
-        return ProjectTask.objects.filter(project_id=project_id).select_related('assigned_to')
+        return ProjectTask.objects.filter(project_id=project_id).select_related(
+            'assigned_to'
+        ).prefetch_related('depends_on')
 
     def perform_create(self, serializer):
         project_id = self.kwargs['project_id']
@@ -186,7 +302,7 @@ class ProjectTaskListCreateView(generics.ListCreateAPIView):
 
 class ProjectTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Détail, modification et suppression d'une tâche"""
-    queryset = ProjectTask.objects.select_related('assigned_to', 'project')
+    queryset = ProjectTask.objects.select_related('assigned_to', 'project').prefetch_related('depends_on')
     serializer_class = ProjectTaskSerializer
     permission_classes = [IsAuthenticated]
 
@@ -276,6 +392,42 @@ class ProjectDocumentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
+def _document_file(document):
+    """Chemin local, type MIME, ETag et date d'un document"""
+    blob = document.blob
+    if blob is not None:
+        # Contenu adressé par son SHA-256 : l'empreinte sert d'ETag fort
+        return blob_storage.path(blob.path), blob.content_type, f'"{blob.sha256}"', blob.created_at.timestamp()
+
+    relative = document.file_path.lstrip('/')
+    media_url = settings.MEDIA_URL.lstrip('/')
+    if relative.startswith(media_url):
+        relative = relative[len(media_url):]
+    try:
+        path = safe_join(settings.MEDIA_ROOT, relative)
+    except SuspiciousFileOperation:
+        raise Http404('Fichier introuvable')
+    return path, mimetypes.guess_type(path)[0] or 'application/octet-stream', None, None
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([IsAuthenticated])
+def project_document_download(request, pk):
+    """Téléchargement d'un document (requêtes partielles ``Range`` acceptées)"""
+    document = get_object_or_404(ProjectDocument.objects.select_related('project', 'blob'), pk=pk)
+    if document.uploaded_by_id != request.user.pk and not document.project.is_accessible_by(request.user):
+        return Response({'error': "Vous n'avez pas accès à ce projet"}, status=status.HTTP_403_FORBIDDEN)
+
+    path, content_type, etag, last_modified = _document_file(document)
+    extension = os.path.splitext(path)[1]
+    filename = document.title.replace('/', '-')
+    if extension and not filename.lower().endswith(extension.lower()):
+        filename += extension
+    return serve_file(
+        request, path, content_type=content_type, filename=filename, etag=etag, last_modified=last_modified
+    )
+
+
 # ==================== STATISTIQUES ====================
 
 @api_view(['GET'])
@@ -345,55 +497,96 @@ def project_bulk_update(request):
     """Mise à jour en lot des projets"""
     serializer = ProjectBulkUpdateSerializer(data=request.data)
     if serializer.is_valid():
-        project_ids = serializer.validated_data['project_ids']
-        update_data = serializer.validated_data['update_data']
-        
-        # Vérifier que l'utilisateur a accès aux projets
-        projects = Project.objects.filter(id__in=project_ids)
-        if projects.count() != len(project_ids):
+        updater = ProjectBulkUpdater(request.user)
+        try:
+            if 'updates' in serializer.validated_data:
+                updated_count = updater.update_each(serializer.validated_data['updates'])
+            else:
+                updated_count = updater.update(
+                    serializer.validated_data['project_ids'],
+                    serializer.validated_data['update_data']
+                )
+        except ProjectsNotFound as exc:
             return Response(
-                {'error': 'Certains projets sont introuvables'},
+                {'error': 'Certains projets sont introuvables', 'missing_ids': exc.missing_ids},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
-        # Effectuer la mise à jour
-        updated_count = projects.update(**update_data)
-        
+        except ProgressFromTasks as exc:
+            return Response(
+                {'error': "L'avancement de ces projets est déduit de leurs tâches", 'project_ids': exc.project_ids},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         return Response({
             'message': f'{updated_count} projets mis à jour avec succès',
-            'updated_count': updated_count
+            'updated_count': updated_count,
+            'batch_id': updater.batch_id
         })
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['DELETE'])
+@api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def project_bulk_delete(request):
-    """Suppression en lot des projets"""
-    project_ids = request.data.get('project_ids', [])
-    
-    if not project_ids:
+@parser_classes([MultiPartParser])
+def project_import(request):
+    """Import en masse de projets depuis un fichier CSV ou NDJSON"""
+    upload = request.FILES.get('file')
+    if upload is None:
         return Response(
-            {'error': 'Aucun ID de projet fourni'},
+            {'error': 'Aucun fichier fourni (champ "file")'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    # Vérifier que l'utilisateur a accès aux projets
+
+    try:
+        file_format = guess_format(upload, request.data.get('format'))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Tout ou rien : une erreur en cours d'import n'en laisse pas une partie en base
+    with transaction.atomic():
+        report = ProjectImporter(request.user).run(iter_rows(upload, file_format))
+
+    if report['created_count']:
+        response_status = status.HTTP_201_CREATED
+    elif report['error_count']:
+        response_status = status.HTTP_400_BAD_REQUEST
+    else:
+        # Fichier sans ligne de données
+        response_status = status.HTTP_200_OK
+    return Response({
+        'message': f"{report['created_count']} projets importés, {report['error_count']} lignes en erreur",
+        **report
+    }, status=response_status)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def project_bulk_delete(request):
+    """Suppression en lot des projets (exécutée en arrière-plan)"""
+    serializer = ProjectBulkDeleteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    project_ids = set(serializer.validated_data['project_ids'])
+
+    # Vérifier que l'utilisateur a accès aux projets (les siens, tous pour le staff)
     projects = Project.objects.filter(id__in=project_ids)
-    if projects.count() != len(project_ids):
+    if not request.user.is_staff:
+        projects = projects.filter(created_by=request.user)
+    found = set(projects.values_list('id', flat=True))
+    if found != project_ids:
         return Response(
-            {'error': 'Certains projets sont introuvables'},
+            {'error': 'Certains projets sont introuvables', 'missing_ids': sorted(map(str, project_ids - found))},
             status=status.HTTP_404_NOT_FOUND
         )
-    
-    # Effectuer la suppression
-    deleted_count, _ = projects.delete()
+
+    # Planifier la suppression (projets, tâches, commentaires, images, documents)
+    job = create_deletion_job(Project, list(found), user=request.user)
     
     return Response({
-        'message': f'{deleted_count} projets supprimés avec succès',
-        'deleted_count': deleted_count
-    })
+        'message': f'Suppression de {job.total} projets planifiée',
+        'job_id': job.id,
+        'status_url': request.build_absolute_uri(reverse('deletion-job-detail', args=[job.id]))
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['GET'])
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from .models import MediaBlob, UploadSession
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'content_type', 'size', 'ref_count', 'created_at']
+    list_filter = ['content_type', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'path', 'size', 'content_type', 'extension', 'ref_count', 'created_at']
+    ordering = ['-created_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'received', 'size', 'created_by', 'created_at', 'expires_at']
+    list_filter = ['created_at']
+    readonly_fields = ['filename', 'content_type', 'size', 'received', 'blob', 'created_by', 'created_at', 'expires_at']
+    ordering = ['-created_at']
@@ -0,0 +1,66 @@
+import os
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from rest_framework.parsers import MultiPartParser
+
+from .storage import BlobTooLarge, HashingWriter, temporary_file
+
+
+class HashedUploadedFile(UploadedFile):
+    """Fichier reçu, écrit dans le répertoire des blobs et déjà haché"""
+
+    def __init__(self, file, name, content_type, size, charset, sha256, head):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+        self.head = head
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            # Fichier non rangé comme blob (requête invalide, erreur)
+            if os.path.exists(self.file.name):
+                os.remove(self.file.name)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Écrit les fichiers multipart sur disque en calculant leur SHA-256 au passage"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = temporary_file()
+        self.writer = HashingWriter(self.file)
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.writer.write(raw_data)
+        except BlobTooLarge:
+            self.upload_interrupted()
+            raise StopUpload(connection_reset=True)
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        return HashedUploadedFile(
+            self.file, self.file_name, self.content_type, file_size, self.charset,
+            self.writer.sha256, self.writer.head,
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+            if os.path.exists(self.file.name):
+                os.remove(self.file.name)
+
+
+class HashingMultiPartParser(MultiPartParser):
+    """``MultiPartParser`` utilisant ``HashingUploadHandler`` pour les fichiers"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from uploads.models import MediaBlob, UploadSession
+from uploads.references import count_references
+from uploads.storage import delete_blob_file, delete_session_file
+
+
+class Command(BaseCommand):
+    help = 'Supprime les fichiers stockés sans référence et les envois reprenables expirés'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=getattr(settings, 'BLOB_GC_GRACE_HOURS', 24),
+                            help="Âge minimal d'un fichier sans référence avant suppression")
+        parser.add_argument('--recount', action='store_true',
+                            help='Recalcule les compteurs de références avant la collecte')
+        parser.add_argument('--dry-run', action='store_true', help='Afficher sans supprimer')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        dry_run = options['dry_run']
+
+        expired = list(UploadSession.objects.filter(expires_at__lte=now))
+        if not dry_run:
+            for session in expired:
+                if not session.is_complete:
+                    delete_session_file(session)
+                session.delete()
+        self.stdout.write(f'{len(expired)} envois expirés')
+
+        if options['recount']:
+            self.stdout.write(f'{self._recount(dry_run)} compteurs corrigés')
+
+        orphans = MediaBlob.objects.filter(
+            ref_count__lte=0, created_at__lt=now - timedelta(hours=options['grace_hours'])
+        )
+        deleted = freed = 0
+        for blob in orphans.iterator():
+            if dry_run:
+                deleted, freed = deleted + 1, freed + blob.size
+                continue
+            try:
+                with transaction.atomic():
+                    blob.delete()
+                    transaction.on_commit(lambda blob=blob: delete_blob_file(blob))
+            except ProtectedError:
+                # Compteur faux : encore référencé
+                self.stderr.write(f'{blob.sha256} encore référencé, relancer avec --recount')
+                continue
+            deleted, freed = deleted + 1, freed + blob.size
+        self.stdout.write(self.style.SUCCESS(f'{deleted} fichiers supprimés ({freed} octets)'))
+
+    def _recount(self, dry_run):
+        counts = count_references()
+        fixed = 0
+        for pk, ref_count in MediaBlob.objects.values_list('pk', 'ref_count').iterator():
+            if counts.get(pk, 0) != ref_count:
+                fixed += 1
+                if not dry_run:
+                    MediaBlob.objects.filter(pk=pk).update(ref_count=counts.get(pk, 0))
+        return fixed
@@ -0,0 +1,63 @@
+# Generated by Django 4.1.4 on 2026-10-18 23:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('path', models.CharField(max_length=255, verbose_name='Chemin dans le stockage')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Taille (octets)')),
+                ('content_type', models.CharField(max_length=100, verbose_name='Type MIME')),
+                ('extension', models.CharField(blank=True, max_length=20, verbose_name='Extension')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Références')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fichier stocké',
+                'verbose_name_plural': 'Fichiers stockés',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Type MIME annoncé')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Taille totale (octets)')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(verbose_name='Expire le')),
+                ('blob', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='uploads.mediablob', verbose_name='Fichier obtenu')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Créée par')),
+            ],
+            options={
+                'verbose_name': 'Envoi par morceaux',
+                'verbose_name_plural': 'Envois par morceaux',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mediablob',
+            index=models.Index(fields=['ref_count', 'created_at'], name='uploads_med_ref_cou_ab026f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['expires_at'], name='uploads_upl_expires_533d34_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+import uuid
+
+User = get_user_model()
+
+
+class MediaBlob(models.Model):
+    """Contenu de fichier stocké une seule fois, adressé par son SHA-256"""
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    path = models.CharField(max_length=255, verbose_name="Chemin dans le stockage")
+    size = models.PositiveBigIntegerField(verbose_name="Taille (octets)")
+    content_type = models.CharField(max_length=100, verbose_name="Type MIME")
+    extension = models.CharField(max_length=20, blank=True, verbose_name="Extension")
+    ref_count = models.IntegerField(default=0, verbose_name="Références")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fichier stocké"
+        verbose_name_plural = "Fichiers stockés"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ref_count', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} octets)"
+
+    @property
+    def file_type(self):
+        """Type court affiché pour les documents (``pdf``, ``dwg``...)"""
+        return self.extension or self.content_type.rsplit('/', 1)[-1][:50]
+
+
+class UploadSession(models.Model):
+    """Envoi en plusieurs morceaux, reprenable, d'un fichier volumineux"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Type MIME annoncé")
+    size = models.PositiveBigIntegerField(verbose_name="Taille totale (octets)")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Octets reçus")
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Fichier obtenu"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name="Créée par"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(verbose_name="Expire le")
+
+    class Meta:
+        verbose_name = "Envoi par morceaux"
+        verbose_name_plural = "Envois par morceaux"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.blob_id is not None
@@ -0,0 +1,83 @@
+"""Comptage des références vers les ``MediaBlob``.
+
+``track_blob_references(Model)`` tient ``MediaBlob.ref_count`` à jour quand
+une instance de ``Model`` est créée, change de blob ou est supprimée (y
+compris par les suppressions en lot de l'application jobs). Un blob sans
+référence est supprimé par ``manage.py collect_blobs`` après un délai de
+grâce (le temps de rattacher un fichier tout juste envoyé) ; la même commande
+recalcule les compteurs avec ``--recount``.
+"""
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from jobs.signals import pre_bulk_delete
+from .models import MediaBlob
+
+# Modèle -> nom du champ ForeignKey vers MediaBlob
+BLOB_REFERENCES = {}
+
+_UNKNOWN = object()
+
+
+def change_ref_count(blob_id, delta):
+    MediaBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + delta)
+
+
+def _attname(model):
+    return model._meta.get_field(BLOB_REFERENCES[model]).attname
+
+
+def _remember_blob(sender, instance, **kwargs):
+    # Champ différé : valeur d'origine inconnue, aucun comptage à l'enregistrement
+    instance._loaded_blob_id = instance.__dict__.get(_attname(sender), _UNKNOWN)
+
+
+def _count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = getattr(instance, _attname(sender))
+    old = None if created else getattr(instance, '_loaded_blob_id', _UNKNOWN)
+    if old is _UNKNOWN or old == new:
+        instance._loaded_blob_id = new
+        return
+    if new is not None:
+        change_ref_count(new, 1)
+    if old is not None:
+        change_ref_count(old, -1)
+    instance._loaded_blob_id = new
+
+
+def _count_deleted(sender, instance, **kwargs):
+    blob_id = getattr(instance, _attname(sender))
+    if blob_id is not None:
+        change_ref_count(blob_id, -1)
+
+
+def _count_bulk_deleted(sender, pks, **kwargs):
+    field_name = BLOB_REFERENCES[sender]
+    blob_ids = sender._base_manager.filter(
+        pk__in=pks, **{f'{field_name}__isnull': False}
+    ).values_list(_attname(sender), flat=True)
+    for blob_id, count in Counter(blob_ids).items():
+        change_ref_count(blob_id, -count)
+
+
+def track_blob_references(model, field_name='blob'):
+    BLOB_REFERENCES[model] = field_name
+    post_init.connect(_remember_blob, sender=model)
+    post_save.connect(_count_saved, sender=model)
+    post_delete.connect(_count_deleted, sender=model)
+    pre_bulk_delete.connect(_count_bulk_deleted, sender=model)
+
+
+def count_references():
+    """Nombre réel de références par blob, toutes tables confondues"""
+    counts = Counter()
+    for model in BLOB_REFERENCES:
+        counts.update(
+            model._base_manager.filter(**{f'{BLOB_REFERENCES[model]}__isnull': False})
+            .values_list(_attname(model), flat=True).iterator()
+        )
+    return counts
@@ -0,0 +1,46 @@
+from rest_framework import serializers
+
+from .models import MediaBlob, UploadSession
+from .storage import BLOB_MAX_SIZE, blob_storage
+
+
+class BlobField(serializers.SlugRelatedField):
+    """Référence à un fichier stocké par son SHA-256"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'sha256')
+        kwargs.setdefault('queryset', MediaBlob.objects.all())
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+
+
+class MediaBlobSerializer(serializers.ModelSerializer):
+    """Serializer pour les fichiers stockés"""
+    url = serializers.SerializerMethodField()
+    file_type = serializers.ReadOnlyField()
+
+    class Meta:
+        model = MediaBlob
+        fields = ['sha256', 'size', 'content_type', 'file_type', 'url', 'created_at']
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return blob_storage.url(obj.path)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer pour les envois reprenables"""
+    blob = MediaBlobSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'content_type', 'size', 'received', 'blob', 'created_at', 'expires_at']
+        read_only_fields = ['id', 'received', 'blob', 'created_at', 'expires_at']
+
+    def validate_size(self, value):
+        if not value:
+            raise serializers.ValidationError("Le fichier est vide.")
+        if value > BLOB_MAX_SIZE:
+            raise serializers.ValidationError(f"Fichier limité à {BLOB_MAX_SIZE} octets.")
+        return value
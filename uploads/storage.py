@@ -0,0 +1,190 @@
+"""Stockage des fichiers adressé par contenu.
+
+Chaque fichier est rangé une seule fois sous son SHA-256
+(``blobs/ab/cd/abcd….pdf``) ; un même plan envoyé sur plusieurs projets ne
+consomme qu'un fichier, partagé par les ``MediaBlob`` référencés. Le contenu
+est haché pendant son écriture sur disque, par morceaux, sans jamais être
+chargé entièrement en mémoire, puis déplacé (``os.replace``) à son adresse
+définitive.
+
+Les envois reprenables écrivent chaque morceau à sa position dans un fichier
+de session ; l'état de ``hashlib`` ne pouvant pas être conservé entre deux
+requêtes, le fichier reconstitué est relu par morceaux pour être haché.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+
+from .models import MediaBlob
+
+BLOB_ROOT = getattr(settings, 'BLOB_STORAGE_ROOT', os.path.join(settings.MEDIA_ROOT, 'blobs'))
+BLOB_URL = getattr(settings, 'BLOB_STORAGE_URL', f'{settings.MEDIA_URL}blobs/')
+BLOB_MAX_SIZE = getattr(settings, 'BLOB_MAX_SIZE', 2_000_000_000)
+CHUNK_SIZE = 256 * 1024
+# Début du fichier conservé pour reconnaître son type
+SNIFF_SIZE = 2048
+
+blob_storage = FileSystemStorage(location=BLOB_ROOT, base_url=BLOB_URL)
+
+SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'AC10', 'image/vnd.dwg'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+
+class BlobTooLarge(Exception):
+    """Fichier dépassant ``BLOB_MAX_SIZE``"""
+
+
+def _work_dir(name):
+    path = os.path.join(BLOB_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temporary_file(prefix='upload-'):
+    """Fichier temporaire sur le même système de fichiers que les blobs"""
+    return tempfile.NamedTemporaryFile(dir=_work_dir('tmp'), prefix=prefix, delete=False)
+
+
+def session_path(session):
+    return os.path.join(_work_dir('sessions'), str(session.pk))
+
+
+def file_extension(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return extension if extension.isalnum() and len(extension) <= 20 else ''
+
+
+def detect_content_type(head, filename, declared=''):
+    """Type MIME d'après la signature du contenu, puis le nom, puis le client"""
+    guessed = mimetypes.guess_type(filename or '')[0]
+    if head[8:12] == b'WEBP' and head.startswith(b'RIFF'):
+        return 'image/webp'
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            # Les formats bureautiques (docx, xlsx...) sont des archives zip
+            if content_type == 'application/zip' and guessed:
+                return guessed
+            return content_type
+    return guessed or declared or 'application/octet-stream'
+
+
+def blob_path(sha256, extension):
+    suffix = f'.{extension}' if extension else ''
+    return f'{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}'
+
+
+class HashingWriter:
+    """Écrit des morceaux dans un fichier en calculant SHA-256, taille et en-tête"""
+
+    def __init__(self, file):
+        self.file = file
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > BLOB_MAX_SIZE:
+            raise BlobTooLarge(f'Fichier limité à {BLOB_MAX_SIZE} octets')
+        self.hasher.update(chunk)
+        if len(self.head) < SNIFF_SIZE:
+            self.head += chunk[:SNIFF_SIZE - len(self.head)]
+        if self.file is not None:
+            self.file.write(chunk)
+
+    @property
+    def sha256(self):
+        return self.hasher.hexdigest()
+
+
+def hash_file(path):
+    """Relit un fichier par morceaux : ``(sha256, taille, en-tête)``"""
+    writer = HashingWriter(None)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            writer.write(chunk)
+    return writer.sha256, writer.size, writer.head
+
+
+def store_file(temp_path, sha256, size, filename, head, declared_type=''):
+    """Range un fichier temporaire déjà haché ; renvoie ``(blob, créé)``.
+
+    Si le contenu est déjà stocké, le fichier temporaire est simplement supprimé.
+    """
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    if blob is not None and blob_storage.exists(blob.path):
+        os.remove(temp_path)
+        return blob, False
+
+    path = blob.path if blob is not None else blob_path(sha256, file_extension(filename))
+    full_path = blob_storage.path(path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.replace(temp_path, full_path)
+    os.chmod(full_path, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+    if blob is not None:
+        return blob, False
+
+    try:
+        with transaction.atomic():
+            blob = MediaBlob.objects.create(
+                sha256=sha256,
+                path=path,
+                size=size,
+                content_type=detect_content_type(head, filename, declared_type),
+                extension=file_extension(filename),
+            )
+    except IntegrityError:
+        # Même contenu envoyé en parallèle : le fichier en place est identique
+        return MediaBlob.objects.get(sha256=sha256), False
+    return blob, True
+
+
+def create_session_file(session):
+    open(session_path(session), 'wb').close()
+
+
+def delete_session_file(session):
+    path = session_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def write_chunk(session, stream, start, length):
+    """Écrit un morceau d'envoi reprenable à sa position, lu par blocs depuis ``stream``"""
+    with open(session_path(session), 'r+b') as file:
+        file.seek(start)
+        remaining = length
+        while remaining:
+            data = stream.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                raise EOFError('Morceau incomplet')
+            file.write(data)
+            remaining -= len(data)
+
+
+def complete_session(session):
+    """Hache le fichier reconstitué et le range comme blob"""
+    path = session_path(session)
+    os.truncate(path, session.size)
+    sha256, size, head = hash_file(path)
+    blob, _ = store_file(path, sha256, size, session.filename, head, session.content_type)
+    session.blob = blob
+    session.save(update_fields=['blob'])
+    return blob
+
+
+def delete_blob_file(blob):
+    if blob_storage.exists(blob.path):
+        blob_storage.delete(blob.path)
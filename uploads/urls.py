@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.blob_upload, name='blob-upload'),
+    path('blobs/<str:sha256>/', views.MediaBlobDetailView.as_view(), name='media-blob-detail'),
+    path('sessions/', views.UploadSessionCreateView.as_view(), name='upload-session-create'),
+    path('sessions/<uuid:pk>/', views.UploadSessionDetailView.as_view(), name='upload-session-detail'),
+]
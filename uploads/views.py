@@ -0,0 +1,122 @@
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .handlers import HashedUploadedFile, HashingMultiPartParser
+from .models import MediaBlob, UploadSession
+from .serializers import MediaBlobSerializer, UploadSessionSerializer
+from .storage import complete_session, create_session_file, delete_session_file, store_file, write_chunk
+
+SESSION_TTL = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+# ==================== ENVOI DIRECT ====================
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([HashingMultiPartParser])
+def blob_upload(request):
+    """Envoi d'un fichier (champ ``file``), stocké une seule fois par contenu"""
+    uploaded = request.FILES.get('file')
+    if not isinstance(uploaded, HashedUploadedFile):
+        return Response({'file': ['Aucun fichier envoyé.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        blob, created = store_file(
+            uploaded.temporary_file_path(), uploaded.sha256, uploaded.size,
+            uploaded.name, uploaded.head, uploaded.content_type,
+        )
+    finally:
+        uploaded.close()
+    return Response(
+        MediaBlobSerializer(blob).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+class MediaBlobDetailView(generics.RetrieveAPIView):
+    """Fichier déjà stocké ? (à vérifier avec le SHA-256 calculé côté client avant l'envoi)"""
+    queryset = MediaBlob.objects.all()
+    serializer_class = MediaBlobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sha256'
+
+
+# ==================== ENVOIS REPRENABLES ====================
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """Ouvre un envoi en plusieurs morceaux (``filename``, ``size``)"""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        session = serializer.save(created_by=self.request.user, expires_at=timezone.now() + SESSION_TTL)
+        create_session_file(session)
+
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    """État (octets reçus), envoi d'un morceau (``PUT`` + ``Content-Range``) et abandon"""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            created_by=self.request.user, expires_at__gt=timezone.now()
+        ).select_related('blob')
+
+    def put(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.is_complete:
+            return Response(self.get_serializer(session).data)
+
+        start, end, total = self._content_range(request)
+        if total != session.size or end >= session.size:
+            raise ParseError('Content-Range incompatible avec la taille annoncée')
+        if start != session.received:
+            return Response(
+                {'detail': 'Position inattendue, reprendre à « received ».', 'received': session.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        length = end - start + 1
+        if int(request.META.get('CONTENT_LENGTH') or 0) != length:
+            raise ParseError('Content-Length différent de la longueur du morceau')
+
+        try:
+            write_chunk(session, request.stream, start, length)
+        except EOFError as exc:
+            raise ParseError(str(exc))
+        # Mise à jour conditionnelle : un seul envoi concurrent du même morceau est compté
+        if not UploadSession.objects.filter(pk=session.pk, received=start).update(received=end + 1):
+            session.refresh_from_db(fields=['received'])
+            return Response(
+                {'detail': 'Morceau déjà reçu.', 'received': session.received},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        session.received = end + 1
+        if session.received == session.size:
+            complete_session(session)
+            return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+        return Response(self.get_serializer(session).data)
+
+    def perform_destroy(self, instance):
+        if not instance.is_complete:
+            delete_session_file(instance)
+        instance.delete()
+
+    def _content_range(self, request):
+        match = CONTENT_RANGE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            raise ParseError('En-tête Content-Range attendu : bytes début-fin/total')
+        start, end, total = (int(value) for value in match.groups())
+        if end < start:
+            raise ParseError('Content-Range invalide')
+        return start, end, total